@@ -53,6 +53,62 @@ class Config:
     CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple')
     CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
     
+    # In-process L1 cache in front of the Flask-Caching backend
+    L1_CACHE_ENABLED = os.environ.get('L1_CACHE_ENABLED', 'true').lower() == 'true'
+    L1_CACHE_MAX_BYTES = int(os.environ.get('L1_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    L1_CACHE_MAX_ENTRIES = int(os.environ.get('L1_CACHE_MAX_ENTRIES', 1024))
+    L1_CACHE_TTL = int(os.environ.get('L1_CACHE_TTL', 30))  # seconds; bounds cross-worker staleness
+    # Cross-worker L1 invalidation: auto (Redis when the backend is Redis), redis, unix or none
+    CACHE_INVALIDATION_BUS = os.environ.get('CACHE_INVALIDATION_BUS', 'auto')
+    CACHE_INVALIDATION_SOCKET_DIR = os.environ.get('CACHE_INVALIDATION_SOCKET_DIR', '/tmp/nyas-cache-bus')
+    
+    # Single-flight cache fills
+    CACHE_FILL_WAIT_TIMEOUT = float(os.environ.get('CACHE_FILL_WAIT_TIMEOUT', 5))  # seconds a follower waits for a fill
+    CACHE_FILL_LOCK_TIMEOUT = float(os.environ.get('CACHE_FILL_LOCK_TIMEOUT', 30))  # Redis fill lock expiry
+    
+    # Stale-while-revalidate for smart_cache entries
+    CACHE_TTL_JITTER = float(os.environ.get('CACHE_TTL_JITTER', 0.1))  # +/- fraction applied to tier TTLs
+    CACHE_STALE_FACTOR = float(os.environ.get('CACHE_STALE_FACTOR', 2.0))  # hard TTL = soft TTL * factor
+    CACHE_EARLY_REFRESH_BETA = float(os.environ.get('CACHE_EARLY_REFRESH_BETA', 1.0))  # >1 refreshes earlier
+    
+    # Rendered template fragment cache
+    FRAGMENT_CACHE_ENABLED = os.environ.get('FRAGMENT_CACHE_ENABLED', 'true').lower() == 'true'
+    FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 600))
+    
+    # Full-response cache for public catalog and item pages
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    
+    # Bloom filter rejecting unknown bond / record ids before they reach the database
+    CATALOG_FILTER_ENABLED = os.environ.get('CATALOG_FILTER_ENABLED', 'true').lower() == 'true'
+    CATALOG_FILTER_FP_RATE = float(os.environ.get('CATALOG_FILTER_FP_RATE', 0.01))
+    CATALOG_FILTER_MAX_AGE = int(os.environ.get('CATALOG_FILTER_MAX_AGE', 60))  # seconds between version checks
+    
+    # Size of the maintained "recently adopted" list on the historical records page
+    RECENT_ADOPTIONS_SIZE = int(os.environ.get('RECENT_ADOPTIONS_SIZE', 20))
+    
+    # Maintained popular-items ranking; seconds between full reconciliations (0 disables)
+    ITEM_POPULARITY_RECONCILE_INTERVAL = int(os.environ.get('ITEM_POPULARITY_RECONCILE_INTERVAL', 3600))
+    
+    # /optimized/* operational endpoints (bulk updates, cache clearing, stats,
+    # donor data); unauthenticated, so off unless explicitly enabled
+    OPTIMIZED_INTERNAL_ENDPOINTS_ENABLED = os.environ.get('OPTIMIZED_INTERNAL_ENDPOINTS_ENABLED', 'false').lower() == 'true'
+    
+    # ETag / Last-Modified validation on catalog and item pages
+    CONDITIONAL_GET_ENABLED = os.environ.get('CONDITIONAL_GET_ENABLED', 'true').lower() == 'true'
+    
+    # Background warmer for the most requested catalog and item pages
+    CACHE_WARMER_ENABLED = os.environ.get('CACHE_WARMER_ENABLED', 'false').lower() == 'true'
+    CACHE_WARMER_INTERVAL = int(os.environ.get('CACHE_WARMER_INTERVAL', 300))  # seconds between cycles
+    CACHE_WARMER_TOP_K = int(os.environ.get('CACHE_WARMER_TOP_K', 50))
+    CACHE_WARMER_TIME_BUDGET = float(os.environ.get('CACHE_WARMER_TIME_BUDGET', 10))  # seconds per cycle
+    CACHE_WARMER_WINDOW = int(os.environ.get('CACHE_WARMER_WINDOW', 3600))  # rolling access window
+    CACHE_WARMER_MAX_POOL_USAGE = float(os.environ.get('CACHE_WARMER_MAX_POOL_USAGE', 0.5))  # back off above this
+    
+    # Redis entry encoding: 'compact' (msgpack + compression) or 'pickle'
+    CACHE_CODEC = os.environ.get('CACHE_CODEC', 'compact')
+    CACHE_CODEC_COMPRESSION = os.environ.get('CACHE_CODEC_COMPRESSION', 'auto')  # auto, zstd, zlib or none
+    CACHE_CODEC_COMPRESS_MIN_BYTES = int(os.environ.get('CACHE_CODEC_COMPRESS_MIN_BYTES', 1024))
+    
     # PayPal configuration
     PAYPAL_CLIENT_ID = os.environ.get('PAYPAL_CLIENT_ID')
     PAYPAL_CLIENT_SECRET_KEY = os.environ.get('PAYPAL_CLIENT_SECRET_KEY')
@@ -80,6 +136,7 @@ class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI') or 'sqlite:///dev.db'
+    OPTIMIZED_INTERNAL_ENDPOINTS_ENABLED = os.environ.get('OPTIMIZED_INTERNAL_ENDPOINTS_ENABLED', 'true').lower() == 'true'
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -107,6 +164,7 @@ class ProductionConfig(Config):
     CACHE_REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
     CACHE_DEFAULT_TIMEOUT = 900  # 15 minutes
     CACHE_KEY_PREFIX = 'nyas:'
+    CACHE_WARMER_ENABLED = os.environ.get('CACHE_WARMER_ENABLED', 'true').lower() == 'true'
     
     @classmethod
     def init_app(cls, app):
@@ -154,6 +212,34 @@ def create_app(config_name: Optional[str] = None) -> Flask:
     # Import models within app context
     with app.app_context():
         from app.db import models
+    
+    # Configure the in-process cache tier
+    from app.services.cache_service import AdvancedCacheService
+    AdvancedCacheService.init_app(app)
+    
+    # Broadcast L1 invalidations to the other workers
+    from app.services.invalidation_bus import invalidation_bus
+    invalidation_bus.init_app(app)
+    
+    # Bloom filters over valid item ids
+    from app.services.catalog_filter import catalog_filter
+    catalog_filter.init_app(app)
+    
+    # Bounded recent-adoptions list
+    from app.services.recent_adoptions import recent_adoptions
+    recent_adoptions.init_app(app)
+    
+    # Periodically reconcile the maintained popularity counts
+    from app.services.popularity_service import popularity_service
+    popularity_service.init_app(app)
+    
+    # Count catalog accesses for the background cache warmer
+    from app.services.cache_warmer import cache_warmer
+    cache_warmer.init_app(app)
+    
+    # Cached template fragments ({% cache_fragment %})
+    from app.utils.fragment_cache import FragmentCacheExtension
+    app.jinja_env.add_extension(FragmentCacheExtension)
 
     # Register blueprints
     from .routes.main import main as main_blueprint
@@ -162,6 +248,9 @@ def create_app(config_name: Optional[str] = None) -> Flask:
     # Register error handlers
     _register_error_handlers(app)
     
+    # Register maintenance CLI commands
+    _register_cli_commands(app)
+    
     # Security headers
     @app.after_request
     def add_security_headers(response):
@@ -228,3 +317,113 @@ def _register_error_handlers(app: Flask) -> None:
         if request.is_json:
             return jsonify({'error': 'Internal server error'}), 500
         return render_template('Error_Pages/404_not_found.html'), 500
+
+
+def _register_cli_commands(app: Flask) -> None:
+    """Register maintenance commands (flask <command>)"""
+    import click
+    
+    @app.cli.command('rebuild-catalog-counters')
+    def rebuild_catalog_counters():
+        """Recompute maintained catalog counters from the catalog tables"""
+        from app.services.counter_service import counter_service
+        
+        summary = counter_service.rebuild()
+        for key, count in sorted(summary.items()):
+            click.echo(f"{key}: {count}")
+    
+    @app.cli.command('rebuild-recent-adoptions')
+    def rebuild_recent_adoptions():
+        """Refill the recently adopted list from the historical records table"""
+        from app.services.recent_adoptions import recent_adoptions
+        
+        count = recent_adoptions.rebuild()
+        click.echo(f"recent_adoptions: {count}")
+    
+    @app.cli.command('rebuild-item-popularity')
+    def rebuild_item_popularity():
+        """Recompute popularity counts from completed transactions"""
+        from app.services.popularity_service import popularity_service
+        
+        count = popularity_service.rebuild()
+        click.echo(f"item_popularity: {count}")
+    
+    @app.cli.command('backfill-transaction-rollup')
+    @click.option('--start', 'start_day', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='First day to rebuild (default: earliest)')
+    @click.option('--end', 'end_day', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Last day to rebuild (default: latest)')
+    def backfill_transaction_rollup(start_day, end_day):
+        """Recompute daily transaction rollups from the transactions table"""
+        from app.services.transaction_rollup import transaction_rollup
+        
+        count = transaction_rollup.rebuild(
+            start_day=start_day.date() if start_day else None,
+            end_day=end_day.date() if end_day else None
+        )
+        click.echo(f"transaction_daily_rollup: {count}")
+    
+    @app.cli.command('explain-bond-filters')
+    @click.option('--status', default='available', show_default=True)
+    def explain_bond_filters(status):
+        """EXPLAIN every bond filter combination; fails if any plan seq-scans bonds"""
+        from app.db.filter_compiler import explain_bond_filter_combinations
+        
+        results = explain_bond_filter_combinations(status=status)
+        failures = [result for result in results if result['seq_scan']]
+        for result in results:
+            filters = ', '.join(sorted(result['filters'])) or '(status only)'
+            verdict = 'SEQ SCAN' if result['seq_scan'] else ', '.join(result['indexes'])
+            click.echo(f"{filters}: {verdict} (cost {result['total_cost']})")
+        
+        click.echo(f"{len(results) - len(failures)}/{len(results)} combinations use an index")
+        if failures:
+            raise click.ClickException(f"{len(failures)} filter combinations fall back to a seq scan")
+    
+    @app.cli.command('warm-cache')
+    def warm_cache():
+        """Re-request the most visited pages from the rolling access window"""
+        from app.services.cache_warmer import cache_warmer
+        
+        summary = cache_warmer.warm(app)
+        for key, value in summary.items():
+            click.echo(f"{key}: {value}")
+    
+    @app.cli.command('cache-codec-benchmark')
+    @click.option('--iterations', default=200, show_default=True, help='Encode/decode rounds per sample')
+    def cache_codec_benchmark(iterations):
+        """Compare pickle with the compact codec on real catalog cache entries"""
+        import time
+        from app import cache
+        from app.services.cache_codec import benchmark, CacheCodec
+        from app.services.cache_service import AdvancedCacheService
+        from app.db.optimized_queries import optimized_queries
+        
+        def envelope(result):
+            # Same shape smart_cache stores
+            return {'result': result, 'cached_at': time.time(), 'expires_at': time.time() + 900,
+                    'execution_time': 0.1, 'invalidate_on': []}
+        
+        samples = {
+            # Assembled pages: the same {'items': [...], ...} shape the listings return
+            'bonds_page': AdvancedCacheService.get_available_bonds_cached(1, 9),
+            'historical_records_page': AdvancedCacheService.get_available_historical_records_cached(1, 8),
+            'bond_facets': optimized_queries.get_bond_facets(status='available'),
+        }
+        samples['smart_cache_bonds_page'] = envelope(samples['bonds_page'])
+        samples['bonds_page_x10'] = {**samples['bonds_page'], 'items': samples['bonds_page']['items'] * 10}
+        
+        redis_client = getattr(cache.cache, '_write_client', None)
+        codec = CacheCodec(
+            compress_min_bytes=app.config.get('CACHE_CODEC_COMPRESS_MIN_BYTES', 1024),
+            compression=app.config.get('CACHE_CODEC_COMPRESSION', 'auto')
+        )
+        for row in benchmark(samples, codec=codec, iterations=iterations, redis_client=redis_client):
+            click.echo(
+                f"{row['sample']:<26} "
+                f"bytes {row['pickle_bytes']:>7} -> {row['codec_bytes']:>7} ({row['size_ratio']:.2f}x)  "
+                f"encode {row['pickle_encode_us']:>7}us -> {row['codec_encode_us']:>7}us  "
+                f"decode {row['pickle_decode_us']:>7}us -> {row['codec_decode_us']:>7}us"
+                + (f"  redis {row['pickle_redis_bytes']} -> {row['codec_redis_bytes']}"
+                   if 'codec_redis_bytes' in row else '')
+            )
@@ -0,0 +1,163 @@
+# app/db/filter_compiler.py
+
+"""
+Catalog filter compiler
+Turns listing filters into sargable predicates (plain comparisons on indexed
+columns) plus the ORDER BY that matches the index they seek on, and checks
+the result with EXPLAIN
+"""
+
+import itertools
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.db.db import db
+from app.db.models import Bond
+
+logger = logging.getLogger(__name__)
+
+# Years a filter can address; outside this date() can't represent the bound
+MIN_FILTER_YEAR = 1
+MAX_FILTER_YEAR = 9998
+
+
+@dataclass
+class CompiledFilter:
+    """Predicates, ordering and the index they were compiled for"""
+    predicates: List[Any] = field(default_factory=list)
+    order_by: List[Any] = field(default_factory=list)
+    index: str = ''
+
+    def apply(self, query, ordered: bool = True):
+        """Add the predicates (and, unless ordered=False, the ORDER BY) to a query"""
+        for predicate in self.predicates:
+            query = query.filter(predicate)
+        if ordered and self.order_by:
+            query = query.order_by(*self.order_by)
+        return query
+
+
+def _year_start(year: int) -> date:
+    return date(min(max(int(year), MIN_FILTER_YEAR), MAX_FILTER_YEAR + 1), 1, 1)
+
+
+def compile_bond_filters(
+    status: str = 'available',
+    bond_type: Optional[str] = None,
+    mayor: Optional[str] = None,
+    comptroller: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+) -> CompiledFilter:
+    """
+    Compile the bond catalog filters
+
+    Years become a half-open issue_date range, [Jan 1 year_from, Jan 1
+    year_to + 1), instead of extract(year, issue_date) comparisons that only
+    the expression index could serve. Prices are the half-open
+    [min_price, max_price) the facet buckets use, so a bucket's count and
+    its listing agree. Status (and type) are equalities leading the
+    (status[, type], issue_date) btree indexes, and the ORDER BY walks that
+    index backwards, so no separate sort of the filtered rows is needed.
+    """
+    compiled = CompiledFilter()
+    compiled.predicates.append(Bond.status == status)
+
+    if bond_type:
+        compiled.predicates.append(Bond.type == bond_type)
+        compiled.index = 'idx_bonds_status_type_issue_date'
+    else:
+        compiled.index = 'idx_bonds_status_issue_date'
+
+    # Unindexed, but cheap residual filters on whichever index scan runs
+    if mayor:
+        compiled.predicates.append(Bond.mayor == mayor)
+    if comptroller:
+        compiled.predicates.append(Bond.comptroller == comptroller)
+
+    if year_from:
+        compiled.predicates.append(Bond.issue_date >= _year_start(year_from))
+    if year_to:
+        compiled.predicates.append(Bond.issue_date < _year_start(int(year_to) + 1))
+
+    if min_price is not None:
+        compiled.predicates.append(Bond.retail_price >= min_price)
+    if max_price is not None:
+        compiled.predicates.append(Bond.retail_price < max_price)
+
+    # Equality on status/type makes issue_date the index's sort column;
+    # bond_id only breaks ties and matches the keyset cursor order
+    compiled.order_by = [Bond.issue_date.desc(), Bond.bond_id.desc()]
+    return compiled
+
+
+# Values for each filter in the EXPLAIN matrix
+BOND_FILTER_SAMPLES = {
+    'bond_type': 'Water',
+    'mayor': 'Fiorello La Guardia',
+    'comptroller': 'Joseph D. McGoldrick',
+    'year_from': 1900,
+    'year_to': 1950,
+    'min_price': 50,
+    'max_price': 250,
+}
+
+
+def _plan_nodes(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def explain_query(query) -> Dict[str, Any]:
+    """EXPLAIN (FORMAT JSON) of a query's statement; returns the top plan node"""
+    connection = db.session.connection()
+    # Compiled for the live driver so the paramstyle matches exec_driver_sql
+    compiled = query.statement.compile(dialect=connection.dialect)
+    result = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    plan = json.loads(result) if isinstance(result, str) else result
+    return plan[0]['Plan']
+
+
+def explain_bond_filter_combinations(status: str = 'available') -> List[Dict[str, Any]]:
+    """
+    EXPLAIN every combination of supported bond filters
+
+    Sequential scans are disabled for the check (SET LOCAL enable_seqscan),
+    so the planner only falls back to one when no index can serve the
+    predicates; on a small local table it would otherwise prefer a seq scan
+    regardless. Each result records the filters, the plan's index names
+    and whether bonds was read with a Seq Scan.
+    """
+    names = list(BOND_FILTER_SAMPLES)
+    results = []
+    try:
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        for size in range(len(names) + 1):
+            for combination in itertools.combinations(names, size):
+                filters = {name: BOND_FILTER_SAMPLES[name] for name in combination}
+                compiled = compile_bond_filters(status=status, **filters)
+                plan = explain_query(compiled.apply(db.session.query(Bond)))
+                nodes = list(_plan_nodes(plan))
+                results.append({
+                    'filters': filters,
+                    'expected_index': compiled.index,
+                    'indexes': sorted({n['Index Name'] for n in nodes if n.get('Index Name')}),
+                    'seq_scan': any(
+                        n.get('Node Type') == 'Seq Scan' and n.get('Relation Name') == Bond.__tablename__
+                        for n in nodes
+                    ),
+                    'total_cost': plan.get('Total Cost')
+                })
+    finally:
+        db.session.rollback()
+    return results
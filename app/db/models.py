@@ -1,7 +1,8 @@
 from app.db.db import db
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, JSONB
 from sqlalchemy import func, Index, text
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import validates, deferred
+from sqlalchemy.orm.attributes import set_committed_value
 import uuid
 from decimal import Decimal
 import re
@@ -19,10 +20,22 @@ class HistoricalRecord(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Full-text search document, maintained by PostgreSQL; deferred so listings skip it
+    search_vector = deferred(db.Column(
+        TSVECTOR,
+        db.Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    ))
+    
     # Add database constraints and indexes
     __table_args__ = (
         Index('idx_historical_records_adopted_name', 'adopted', 'name'),
         Index('idx_historical_records_fee', 'fee'),
+        Index('idx_historical_records_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('idx_historical_records_updated_at', 'updated_at'),
         db.CheckConstraint('fee > 0', name='check_positive_fee'),
         db.CheckConstraint('char_length(name) > 0', name='check_name_not_empty'),
     )
@@ -94,10 +107,24 @@ class Bond(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Full-text search document, maintained by PostgreSQL; deferred so listings skip it
+    search_vector = deferred(db.Column(
+        TSVECTOR,
+        db.Computed(
+            "setweight(to_tsvector('english', coalesce(type, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(purpose_of_bond, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(vignette, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(mayor, '')), 'C')",
+            persisted=True
+        )
+    ))
+    
     # Add database constraints and indexes
     __table_args__ = (
         Index('idx_bonds_status_type', 'status', 'type'),
         Index('idx_bonds_issue_date', 'issue_date'),
+        Index('idx_bonds_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('idx_bonds_updated_at', 'updated_at'),
         db.CheckConstraint("status IN ('available', 'purchased', 'reserved')", name='check_valid_status'),
         db.CheckConstraint('retail_price > 0', name='check_positive_retail_price'),
     )
@@ -105,12 +132,20 @@ class Bond(db.Model):
     def __repr__(self):
         return f"<Bond {self.bond_id}>"
 
+# Transaction.item_type values
+ITEM_TYPE_HISTORICAL_RECORD = 'historical_record'
+ITEM_TYPE_BOND = 'bond'
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'
 
     transaction_id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     paypal_transaction_id = db.Column(db.String(255), nullable=False, unique=True, index=True)
     item_id = db.Column(db.String(255), nullable=False, index=True) # Can be either bond_id or historical_record_id
+    # Typed reference derived from item_id (see validate_item_id); exactly one FK matches item_type
+    item_type = db.Column(db.String(20), nullable=False)
+    historical_record_id = db.Column(UUID(as_uuid=True), db.ForeignKey('historical_records.id', ondelete='SET NULL'), nullable=True, index=True)
+    bond_id = db.Column(db.String(255), db.ForeignKey('bonds.bond_id', ondelete='SET NULL'), nullable=True, index=True)
     donor_id = db.Column(UUID(as_uuid=True), db.ForeignKey('donors.donor_id', ondelete='SET NULL'), nullable=False, index=True)
     timestamp = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     fee = db.Column(db.Numeric(10, 2), nullable=False)
@@ -127,13 +162,70 @@ class Transaction(db.Model):
         Index('idx_transactions_donor_timestamp', 'donor_id', 'timestamp'),
         db.CheckConstraint("payment_status IN ('PENDING', 'COMPLETED', 'FAILED', 'CANCELLED')", name='check_valid_payment_status'),
         db.CheckConstraint('fee > 0', name='check_positive_transaction_fee'),
+        db.CheckConstraint("item_type IN ('historical_record', 'bond')", name='check_valid_item_type'),
+        db.CheckConstraint(
+            "(historical_record_id IS NULL OR item_type = 'historical_record') AND "
+            "(bond_id IS NULL OR item_type = 'bond')",
+            name='check_item_reference_matches_type'
+        ),
     )
 
+    historical_record = db.relationship('HistoricalRecord', foreign_keys=[historical_record_id])
+    bond = db.relationship('Bond', foreign_keys=[bond_id])
+
     def get_item(self):
-        """Returns related item based on item_id format."""
-        if self.is_uuid(self.item_id):
-            return HistoricalRecord.query.get(self.item_id)
-        return Bond.query.get(self.item_id)
+        """Returns the related item, dispatching on item_type."""
+        if self.item_type == ITEM_TYPE_HISTORICAL_RECORD:
+            return self.historical_record
+        return self.bond
+
+    @classmethod
+    def preload_items(cls, transactions):
+        """
+        Resolve get_item() for many transactions with one IN query per item type
+
+        Transactions are partitioned by item_type and each type is loaded
+        through its typed foreign key; the rows are then set as the
+        committed relationship values, so a list of N transactions costs two
+        queries instead of N. Returns the {item_id: item} map (missing items
+        are absent).
+        """
+        transactions = list(transactions)
+        record_ids = {t.historical_record_id for t in transactions if t.historical_record_id}
+        bond_ids = {t.bond_id for t in transactions if t.bond_id}
+
+        records = {}
+        if record_ids:
+            records = {r.id: r for r in HistoricalRecord.query.filter(HistoricalRecord.id.in_(record_ids))}
+        bonds = {}
+        if bond_ids:
+            bonds = {b.bond_id: b for b in Bond.query.filter(Bond.bond_id.in_(bond_ids))}
+
+        items = {}
+        for transaction in transactions:
+            if transaction.item_type == ITEM_TYPE_HISTORICAL_RECORD:
+                item = records.get(transaction.historical_record_id)
+                set_committed_value(transaction, 'historical_record', item)
+            else:
+                item = bonds.get(transaction.bond_id)
+                set_committed_value(transaction, 'bond', item)
+            if item is not None:
+                items[transaction.item_id] = item
+        return items
+
+    @validates('item_id')
+    def validate_item_id(self, key, item_id):
+        """Derive item_type and the typed foreign key once, when item_id is set."""
+        item_id = str(item_id)
+        if self.is_uuid(item_id):
+            self.item_type = ITEM_TYPE_HISTORICAL_RECORD
+            self.historical_record_id = uuid.UUID(item_id)
+            self.bond_id = None
+        else:
+            self.item_type = ITEM_TYPE_BOND
+            self.historical_record_id = None
+            self.bond_id = item_id
+        return item_id
 
     @validates('fee')
     def validate_fee(self, key, fee):
@@ -160,3 +252,66 @@ class Transaction(db.Model):
 
     def __repr__(self):
         return f"<Transaction {self.transaction_id}>"
+
+class CatalogCounter(db.Model):
+    """Maintained row counts per catalog status, so listings never run COUNT(*)"""
+    __tablename__ = 'catalog_counters'
+
+    scope = db.Column(db.String(50), primary_key=True)  # 'historical_records' or 'bonds'
+    status = db.Column(db.String(20), primary_key=True)  # 'available', 'adopted', 'purchased', ...
+    item_type = db.Column(db.String(100), primary_key=True, default='')  # Bond.type, '' when untyped
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+    # Bumped by every adjustment and never reset; a scope's sum only grows, in commit order
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<CatalogCounter {self.scope}:{self.status}:{self.item_type} = {self.count}>"
+
+class RecentAdoption(db.Model):
+    """Newest adoptions with a render-ready snapshot, appended on capture and capped"""
+    __tablename__ = 'recent_adoptions'
+
+    item_id = db.Column(UUID(as_uuid=True), db.ForeignKey('historical_records.id', ondelete='CASCADE'), primary_key=True)
+    adopted_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+    snapshot = db.Column(JSONB, nullable=False)  # name, fee, imgurl, donors, ... as the template reads them
+
+    __table_args__ = (
+        Index('idx_recent_adoptions_adopted_at', 'adopted_at'),
+    )
+
+    def __repr__(self):
+        return f"<RecentAdoption {self.item_id}>"
+
+class ItemPopularity(db.Model):
+    """Maintained purchase count and revenue per catalog item, for the popular-items ranking"""
+    __tablename__ = 'item_popularity'
+
+    item_type = db.Column(db.String(20), primary_key=True)  # Transaction.item_type
+    item_id = db.Column(db.String(255), primary_key=True)  # bond_id or record UUID as text
+    purchase_count = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_item_popularity_rank', purchase_count.desc(), 'item_type', 'item_id'),
+    )
+
+    def __repr__(self):
+        return f"<ItemPopularity {self.item_type}:{self.item_id} = {self.purchase_count}>"
+
+class TransactionDailyRollup(db.Model):
+    """Per-day transaction totals by item type and payment status, for analytics"""
+    __tablename__ = 'transaction_daily_rollup'
+
+    day = db.Column(db.Date, primary_key=True)  # timestamp::date in the database time zone
+    item_type = db.Column(db.String(20), primary_key=True)
+    payment_status = db.Column(db.String(20), primary_key=True)
+    transaction_count = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    min_fee = db.Column(db.Numeric(10, 2), nullable=True)
+    max_fee = db.Column(db.Numeric(10, 2), nullable=True)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<TransactionDailyRollup {self.day} {self.item_type} {self.payment_status} = {self.transaction_count}>"
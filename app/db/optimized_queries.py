@@ -6,17 +6,35 @@ Contains before/after examples and best practices
 """
 
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-from sqlalchemy import func, text, and_, or_
+from datetime import timedelta
+from typing import List, Dict, Any, Optional, Tuple, Union
+from sqlalchemy import func, text, and_, or_, case, literal_column
 from sqlalchemy.orm import joinedload, selectinload, contains_eager
-from flask_sqlalchemy import Pagination
+from flask_sqlalchemy.pagination import Pagination
 
 from app.db.db import db
-from app.db.models import HistoricalRecord, Donor, Transaction, DonorItem, Bond
+from app.db.models import (
+    HistoricalRecord, Donor, Transaction, DonorItem, Bond, ITEM_TYPE_HISTORICAL_RECORD, ITEM_TYPE_BOND
+)
+from app.db.filter_compiler import compile_bond_filters
 from app.services.cache_service import cache_service
+from app.services.popularity_service import popularity_service
+from app.services.recent_adoptions import recent_adoptions
+from app.services.counter_service import (
+    counter_service, historical_record_status, SCOPE_HISTORICAL_RECORDS, SCOPE_BONDS
+)
+from app.utils.pagination import keyset_paginate, counted_paginate, KeysetPagination, CachedPagination
 
 logger = logging.getLogger(__name__)
 
+# Unique sort keys for keyset pagination; each leads with an indexed column
+BOND_SORT_KEY = (Bond.issue_date, Bond.bond_id)
+HISTORICAL_RECORD_SORT_KEY = (HistoricalRecord.created_at, HistoricalRecord.id)
+TRANSACTION_SORT_KEY = (Transaction.timestamp, Transaction.transaction_id)
+
+# Half-open [low, high) retail price ranges used for bond facets
+BOND_PRICE_BUCKETS = [(0, 50), (50, 100), (100, 250), (250, 500), (500, None)]
+
 
 class OptimizedQueries:
     """
@@ -45,7 +63,14 @@ class OptimizedQueries:
         if use_cache:
             cached_result = cache_service.get_available_historical_records(page, per_page)
             if cached_result:
-                return cached_result['items'], type('Pagination', (), cached_result)()
+                pagination = CachedPagination(
+                    page=cached_result['page'],
+                    per_page=cached_result['per_page'],
+                    error_out=False,
+                    items=cached_result['items'],
+                    total=cached_result['total']
+                )
+                return pagination.items, pagination
         
         # Optimized query with selective eager loading
         query = db.session.query(HistoricalRecord)\
@@ -63,11 +88,11 @@ class OptimizedQueries:
             )\
             .order_by(HistoricalRecord.created_at.desc())
         
-        pagination = query.paginate(
+        pagination = counted_paginate(
+            query,
             page=page,
             per_page=per_page,
-            error_out=False,
-            max_per_page=50
+            total=counter_service.get_count(SCOPE_HISTORICAL_RECORDS, 'available')
         )
         
         return pagination.items, pagination
@@ -81,8 +106,12 @@ class OptimizedQueries:
         year_from: Optional[int] = None,
         year_to: Optional[int] = None,
         min_price: Optional[float] = None,
-        max_price: Optional[float] = None
-    ) -> Tuple[List[Bond], Pagination]:
+        max_price: Optional[float] = None,
+        mayor: Optional[str] = None,
+        comptroller: Optional[str] = None,
+        cursor: Optional[str] = None,
+        keyset: bool = False
+    ) -> Tuple[List[Bond], Union[Pagination, KeysetPagination]]:
         """
         OPTIMIZED: Enhanced bonds query with filtering and proper indexing
         
@@ -95,36 +124,247 @@ class OptimizedQueries:
         - Multi-criteria filtering with optimized WHERE clauses
         - Uses compound indexes for performance
         - Proper parameter binding to prevent SQL injection
+        - Keyset pagination (cursor or keyset=True) seeks via
+          idx_bonds_status_issue_date instead of scanning OFFSET rows
+        - Year and price filters compile to half-open ranges on indexed
+          columns (see filter_compiler) rather than extract(year, ...)
         """
-        # Build optimized query with dynamic filters
-        query = db.session.query(Bond)\
-            .filter(Bond.status == status)
+        # Sargable predicates plus the ORDER BY of the index they seek on
+        compiled = compile_bond_filters(
+            status=status,
+            bond_type=bond_type,
+            mayor=mayor,
+            comptroller=comptroller,
+            year_from=year_from,
+            year_to=year_to,
+            min_price=min_price,
+            max_price=max_price
+        )
+        query = compiled.apply(db.session.query(Bond), ordered=False)
+        
+        # Maintained counters cover status/type; other filters still need a real count
+        total = None
+        if all(v is None for v in (mayor, comptroller, year_from, year_to, min_price, max_price)):
+            total = counter_service.get_count(SCOPE_BONDS, status, bond_type)
+        
+        if cursor or keyset:
+            pagination = keyset_paginate(
+                query, BOND_SORT_KEY,
+                cursor=cursor,
+                per_page=per_page,
+                nullable_leading=True,
+                total=total
+            )
+            return pagination.items, pagination
         
-        # Add filters that can use indexes efficiently
-        if bond_type:
-            query = query.filter(Bond.type == bond_type)
+        # Same order as the keyset path, read backwards off compiled.index
+        query = query.order_by(*compiled.order_by)
         
-        if year_from or year_to:
-            if year_from:
-                query = query.filter(func.extract('year', Bond.issue_date) >= year_from)
-            if year_to:
-                query = query.filter(func.extract('year', Bond.issue_date) <= year_to)
+        if total is not None:
+            pagination = counted_paginate(query, page=page, per_page=per_page, total=total)
+        else:
+            pagination = query.paginate(
+                page=page,
+                per_page=per_page,
+                error_out=False,
+                max_per_page=50
+            )
         
-        if min_price is not None:
-            query = query.filter(Bond.retail_price >= min_price)
-        if max_price is not None:
-            query = query.filter(Bond.retail_price <= max_price)
+        return pagination.items, pagination
+    
+    @staticmethod
+    def _apply_bond_filters(
+        query,
+        status: str = 'available',
+        bond_type: Optional[str] = None,
+        mayor: Optional[str] = None,
+        comptroller: Optional[str] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ):
+        """Apply the catalog bond filters shared by listings and facet counts"""
+        return compile_bond_filters(
+            status=status,
+            bond_type=bond_type,
+            mayor=mayor,
+            comptroller=comptroller,
+            year_from=year_from,
+            year_to=year_to,
+            min_price=min_price,
+            max_price=max_price
+        ).apply(query, ordered=False)
+    
+    @staticmethod
+    def get_bond_facets(status: str = 'available', **filters) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        OPTIMIZED: Facet counts for bond browsing in a single grouped query
         
-        # Order by compound index for optimal performance
-        query = query.order_by(Bond.status, Bond.issue_date.desc(), Bond.bond_id)
+        BEFORE:
+        - One COUNT query per facet value to show "Water Bonds (42)"
         
-        pagination = query.paginate(
-            page=page,
+        AFTER:
+        - One GROUP BY GROUPING SETS query over type, mayor, comptroller,
+          issue decade and price bucket, under the currently applied filters
+        - GROUPING() tells which facet each row belongs to, so NULL values
+          are never confused with rolled-up rows
+        """
+        # Constants are inlined (not bound) so the SELECT and GROUP BY
+        # expressions are textually identical, as PostgreSQL requires
+        ten = literal_column('10')
+        decade = func.floor(func.extract('year', Bond.issue_date) / ten) * ten
+        price_bucket = case(
+            *[
+                (
+                    and_(Bond.retail_price >= literal_column(str(low)),
+                         Bond.retail_price < literal_column(str(high)))
+                    if high is not None else Bond.retail_price >= literal_column(str(low)),
+                    literal_column(str(index))
+                )
+                for index, (low, high) in enumerate(BOND_PRICE_BUCKETS)
+            ],
+            else_=None
+        )
+        
+        dimensions = [
+            ('type', Bond.type),
+            ('mayor', Bond.mayor),
+            ('comptroller', Bond.comptroller),
+            ('decade', decade),
+            ('price', price_bucket)
+        ]
+        
+        query = db.session.query(
+            *[expr.label(name) for name, expr in dimensions],
+            *[func.grouping(expr).label(f'grouping_{name}') for name, expr in dimensions],
+            func.count().label('count')
+        )
+        query = OptimizedQueries._apply_bond_filters(query, status=status, **filters)
+        query = query.group_by(func.grouping_sets(*[expr for _, expr in dimensions]))
+        
+        facets = {name: [] for name, _ in dimensions}
+        for row in query.all():
+            for name, _ in dimensions:
+                value = getattr(row, name)
+                if getattr(row, f'grouping_{name}') == 0 and value is not None:
+                    facets[name].append({'value': value, 'count': row.count})
+        
+        for name in ('type', 'mayor', 'comptroller'):
+            facets[name].sort(key=lambda facet: (-facet['count'], facet['value']))
+        
+        facets['decade'] = [
+            {
+                'value': int(facet['value']),
+                'label': f"{int(facet['value'])}s",
+                'year_from': int(facet['value']),
+                'year_to': int(facet['value']) + 9,
+                'count': facet['count']
+            }
+            for facet in sorted(facets['decade'], key=lambda facet: facet['value'])
+        ]
+        
+        price_facets = []
+        for facet in sorted(facets['price'], key=lambda facet: facet['value']):
+            low, high = BOND_PRICE_BUCKETS[facet['value']]
+            price_facets.append({
+                'value': facet['value'],
+                'label': f"${low} - ${high}" if high is not None else f"${low}+",
+                'min_price': low,
+                'max_price': high,
+                'count': facet['count']
+            })
+        facets['price'] = price_facets
+        
+        return facets
+    
+    @staticmethod
+    def search_historical_records(
+        search: str = '',
+        min_fee: Optional[float] = None,
+        max_fee: Optional[float] = None,
+        adopted: bool = False,
+        cursor: Optional[str] = None,
+        per_page: int = 8
+    ) -> Tuple[List[HistoricalRecord], KeysetPagination]:
+        """
+        OPTIMIZED: Ranked full-text search over historical records
+        
+        - Matches stemmed words via the GIN index on search_vector, or partial
+          names via idx_historical_records_name_trgm; PostgreSQL combines both
+          with a BitmapOr instead of scanning the table
+        - Ranks by ts_rank_cd plus trigram similarity of the name
+        - Keyset pagination on (rank, id), so deep result pages stay cheap
+        - With no search text, returns the fee-filtered listing in catalog order
+        """
+        query = db.session.query(HistoricalRecord)\
+            .filter(HistoricalRecord.adopted == adopted)
+        
+        if min_fee is not None:
+            query = query.filter(HistoricalRecord.fee >= min_fee)
+        if max_fee is not None:
+            query = query.filter(HistoricalRecord.fee <= max_fee)
+        
+        if not search:
+            pagination = keyset_paginate(
+                query, HISTORICAL_RECORD_SORT_KEY,
+                cursor=cursor,
+                per_page=per_page
+            )
+            return pagination.items, pagination
+        
+        ts_query = func.websearch_to_tsquery('english', search)
+        escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        rank = func.ts_rank_cd(HistoricalRecord.search_vector, ts_query) + \
+            func.similarity(HistoricalRecord.name, search)
+        
+        query = query\
+            .add_columns(rank.label('rank'))\
+            .filter(or_(
+                HistoricalRecord.search_vector.op('@@')(ts_query),
+                HistoricalRecord.name.ilike(f'%{escaped}%', escape='\\')
+            ))
+        
+        pagination = keyset_paginate(
+            query, (rank, HistoricalRecord.id),
+            cursor=cursor,
             per_page=per_page,
-            error_out=False,
-            max_per_page=50
+            key_getter=lambda row: (row.rank, row.HistoricalRecord.id)
         )
+        pagination.items = [row.HistoricalRecord for row in pagination.items]
+        return pagination.items, pagination
+    
+    @staticmethod
+    def search_bonds(
+        search: str,
+        status: str = 'available',
+        cursor: Optional[str] = None,
+        per_page: int = 9,
+        **filters
+    ) -> Tuple[List[Bond], KeysetPagination]:
+        """
+        OPTIMIZED: Ranked full-text search over bonds
+        
+        - Matches type, purpose_of_bond, vignette and mayor through the GIN
+          index on search_vector
+        - Takes the same catalog filters as the listing (compiled predicates,
+          without their ORDER BY so rank decides the order)
+        - Keyset pagination on (rank, bond_id)
+        """
+        ts_query = func.websearch_to_tsquery('english', search)
+        rank = func.ts_rank_cd(Bond.search_vector, ts_query)
         
+        query = db.session.query(Bond, rank.label('rank'))\
+            .filter(Bond.search_vector.op('@@')(ts_query))
+        query = OptimizedQueries._apply_bond_filters(query, status=status, **filters)
+        
+        pagination = keyset_paginate(
+            query, (rank, Bond.bond_id),
+            cursor=cursor,
+            per_page=per_page,
+            key_getter=lambda row: (row.rank, row.Bond.bond_id)
+        )
+        pagination.items = [row.Bond for row in pagination.items]
         return pagination.items, pagination
     
     @staticmethod
@@ -134,8 +374,10 @@ class OptimizedQueries:
         status: Optional[str] = None,
         days_back: int = 30,
         page: int = 1,
-        per_page: int = 20
-    ) -> Tuple[List[Transaction], Pagination]:
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        keyset: bool = False
+    ) -> Tuple[List[Transaction], Union[Pagination, KeysetPagination]]:
         """
         OPTIMIZED: Transaction history with efficient joins and filtering
         
@@ -147,13 +389,15 @@ class OptimizedQueries:
         AFTER:
         - Single query with optimized joins
         - Date range filtering using indexes
-        - Efficient pagination with cursor-based approach for large datasets
+        - Efficient pagination with cursor-based approach for large datasets:
+          (timestamp, transaction_id) seeks via idx_transactions_donor_timestamp_status
+        - Items of the page are resolved in two queries (Transaction.preload_items)
         """
         # Base query with optimized joins
         query = db.session.query(Transaction)\
             .join(Donor, Transaction.donor_id == Donor.donor_id)\
             .filter(
-                Transaction.timestamp >= func.current_date() - func.interval(f'{days_back} days')
+                Transaction.timestamp >= func.current_date() - timedelta(days=days_back)
             )
         
         # Apply filters using indexed columns
@@ -166,6 +410,16 @@ class OptimizedQueries:
         if status:
             query = query.filter(Transaction.payment_status == status)
         
+        if cursor or keyset:
+            pagination = keyset_paginate(
+                query, TRANSACTION_SORT_KEY,
+                cursor=cursor,
+                per_page=per_page
+            )
+            # get_item() on the page: one IN query per item type, not one per row
+            Transaction.preload_items(pagination.items)
+            return pagination.items, pagination
+        
         # Use compound index: (timestamp, payment_status)
         query = query.order_by(
             Transaction.timestamp.desc(),
@@ -180,6 +434,7 @@ class OptimizedQueries:
             max_per_page=100
         )
         
+        Transaction.preload_items(pagination.items)
         return pagination.items, pagination
     
     @staticmethod
@@ -192,21 +447,39 @@ class OptimizedQueries:
         - N+1 problem when loading related items
         
         AFTER:
-        - Single optimized query with all necessary joins
-        - Aggregated statistics calculated in database
+        - Single query; transactions and donor items are each aggregated in
+          their own subquery (per donor index scan) before joining, so the
+          two one-to-many sides never multiply each other's rows
         """
-        # Single query with all necessary data and aggregations
-        result = db.session.query(
-            Donor,
+        transaction_stats = db.session.query(
+            Transaction.donor_id.label('donor_id'),
             func.count(Transaction.transaction_id).label('transaction_count'),
             func.sum(Transaction.fee).label('total_spent'),
-            func.max(Transaction.timestamp).label('last_purchase_date'),
+            func.max(Transaction.timestamp).label('last_purchase_date')
+        )\
+        .filter(Transaction.donor_id == donor_id)\
+        .group_by(Transaction.donor_id)\
+        .subquery()
+        
+        item_stats = db.session.query(
+            DonorItem.donor_id.label('donor_id'),
             func.count(DonorItem.id).label('items_adopted')
         )\
-        .outerjoin(Transaction, Donor.donor_id == Transaction.donor_id)\
-        .outerjoin(DonorItem, Donor.donor_id == DonorItem.donor_id)\
+        .filter(DonorItem.donor_id == donor_id)\
+        .group_by(DonorItem.donor_id)\
+        .subquery()
+        
+        # At most one row from each side, so the joins can't fan out
+        result = db.session.query(
+            Donor,
+            transaction_stats.c.transaction_count,
+            transaction_stats.c.total_spent,
+            transaction_stats.c.last_purchase_date,
+            item_stats.c.items_adopted
+        )\
+        .outerjoin(transaction_stats, transaction_stats.c.donor_id == Donor.donor_id)\
+        .outerjoin(item_stats, item_stats.c.donor_id == Donor.donor_id)\
         .filter(Donor.donor_id == donor_id)\
-        .group_by(Donor.donor_id)\
         .first()
         
         if not result:
@@ -236,106 +509,141 @@ class OptimizedQueries:
         AFTER:
         - Single bulk UPDATE with WHERE IN clause
         - Single database round trip
+        - Catalog counters adjusted in the same transaction
         """
         if not item_ids:
             return 0
         
         # Determine table based on item ID format
-        if any(Transaction.is_uuid(item_id) for item_id in item_ids):
-            # Historical records - bulk update adopted status
+        historical_records = any(Transaction.is_uuid(item_id) for item_id in item_ids)
+        if historical_records:
+            # Historical records - bulk update adopted status; skip rows already
+            # in the target state so the counter deltas stay exact
+            adopted = new_status == 'adopted'
             result = db.session.execute(
                 text("""
                     UPDATE historical_records 
                     SET adopted = :status, updated_at = CURRENT_TIMESTAMP 
-                    WHERE id = ANY(:item_ids)
+                    WHERE id = ANY(CAST(:item_ids AS uuid[])) AND adopted <> :status
+                    RETURNING id
                 """),
                 {
-                    'status': new_status == 'adopted',
+                    'status': adopted,
                     'item_ids': [str(id) for id in item_ids if Transaction.is_uuid(id)]
                 }
             )
+            changed_ids = [row[0] for row in result.fetchall()]
+            changed = len(changed_ids)
+            counter_service.record_transition(
+                SCOPE_HISTORICAL_RECORDS,
+                historical_record_status(not adopted),
+                historical_record_status(adopted),
+                amount=changed
+            )
+            # Keep the recently-adopted list in step, as captures do
+            if adopted:
+                recent_adoptions.record(changed_ids)
+            else:
+                recent_adoptions.remove(changed_ids)
         else:
-            # Bonds - bulk update status
+            # Bonds - bulk update status, returning each row's previous status
             result = db.session.execute(
                 text("""
                     UPDATE bonds 
                     SET status = :status, updated_at = CURRENT_TIMESTAMP 
-                    WHERE bond_id = ANY(:item_ids)
+                    FROM (
+                        SELECT bond_id, status AS old_status FROM bonds
+                        WHERE bond_id = ANY(:item_ids) AND status <> :status
+                        FOR UPDATE
+                    ) AS previous
+                    WHERE bonds.bond_id = previous.bond_id
+                    RETURNING previous.old_status, bonds.type, bonds.bond_id
                 """),
                 {
                     'status': new_status,
                     'item_ids': [str(id) for id in item_ids if not Transaction.is_uuid(id)]
                 }
             )
+            transitions = {}
+            changed_ids = []
+            for old_status, bond_type, bond_id in result.fetchall():
+                transitions[(old_status, bond_type)] = transitions.get((old_status, bond_type), 0) + 1
+                changed_ids.append(bond_id)
+            changed = sum(transitions.values())
+            for (old_status, bond_type), amount in transitions.items():
+                counter_service.record_transition(
+                    SCOPE_BONDS, old_status, new_status, bond_type, amount=amount
+                )
         
         db.session.commit()
-        return result.rowcount
+        
+        # Only the rows that actually changed lose their cached pages; same
+        # tags as a single capture
+        if changed_ids:
+            cache_service.invalidate_items_caches(changed_ids)
+            if historical_records:
+                recent_adoptions.invalidate()
+            popularity_service.invalidate()
+        return changed
     
     @staticmethod
     def get_popular_items_optimized(limit: int = 10) -> List[Dict[str, Any]]:
         """
         OPTIMIZED: Get most popular items with aggregated statistics
         
-        Uses efficient aggregation queries with proper indexing
+        BEFORE:
+        - Two GROUP BY aggregates over the transaction history per cache miss
+        
+        AFTER:
+        - Top-N scan of idx_item_popularity_rank on the maintained
+          item_popularity table, plus one primary-key IN query per item type
+          for names, prices and images
         """
-        # Get popular historical records
-        historical_popularity = db.session.query(
-            HistoricalRecord.id,
-            HistoricalRecord.name,
-            HistoricalRecord.fee,
-            HistoricalRecord.imgurl,
-            func.count(DonorItem.id).label('adoption_count'),
-            func.sum(DonorItem.fee).label('total_revenue')
-        )\
-        .join(DonorItem, HistoricalRecord.id == DonorItem.item_id)\
-        .group_by(HistoricalRecord.id)\
-        .order_by(func.count(DonorItem.id).desc())\
-        .limit(limit // 2)\
-        .all()
-        
-        # Get popular bonds
-        bond_popularity = db.session.query(
-            Bond.bond_id,
-            Bond.retail_price,
-            Bond.type,
-            Bond.front_image,
-            func.count(Transaction.transaction_id).label('purchase_count'),
-            func.sum(Transaction.fee).label('total_revenue')
-        )\
-        .join(Transaction, Bond.bond_id == Transaction.item_id)\
-        .group_by(Bond.bond_id)\
-        .order_by(func.count(Transaction.transaction_id).desc())\
-        .limit(limit // 2)\
-        .all()
+        ranking = popularity_service.top_items(limit)
+        
+        record_ids = [row.item_id for row in ranking if row.item_type == ITEM_TYPE_HISTORICAL_RECORD]
+        bond_ids = [row.item_id for row in ranking if row.item_type == ITEM_TYPE_BOND]
+        records = {
+            str(record.id): record
+            for record in (HistoricalRecord.query.filter(HistoricalRecord.id.in_(record_ids)).all()
+                           if record_ids else [])
+        }
+        bonds = {
+            bond.bond_id: bond
+            for bond in (Bond.query.filter(Bond.bond_id.in_(bond_ids)).all() if bond_ids else [])
+        }
         
-        # Combine and format results
+        # Already ranked; items deleted since the last reconciliation are skipped
         popular_items = []
-        
-        for item in historical_popularity:
-            popular_items.append({
-                'id': str(item.id),
-                'name': item.name,
-                'type': 'historical_record',
-                'price': float(item.fee),
-                'image': item.imgurl,
-                'popularity_count': item.adoption_count,
-                'total_revenue': float(item.total_revenue or 0)
-            })
-        
-        for item in bond_popularity:
-            popular_items.append({
-                'id': item.bond_id,
-                'name': f"Bond {item.bond_id}",
-                'type': 'bond',
-                'price': float(item.retail_price or 0),
-                'image': item.front_image,
-                'popularity_count': item.purchase_count,
-                'total_revenue': float(item.total_revenue or 0)
-            })
-        
-        # Sort by popularity across both types
-        popular_items.sort(key=lambda x: x['popularity_count'], reverse=True)
-        return popular_items[:limit]
+        for row in ranking:
+            if row.item_type == ITEM_TYPE_HISTORICAL_RECORD:
+                item = records.get(row.item_id)
+                if item is None:
+                    continue
+                popular_items.append({
+                    'id': str(item.id),
+                    'name': item.name,
+                    'type': 'historical_record',
+                    'price': float(item.fee),
+                    'image': item.imgurl,
+                    'popularity_count': row.purchase_count,
+                    'total_revenue': float(row.revenue or 0)
+                })
+            else:
+                item = bonds.get(row.item_id)
+                if item is None:
+                    continue
+                popular_items.append({
+                    'id': item.bond_id,
+                    'name': f"Bond {item.bond_id}",
+                    'type': 'bond',
+                    'price': float(item.retail_price or 0),
+                    'image': item.front_image,
+                    'popularity_count': row.purchase_count,
+                    'total_revenue': float(row.revenue or 0)
+                })
+        
+        return popular_items
 
 
 # Performance monitoring for queries
@@ -6,7 +6,7 @@ Demonstrates the implementation of all optimization strategies
 """
 
 from . import main
-from flask import render_template, jsonify, request, current_app
+from flask import render_template, jsonify, request, current_app, abort
 import logging
 from app.db.db import db
 from app.db.models import HistoricalRecord, Donor, Transaction, DonorItem, Bond
@@ -14,6 +14,7 @@ from app.db.optimized_queries import optimized_queries
 from app.services.paypal_service import paypal_service, PayPalAPIError
 from app.services.transaction_service import transaction_service, TransactionError
 from app.services.cache_service import advanced_cache_service
+from app.services.recent_adoptions import recent_adoptions
 from app.utils.validators import (
     validate_paypal_order_data, validate_capture_order_data, 
     validate_pagination_params, require_json, validate_request_size,
@@ -63,10 +64,35 @@ def handle_errors_optimized(f):
     return decorated_function
 
 
+def internal_endpoint(f):
+    """404 unless OPTIMIZED_INTERNAL_ENDPOINTS_ENABLED; goes directly under the route"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_app.config.get('OPTIMIZED_INTERNAL_ENDPOINTS_ENABLED', False):
+            abort(404)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _pagination_args():
+    """Query arguments that cursor links must carry over (filters, search)"""
+    return {k: v for k, v in request.args.items() if k not in ('cursor', 'page')}
+
+
+def _item_summary(item):
+    """Compact JSON description of a transaction's item (record or bond)"""
+    if item is None:
+        return None
+    if isinstance(item, HistoricalRecord):
+        return {'type': 'historical_record', 'id': str(item.id), 'name': item.name}
+    return {'type': 'bond', 'id': item.bond_id, 'name': item.type}
+
+
 @main.route('/optimized/adopt-new-yorks-past')
 @handle_errors_optimized
 @query_performance_monitor(threshold_seconds=0.5)
-@advanced_cache_service.smart_cache(tier='warm', key_prefix='historical_records')
+@advanced_cache_service.smart_cache(tier='warm', key_prefix='historical_records',
+                                    invalidate_on=['historical_records:available'])
 def optimized_new_yorks_past():
     """
     OPTIMIZED: Display available and adopted historical records
@@ -92,36 +118,41 @@ def optimized_new_yorks_past():
         'search': request.args.get('search', '').strip()
     }
     
-    # Use optimized query with advanced caching
-    available_items, pagination = optimized_queries.get_available_historical_records_optimized(
-        page=page, 
-        per_page=per_page,
-        use_cache=True
-    )
-    
-    # Optimized query for adopted items with limit to prevent performance issues
-    adopted_items = optimized_queries.get_available_historical_records_optimized(
-        page=1,
-        per_page=20,
-        use_cache=True
-    )[0]  # Just get items, not pagination
-    
-    # Filter to only adopted items
-    adopted_items = [item for item in adopted_items if getattr(item, 'adopted', False)]
+    if filters['search'] or filters['min_fee'] is not None or filters['max_fee'] is not None:
+        # Search mode: ranked full-text match with fee range, cursor paginated
+        available_items, pagination = optimized_queries.search_historical_records(
+            search=filters['search'],
+            min_fee=filters['min_fee'],
+            max_fee=filters['max_fee'],
+            cursor=request.args.get('cursor'),
+            per_page=per_page
+        )
+    else:
+        # Use optimized query with advanced caching
+        available_items, pagination = optimized_queries.get_available_historical_records_optimized(
+            page=page, 
+            per_page=per_page,
+            use_cache=True
+        )
+    
+    # Newest adoptions, appended on capture (the available listing never contains any)
+    adopted_items = recent_adoptions.get_recent()
     
     logger.info(f"Optimized historical records page {page} served with {len(available_items)} items")
     
     return render_template(
         'Adopt_New_Yorks_Past/adopt_new_yorks_past.html',
         pagination=pagination,
-        adopted_items=adopted_items
+        adopted_items=adopted_items,
+        pagination_args=_pagination_args()
     )
 
 
 @main.route('/optimized/bonds')
 @handle_errors_optimized
 @query_performance_monitor(threshold_seconds=0.3)
-@advanced_cache_service.smart_cache(tier='warm', key_prefix='bonds')
+@advanced_cache_service.smart_cache(tier='warm', key_prefix='bonds',
+                                    invalidate_on=['bonds:available'])
 def optimized_get_bonds():
     """
     OPTIMIZED: Display available bonds with advanced filtering and caching
@@ -133,10 +164,12 @@ def optimized_get_bonds():
     - Proper parameter binding to prevent SQL injection
     """
     # Validate pagination parameters
-    page = request.args.get(get_page_parameter(), type=int, default=1)
+    page = request.args.get(get_page_parameter(), type=int)
     per_page = request.args.get('per_page', 9, type=int)
+    cursor = request.args.get('cursor')
     
     pagination_params = validate_pagination_params(page, per_page, max_per_page=MAX_PER_PAGE_OPTIMIZED)
+    keyset = page is None
     page = pagination_params['page']
     per_page = pagination_params['per_page']
     
@@ -144,6 +177,8 @@ def optimized_get_bonds():
     filters = {
         'status': request.args.get('status', 'available'),
         'bond_type': request.args.get('type'),
+        'mayor': request.args.get('mayor'),
+        'comptroller': request.args.get('comptroller'),
         'year_from': request.args.get('year_from', type=int),
         'year_to': request.args.get('year_to', type=int),
         'min_price': request.args.get('min_price', type=float),
@@ -153,11 +188,31 @@ def optimized_get_bonds():
     # Remove None values for cleaner caching
     filters = {k: v for k, v in filters.items() if v is not None}
     
-    # Use optimized query with filtering
-    bonds, pagination = optimized_queries.get_bonds_with_filters_optimized(
-        page=page,
-        per_page=per_page,
-        **filters
+    search = request.args.get('search', '').strip()
+    
+    if search:
+        # Search mode: ranked full-text match, cursor paginated
+        bonds, pagination = optimized_queries.search_bonds(
+            search=search,
+            cursor=cursor,
+            per_page=per_page,
+            **filters
+        )
+    else:
+        # Use optimized query with filtering
+        bonds, pagination = optimized_queries.get_bonds_with_filters_optimized(
+            page=page,
+            per_page=per_page,
+            cursor=cursor,
+            keyset=keyset,
+            **filters
+        )
+    
+    # Facet counts for the current filters, from one cached grouped query
+    facet_filters = {k: v for k, v in filters.items() if k != 'status'}
+    facets = advanced_cache_service.get_bond_facets_cached(
+        status=filters['status'],
+        filters=facet_filters
     )
     
     logger.info(f"Optimized bonds page {page} served with {len(bonds)} bonds")
@@ -166,11 +221,43 @@ def optimized_get_bonds():
         'Bonds/bonds_list.html',
         bonds=bonds,
         pagination=pagination,
-        current_filters=filters
+        current_filters=filters,
+        facets=facets,
+        pagination_args=_pagination_args()
     )
 
 
+@main.route('/optimized/bonds/facets')
+@handle_errors_optimized
+@query_performance_monitor(threshold_seconds=0.3)
+def optimized_bond_facets():
+    """
+    OPTIMIZED: Facet counts for bond browsing
+    
+    Performance Improvements:
+    - Single GROUPING SETS query instead of one count per facet value
+    - Cached alongside the bond listings and invalidated with them
+    """
+    filters = {
+        'bond_type': request.args.get('type'),
+        'mayor': request.args.get('mayor'),
+        'comptroller': request.args.get('comptroller'),
+        'year_from': request.args.get('year_from', type=int),
+        'year_to': request.args.get('year_to', type=int),
+        'min_price': request.args.get('min_price', type=float),
+        'max_price': request.args.get('max_price', type=float)
+    }
+    
+    facets = advanced_cache_service.get_bond_facets_cached(
+        status=request.args.get('status', 'available'),
+        filters={k: v for k, v in filters.items() if v is not None}
+    )
+    
+    return jsonify({'facets': facets})
+
+
 @main.route('/optimized/transaction-history')
+@internal_endpoint
 @handle_errors_optimized
 @query_performance_monitor(threshold_seconds=1.0)
 @advanced_cache_service.smart_cache(tier='cold', key_prefix='transaction_history')
@@ -185,10 +272,12 @@ def optimized_transaction_history():
     - Smart caching for frequently accessed data
     """
     # Validate pagination
-    page = request.args.get('page', 1, type=int)
+    page = request.args.get('page', type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
     
     pagination_params = validate_pagination_params(page, per_page, max_per_page=100)
+    keyset = page is None
     page = pagination_params['page']
     per_page = pagination_params['per_page']
     
@@ -204,9 +293,23 @@ def optimized_transaction_history():
     transactions, pagination = optimized_queries.get_transaction_history_optimized(
         page=page,
         per_page=per_page,
+        cursor=cursor,
+        keyset=keyset,
         **{k: v for k, v in filters.items() if v is not None}
     )
     
+    if getattr(pagination, 'is_keyset', False):
+        pagination_data = pagination.to_dict()
+    else:
+        pagination_data = {
+            'page': pagination.page,
+            'pages': pagination.pages,
+            'per_page': pagination.per_page,
+            'total': pagination.total,
+            'has_next': pagination.has_next,
+            'has_prev': pagination.has_prev
+        }
+    
     return jsonify({
         'transactions': [
             {
@@ -216,22 +319,17 @@ def optimized_transaction_history():
                 'fee': float(t.fee),
                 'status': t.payment_status,
                 'timestamp': t.timestamp.isoformat(),
-                'donor_email': t.donor_email
+                'donor_email': t.donor_email,
+                'item': _item_summary(t.get_item())
             }
             for t in transactions
         ],
-        'pagination': {
-            'page': pagination.page,
-            'pages': pagination.pages,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
-        }
+        'pagination': pagination_data
     })
 
 
 @main.route('/optimized/donor/<donor_id>/summary')
+@internal_endpoint
 @handle_errors_optimized
 @query_performance_monitor(threshold_seconds=0.5)
 @advanced_cache_service.smart_cache(tier='warm', key_prefix='donor_summary')
@@ -292,6 +390,7 @@ def optimized_popular_items():
 
 
 @main.route('/optimized/analytics/transactions')
+@internal_endpoint
 @handle_errors_optimized
 @query_performance_monitor(threshold_seconds=2.0)
 @advanced_cache_service.smart_cache(tier='cold', key_prefix='transaction_analytics')
@@ -329,6 +428,7 @@ def optimized_transaction_analytics():
 
 
 @main.route('/optimized/bulk-update-items', methods=['POST'])
+@internal_endpoint
 @require_json
 @validate_request_size()
 @handle_errors_optimized
@@ -370,6 +470,7 @@ def optimized_bulk_update_items():
 
 # Performance monitoring endpoints
 @main.route('/optimized/performance/stats')
+@internal_endpoint
 @handle_errors_optimized
 def performance_stats():
     """Get current performance statistics"""
@@ -389,6 +490,7 @@ def performance_stats():
 
 
 @main.route('/optimized/performance/clear-cache', methods=['POST'])
+@internal_endpoint
 @handle_errors_optimized
 def clear_performance_cache():
     """Clear application cache for testing"""
@@ -400,7 +502,9 @@ def clear_performance_cache():
             'transaction_history',
             'donor_summary',
             'popular_items',
-            'transaction_analytics'
+            'transaction_analytics',
+            'fragments',
+            'responses'
         ]
         
         for pattern in patterns_to_clear:
@@ -10,6 +10,13 @@ from app.utils.validators import (
     validate_pagination_params, require_json, validate_request_size,
     validate_uuid, ValidationError
 )
+from app.db.optimized_queries import BOND_SORT_KEY, HISTORICAL_RECORD_SORT_KEY
+from app.services.counter_service import counter_service, SCOPE_HISTORICAL_RECORDS, SCOPE_BONDS
+from app.utils.pagination import keyset_paginate, counted_paginate
+from app.utils.http_cache import conditional_get
+from app.services.item_cache import item_cache
+from app.services.recent_adoptions import recent_adoptions
+from app.services.cache_service import advanced_cache_service
 from flask_paginate import Pagination, get_page_parameter
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
@@ -20,6 +27,23 @@ from functools import wraps
 # Configure logging for this module
 logger = logging.getLogger(__name__)
 
+def _historical_record_version(item_id):
+    """updated_at of one record by primary key, for conditional GET"""
+    if not validate_uuid(item_id):
+        return None
+    # Same cached snapshot the view renders, so a 304 needs no DB access
+    item = item_cache.get_historical_record(item_id)
+    return (item['updated_at'], item_id) if item else None
+
+
+def _bond_version(bond_id):
+    """updated_at of one bond by primary key, for conditional GET"""
+    bond_id = (bond_id or '').strip()[:255]
+    if not bond_id:
+        return None
+    bond = item_cache.get_bond(bond_id)
+    return (bond['updated_at'], bond_id) if bond else None
+
 # Configurable parameters
 PER_PAGE = 20
 MAX_PER_PAGE = 100
@@ -154,39 +178,48 @@ def about():
 
 @main.route('/adopt-new-yorks-past')
 @handle_errors
+@conditional_get(lambda: counter_service.catalog_validator(SCOPE_HISTORICAL_RECORDS))
+@advanced_cache_service.cache_middleware(tags=['historical_records', 'historical_records:available'])
 def new_yorks_past():
     """Display available and adopted historical records with optimized queries"""
     # Validate pagination parameters
-    page = request.args.get('page', 1, type=int)
+    page = request.args.get('page', type=int)
     per_page = request.args.get('per_page', 8, type=int)
+    cursor = request.args.get('cursor')
     
     pagination_params = validate_pagination_params(page, per_page, max_per_page=50)
-    page = pagination_params['page']
     per_page = pagination_params['per_page']
     
     # Optimized query for available items with proper indexing
     available_query = HistoricalRecord.query\
         .filter_by(adopted=False)\
-        .options(joinedload(HistoricalRecord.donors).joinedload(DonorItem.donor))\
-        .order_by(HistoricalRecord.created_at.desc())
-    
-    # Paginate available items
-    pagination = available_query.paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False,
-        max_per_page=50
-    )
+        .options(joinedload(HistoricalRecord.donors).joinedload(DonorItem.donor))
+    
+    # Total comes from the maintained counter instead of SELECT count(*)
+    total = counter_service.get_count(SCOPE_HISTORICAL_RECORDS, 'available')
+    
+    if cursor or page is None:
+        # Seek via idx_historical_records_adopted_created_at; no OFFSET, no count
+        pagination = keyset_paginate(
+            available_query, HISTORICAL_RECORD_SORT_KEY,
+            cursor=cursor,
+            per_page=per_page,
+            total=total
+        )
+    else:
+        # Numbered pages kept for existing ?page=N links; same order as the keyset path
+        page = pagination_params['page']
+        pagination = counted_paginate(
+            available_query.order_by(*(column.desc() for column in HISTORICAL_RECORD_SORT_KEY)),
+            page=page,
+            per_page=per_page,
+            total=total
+        )
     
-    # Optimized query for adopted items (limit to recent ones for performance)
-    adopted_items = HistoricalRecord.query\
-        .filter_by(adopted=True)\
-        .options(joinedload(HistoricalRecord.donors).joinedload(DonorItem.donor))\
-        .order_by(HistoricalRecord.updated_at.desc())\
-        .limit(20)\
-        .all()
+    # Newest adoptions, maintained on capture; no join over adopted records and donors
+    adopted_items = recent_adoptions.get_recent()
     
-    logger.info(f"Displaying historical records page {page}, {len(pagination.items)} available items")
+    logger.info(f"Displaying historical records page {page or cursor or 1}, {len(pagination.items)} available items")
     
     return render_template(
         'Adopt_New_Yorks_Past/adopt_new_yorks_past.html',
@@ -197,6 +230,8 @@ def new_yorks_past():
 
 @main.route('/adopt-new-yorks-past/item/<item_id>')
 @handle_errors
+@conditional_get(_historical_record_version)
+@advanced_cache_service.cache_middleware(timeout=600, tags=lambda item_id: [f"item:{item_id}"])
 def new_yorks_past_view_item(item_id):
     """Display individual historical record with security validation"""
     # Validate item_id format
@@ -204,10 +239,10 @@ def new_yorks_past_view_item(item_id):
         logger.warning(f"Invalid item ID format: {item_id} from {request.remote_addr}")
         return render_template('Error_Pages/404_not_found.html'), 404
     
-    # Get item with eager loading for performance
-    item = HistoricalRecord.query\
-        .options(joinedload(HistoricalRecord.donors).joinedload(DonorItem.donor))\
-        .get_or_404(item_id)
+    # Read-through item cache; donors are part of the cached snapshot
+    item = item_cache.get_historical_record(item_id)
+    if item is None:
+        return render_template('Error_Pages/404_not_found.html'), 404
     
     # Get configuration securely (no secrets exposed to template)
     config_data = {
@@ -218,7 +253,7 @@ def new_yorks_past_view_item(item_id):
         'RECIPIENT_EMAILS': current_app.config.get('RECIPIENT_EMAILS')
     }
     
-    logger.info(f"Displaying historical record {item_id}: {item.name}")
+    logger.info(f"Displaying historical record {item_id}: {item['name']}")
     
     return render_template(
         'Adopt_New_Yorks_Past/components/items/view_item.html',
@@ -232,28 +267,43 @@ from app.db.models import Bond
 
 @main.route('/bonds', methods=['GET'])
 @handle_errors
+@conditional_get(lambda: counter_service.catalog_validator(SCOPE_BONDS))
+@advanced_cache_service.cache_middleware(tags=['bonds', 'bonds:available'])
 def get_bonds():
     """Display available bonds with optimized pagination"""
     # Validate pagination parameters
-    page = request.args.get(get_page_parameter(), type=int, default=1)
+    page = request.args.get(get_page_parameter(), type=int)
     per_page = request.args.get('per_page', 9, type=int)
+    cursor = request.args.get('cursor')
     
     pagination_params = validate_pagination_params(page, per_page, max_per_page=50)
-    page = pagination_params['page']
     per_page = pagination_params['per_page']
     
-    # Use SQLAlchemy pagination for better performance
-    pagination = Bond.query\
-        .filter_by(status='available')\
-        .order_by(Bond.issue_date.desc(), Bond.bond_id)\
-        .paginate(
+    available_query = Bond.query.filter_by(status='available')
+    
+    # Total comes from the maintained counter instead of SELECT count(*)
+    total = counter_service.get_count(SCOPE_BONDS, 'available')
+    
+    if cursor or page is None:
+        # Seek via idx_bonds_status_issue_date; no OFFSET, no count
+        pagination = keyset_paginate(
+            available_query, BOND_SORT_KEY,
+            cursor=cursor,
+            per_page=per_page,
+            nullable_leading=True,
+            total=total
+        )
+    else:
+        # Numbered pages kept for existing ?page=N links; same order as the keyset path
+        page = pagination_params['page']
+        pagination = counted_paginate(
+            available_query.order_by(*(column.desc() for column in BOND_SORT_KEY)),
             page=page,
             per_page=per_page,
-            error_out=False,
-            max_per_page=50
+            total=total
         )
     
-    logger.info(f"Displaying bonds page {page}, {len(pagination.items)} bonds")
+    logger.info(f"Displaying bonds page {page or cursor or 1}, {len(pagination.items)} bonds")
     
     return render_template(
         'Bonds/bonds_list.html',
@@ -265,6 +315,8 @@ def get_bonds():
 
 @main.route('/bond/<bond_id>', methods=['GET'])
 @handle_errors
+@conditional_get(_bond_version)
+@advanced_cache_service.cache_middleware(timeout=600, tags=lambda bond_id: [f"item:{bond_id}"])
 def view_bond_details(bond_id):
     """View details of a specific bond with security validation"""
     # Sanitize bond_id input
@@ -274,8 +326,10 @@ def view_bond_details(bond_id):
     
     bond_id = bond_id.strip()[:255]  # Limit length
     
-    # Get bond
-    bond = Bond.query.get_or_404(bond_id)
+    # Get bond through the read-through item cache
+    bond = item_cache.get_bond(bond_id)
+    if bond is None:
+        return render_template('Error_Pages/404_not_found.html'), 404
     
     # Get configuration securely
     config_data = {
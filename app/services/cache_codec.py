@@ -0,0 +1,312 @@
+# app/services/cache_codec.py
+
+"""
+Compact cache codec
+Encodes cache entries with msgpack, storing homogeneous lists of dicts as a
+field-name table plus value rows, and compresses large entries with zstd or
+zlib. Falls back to pickle for values msgpack can't represent.
+"""
+
+import logging
+import pickle
+import threading
+import time
+import uuid
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # Optional; entries fall back to pickle bodies
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # Optional; zlib is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Header: magic byte, then body format and compression in one flags byte
+MAGIC = 0xCA
+BODY_PICKLE = 0x00
+BODY_MSGPACK = 0x01
+COMPRESS_NONE = 0x00
+COMPRESS_ZLIB = 0x10
+COMPRESS_ZSTD = 0x20
+
+# msgpack extension type codes
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_DECIMAL = 3
+EXT_UUID = 4
+EXT_TUPLE = 5
+EXT_SET = 6
+EXT_TABLE = 7
+
+# Lists of at least this many same-shaped dicts are stored as tables
+MIN_TABLE_ROWS = 2
+
+
+class _Table:
+    """Marker for a list of dicts sharing one key order"""
+
+    __slots__ = ('fields', 'rows')
+
+    def __init__(self, fields: List[str], rows: List[List[Any]]):
+        self.fields = fields
+        self.rows = rows
+
+
+def _tabulate(value: Any) -> Any:
+    """Replace homogeneous lists of dicts with _Table markers, recursively"""
+    if isinstance(value, dict):
+        return {k: _tabulate(v) for k, v in value.items()}
+
+    if isinstance(value, list):
+        if (len(value) >= MIN_TABLE_ROWS and type(value[0]) is dict
+                and all(isinstance(k, str) for k in value[0])):
+            fields = list(value[0])
+            if all(type(row) is dict and list(row) == fields for row in value):
+                return _Table(fields, [[_tabulate(row[f]) for f in fields] for row in value])
+        return [_tabulate(v) for v in value]
+
+    if isinstance(value, tuple):
+        return tuple(_tabulate(v) for v in value)
+    return value
+
+
+def _pack(value: Any) -> bytes:
+    return msgpack.packb(value, default=_default, use_bin_type=True, strict_types=True)
+
+
+def _default(value: Any):
+    """msgpack hook for the types the catalog caches carry"""
+    if isinstance(value, _Table):
+        return msgpack.ExtType(EXT_TABLE, _pack([value.fields, value.rows]))
+    if isinstance(value, datetime):
+        return msgpack.ExtType(EXT_DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(EXT_DATE, value.isoformat().encode())
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(value).encode())
+    if isinstance(value, uuid.UUID):
+        return msgpack.ExtType(EXT_UUID, value.bytes)
+    if isinstance(value, tuple):
+        return msgpack.ExtType(EXT_TUPLE, _pack(list(value)))
+    if isinstance(value, (set, frozenset)):
+        return msgpack.ExtType(EXT_SET, _pack(list(value)))
+    # strict_types routes str/dict/list subclasses here; keep their base value
+    for base in (str, bytes, int, float, dict, list):
+        if isinstance(value, base):
+            return base(value)
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == EXT_TABLE:
+        fields, rows = _unpack(data)
+        return [dict(zip(fields, row)) for row in rows]
+    if code == EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == EXT_DATE:
+        return date.fromisoformat(data.decode())
+    if code == EXT_DECIMAL:
+        return Decimal(data.decode())
+    if code == EXT_UUID:
+        return uuid.UUID(bytes=data)
+    if code == EXT_TUPLE:
+        return tuple(_unpack(data))
+    if code == EXT_SET:
+        return set(_unpack(data))
+    return msgpack.ExtType(code, data)
+
+
+class CacheCodec:
+    """Encoder/decoder for cache entries with running size statistics"""
+
+    def __init__(self, compress_min_bytes: int = 1024, compression: str = 'auto',
+                 zlib_level: int = 6, zstd_level: int = 3):
+        self.compress_min_bytes = compress_min_bytes
+        self.compression = compression
+        self.zlib_level = zlib_level
+        self.zstd_level = zstd_level
+        self._stats = {
+            'entries': 0, 'raw_bytes': 0, 'encoded_bytes': 0, 'max_entry_bytes': 0,
+            'msgpack_bodies': 0, 'pickle_bodies': 0, 'compressed': 0
+        }
+        self._lock = threading.Lock()
+
+    def configure(self, compress_min_bytes: Optional[int] = None,
+                  compression: Optional[str] = None) -> None:
+        """Apply settings from application config"""
+        if compress_min_bytes is not None:
+            self.compress_min_bytes = compress_min_bytes
+        if compression is not None:
+            self.compression = compression
+
+    def _compressor(self) -> int:
+        if self.compression == 'none':
+            return COMPRESS_NONE
+        if self.compression in ('auto', 'zstd') and zstandard is not None:
+            return COMPRESS_ZSTD
+        return COMPRESS_ZLIB
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize a value into a self-describing byte string"""
+        body_format = BODY_PICKLE
+        body = None
+        if msgpack is not None:
+            try:
+                body = _pack(_tabulate(value))
+                body_format = BODY_MSGPACK
+            except (TypeError, ValueError, OverflowError):
+                body = None
+        if body is None:
+            body = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        compression = COMPRESS_NONE
+        payload = body
+        if len(body) >= self.compress_min_bytes:
+            method = self._compressor()
+            if method == COMPRESS_ZSTD:
+                compressed = zstandard.ZstdCompressor(level=self.zstd_level).compress(body)
+            elif method == COMPRESS_ZLIB:
+                compressed = zlib.compress(body, self.zlib_level)
+            else:
+                compressed = body
+            # Incompressible bodies are stored as-is
+            if method != COMPRESS_NONE and len(compressed) < len(body):
+                compression, payload = method, compressed
+
+        encoded = bytes((MAGIC, body_format | compression)) + payload
+        self._record(len(body), len(encoded), body_format, compression)
+        return encoded
+
+    def decode(self, data: bytes) -> Any:
+        """Reverse of encode"""
+        if len(data) < 2 or data[0] != MAGIC:
+            raise ValueError("Not a cache codec entry")
+
+        flags, payload = data[1], data[2:]
+        compression = flags & 0xF0
+        if compression == COMPRESS_ZSTD:
+            if zstandard is None:
+                raise ValueError("Entry is zstd-compressed but zstandard is not installed")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif compression == COMPRESS_ZLIB:
+            payload = zlib.decompress(payload)
+
+        if flags & 0x0F == BODY_MSGPACK:
+            if msgpack is None:
+                raise ValueError("Entry is msgpack-encoded but msgpack is not installed")
+            return _unpack(payload)
+        return pickle.loads(payload)
+
+    @staticmethod
+    def is_encoded(data: Any) -> bool:
+        return isinstance(data, (bytes, bytearray)) and len(data) >= 2 and data[0] == MAGIC
+
+    def _record(self, raw: int, encoded: int, body_format: int, compression: int) -> None:
+        with self._lock:
+            stats = self._stats
+            stats['entries'] += 1
+            stats['raw_bytes'] += raw
+            stats['encoded_bytes'] += encoded
+            stats['max_entry_bytes'] = max(stats['max_entry_bytes'], encoded)
+            stats['msgpack_bodies' if body_format == BODY_MSGPACK else 'pickle_bodies'] += 1
+            if compression != COMPRESS_NONE:
+                stats['compressed'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_entry_bytes'] = round(stats['encoded_bytes'] / stats['entries'], 1) if stats['entries'] else None
+        stats['compression'] = self.compression
+        stats['compress_min_bytes'] = self.compress_min_bytes
+        stats['msgpack_available'] = msgpack is not None
+        stats['zstd_available'] = zstandard is not None
+        return stats
+
+
+class CodecRedisSerializer:
+    """
+    Drop-in for Flask-Caching's RedisSerializer
+
+    Integers stay plain so INCR keeps working; everything else is stored with
+    a '#' marker. Entries written by the stock pickle serializer ('!') are
+    still readable, so switching codecs needs no cache flush.
+    """
+
+    def __init__(self, codec: CacheCodec):
+        self.codec = codec
+
+    def dumps(self, value: Any, dumper: Optional[Callable] = None) -> bytes:
+        if type(value) is int:
+            return str(value).encode('ascii')
+        return b'#' + self.codec.encode(value)
+
+    def loads(self, value: Optional[bytes]) -> Any:
+        if value is None:
+            return None
+        if value.startswith(b'#'):
+            return self.codec.decode(value[1:])
+        if value.startswith(b'!'):
+            return pickle.loads(value[1:])
+        try:
+            return int(value)
+        except ValueError:
+            return value
+
+
+def benchmark(samples: Dict[str, Any], codec: Optional[CacheCodec] = None,
+              iterations: int = 200, redis_client=None) -> List[Dict[str, Any]]:
+    """
+    Compare pickle with the codec on representative cache values
+
+    Reports encoded size and mean encode/decode time per sample, and when a
+    Redis client is given, the server's MEMORY USAGE for each stored form.
+    """
+    codec = codec or CacheCodec()
+    results = []
+    for name, value in samples.items():
+        row = {'sample': name}
+        for label, dumps, loads in (
+            ('pickle', lambda v: pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+            ('codec', codec.encode, codec.decode),
+        ):
+            encoded = dumps(value)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                dumps(value)
+            encode_us = (time.perf_counter() - start) / iterations * 1e6
+            start = time.perf_counter()
+            for _ in range(iterations):
+                loads(encoded)
+            decode_us = (time.perf_counter() - start) / iterations * 1e6
+
+            row[f'{label}_bytes'] = len(encoded)
+            row[f'{label}_encode_us'] = round(encode_us, 1)
+            row[f'{label}_decode_us'] = round(decode_us, 1)
+
+            if redis_client is not None:
+                key = f"codec-benchmark:{label}:{name}"
+                try:
+                    redis_client.set(key, encoded, ex=60)
+                    row[f'{label}_redis_bytes'] = redis_client.memory_usage(key)
+                finally:
+                    redis_client.delete(key)
+
+        row['size_ratio'] = round(row['codec_bytes'] / max(row['pickle_bytes'], 1), 3)
+        results.append(row)
+    return results
+
+
+# Process-wide codec
+cache_codec = CacheCodec()
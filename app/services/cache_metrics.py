@@ -0,0 +1,135 @@
+# app/services/cache_metrics.py
+
+"""
+Per-prefix cache instrumentation
+Counts hits, misses, sets and bytes and keeps latency histograms for each
+key prefix, so each cache family's hit rate and payoff can be read separately
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+COUNTERS = ('l1_hits', 'l2_hits', 'misses', 'sets', 'bytes_written',
+            'stale_hits', 'early_refreshes')
+TIMINGS = ('l1_get', 'l2_get', 'l2_set', 'recompute')
+
+
+def key_prefix(key: str) -> str:
+    """Cache family of a key: its first segment, ignoring the smart_cache version"""
+    parts = key.split(':', 2)
+    if len(parts) > 1 and parts[0].startswith('v') and parts[0][1:2].isdigit():
+        parts = parts[1:]
+    return parts[0] or 'unknown'
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram; cheap to update, approximate percentiles"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of observations"""
+        if not self.count:
+            return None
+        threshold = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= threshold:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+            'buckets': {
+                (f"le_{bound}" if index < len(LATENCY_BUCKETS_MS) else 'inf'): count
+                for index, (bound, count) in enumerate(
+                    zip(list(LATENCY_BUCKETS_MS) + [None], self.buckets)
+                )
+                if count
+            }
+        }
+
+
+class CacheMetrics:
+    """Thread-safe, process-local counters and histograms keyed by prefix"""
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._timings: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, stat: str, amount: int = 1) -> None:
+        prefix = key_prefix(key)
+        with self._lock:
+            counters = self._counters.get(prefix)
+            if counters is None:
+                counters = self._counters[prefix] = dict.fromkeys(COUNTERS, 0)
+            counters[stat] += amount
+
+    def observe(self, key: str, timing: str, seconds: float) -> None:
+        prefix = key_prefix(key)
+        with self._lock:
+            timings = self._timings.get(prefix)
+            if timings is None:
+                timings = self._timings[prefix] = {name: LatencyHistogram() for name in TIMINGS}
+            timings[timing].observe(seconds * 1000)
+
+    def totals(self) -> Dict[str, int]:
+        """Counters summed over every prefix"""
+        with self._lock:
+            totals = dict.fromkeys(COUNTERS, 0)
+            for counters in self._counters.values():
+                for stat, value in counters.items():
+                    totals[stat] += value
+            return totals
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-prefix counters, hit rates and latency summaries"""
+        with self._lock:
+            prefixes: List[str] = sorted(set(self._counters) | set(self._timings))
+            report = {}
+            for prefix in prefixes:
+                counters = dict(self._counters.get(prefix) or dict.fromkeys(COUNTERS, 0))
+                lookups = counters['l1_hits'] + counters['l2_hits'] + counters['misses']
+                hits = counters['l1_hits'] + counters['l2_hits']
+                report[prefix] = {
+                    **counters,
+                    'hit_rate': f"{hits / lookups * 100:.2f}%" if lookups else 'N/A',
+                    'latency': {
+                        name: histogram.to_dict()
+                        for name, histogram in (self._timings.get(prefix) or {}).items()
+                        if histogram.count
+                    }
+                }
+            return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+# Process-wide metrics
+cache_metrics = CacheMetrics()
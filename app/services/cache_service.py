@@ -3,15 +3,42 @@
 import logging
 import hashlib
 import json
-from typing import Any, Optional, List, Dict, Union
+import math
+import random
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, List, Dict, Union
 from functools import wraps
-from datetime import datetime, timedelta
-from flask import current_app, request
+from datetime import datetime
+from flask import Response, current_app, request, has_request_context, copy_current_request_context
 from app import cache
+from app.services.local_cache import local_cache
+from app.services.single_flight import single_flight
+from app.services.cache_warmer import cache_warmer
+from app.services.cache_metrics import cache_metrics
+from app.services.cache_codec import cache_codec, CodecRedisSerializer
+from app.services.invalidation_bus import invalidation_bus
+from app.db.db import db
 from app.db.models import HistoricalRecord, Bond
+from app.services.catalog_filter import catalog_filter
+from app.services.counter_service import counter_service, SCOPE_HISTORICAL_RECORDS, SCOPE_BONDS
+from app.utils.pagination import counted_paginate
 
 logger = logging.getLogger(__name__)
 
+# Redis set per tag holding the keys registered under it
+TAG_KEY_PREFIX = 'tag:'
+# Outlives the longest entry (frozen tier, doubled for slow queries, plus stale grace)
+TAG_SET_TIMEOUT = 7 * 86400
+# Per-item listing payloads shared by every page that shows the item
+LISTING_KEY_PREFIX = 'listing'
+# Marks a stored Response snapshot in smart_cache entries
+RESPONSE_MARKER = '__response__'
+
+# Tag registry for the process-local simple backend
+_local_tags: Dict[str, set] = {}
+_local_tags_lock = threading.Lock()
+
 class AdvancedCacheService:
     """Enhanced service for managing application caching with advanced strategies"""
     
@@ -23,6 +50,272 @@ class AdvancedCacheService:
         'frozen': 86400  # 24 hours - rarely changing data
     }
     
+    # Spread of TTLs around the tier value so entries don't expire in lockstep
+    ttl_jitter = 0.1
+    # Hard TTL as a multiple of the soft TTL; stale entries are served in between
+    stale_factor = 2.0
+    # XFetch beta: higher refreshes earlier
+    early_refresh_beta = 1.0
+    
+    # Keys with a background refresh running in this process
+    _refreshing = set()
+    _refreshing_lock = threading.Lock()
+    
+    @staticmethod
+    def init_app(app):
+        """Configure the in-process L1 tier from application config"""
+        local_cache.configure(
+            enabled=app.config.get('L1_CACHE_ENABLED', True),
+            max_bytes=app.config.get('L1_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+            max_entries=app.config.get('L1_CACHE_MAX_ENTRIES', 1024),
+            default_ttl=app.config.get('L1_CACHE_TTL', 30)
+        )
+        single_flight.configure(
+            wait_timeout=app.config.get('CACHE_FILL_WAIT_TIMEOUT', 5.0),
+            lock_timeout=app.config.get('CACHE_FILL_LOCK_TIMEOUT', 30.0)
+        )
+        AdvancedCacheService.ttl_jitter = app.config.get('CACHE_TTL_JITTER', 0.1)
+        AdvancedCacheService.stale_factor = max(app.config.get('CACHE_STALE_FACTOR', 2.0), 1.0)
+        AdvancedCacheService.early_refresh_beta = app.config.get('CACHE_EARLY_REFRESH_BETA', 1.0)
+        
+        # Compact encoding for entries stored in Redis
+        cache_codec.configure(
+            compress_min_bytes=app.config.get('CACHE_CODEC_COMPRESS_MIN_BYTES', 1024),
+            compression=app.config.get('CACHE_CODEC_COMPRESSION', 'auto')
+        )
+        if app.config.get('CACHE_CODEC', 'compact') == 'compact':
+            with app.app_context():
+                backend = cache.cache
+                if hasattr(backend, '_write_client') and hasattr(backend, 'serializer'):
+                    backend.serializer = CodecRedisSerializer(cache_codec)
+    
+    @staticmethod
+    def _count(stat: str, key: str) -> None:
+        cache_metrics.incr(key, stat)
+    
+    @staticmethod
+    def cache_get(key: str) -> Any:
+        """Two-tier lookup: in-process L1 first, then the Flask-Caching backend"""
+        start = time.perf_counter()
+        value = local_cache.get(key)
+        cache_metrics.observe(key, 'l1_get', time.perf_counter() - start)
+        if value is not None:
+            AdvancedCacheService._count('l1_hits', key)
+            return value
+        
+        start = time.perf_counter()
+        value = cache.get(key)
+        cache_metrics.observe(key, 'l2_get', time.perf_counter() - start)
+        if value is not None:
+            AdvancedCacheService._count('l2_hits', key)
+            # Promote with the short L1 TTL; the remaining L2 TTL is unknown
+            local_cache.set(key, value)
+            return value
+        
+        AdvancedCacheService._count('misses', key)
+        return None
+    
+    @staticmethod
+    def cache_set(key: str, value: Any, timeout: Optional[int] = None,
+                  tags: Optional[List[str]] = None) -> None:
+        """Write through both tiers, registering the key under its invalidation tags"""
+        # The backend write includes serialization, so it is timed as a whole
+        start = time.perf_counter()
+        cache.set(key, value, timeout=timeout)
+        cache_metrics.observe(key, 'l2_set', time.perf_counter() - start)
+        
+        size = local_cache.estimate_size(value)
+        local_cache.set(key, value, ttl=timeout, size=size)
+        if tags:
+            AdvancedCacheService._register_tags(key, tags)
+        AdvancedCacheService._count('sets', key)
+        cache_metrics.incr(key, 'bytes_written', size)
+    
+    @staticmethod
+    def get_many(keys: List[str]) -> Dict[str, Any]:
+        """
+        Multi-key cache_get: L1 per key, then one round trip for the rest
+        
+        On Redis the L2 read is a single MGET; the simple backend is
+        in-process, so its batch is just a loop without network cost.
+        Returns only the keys that were found.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        missing = []
+        
+        start = time.perf_counter()
+        for key in keys:
+            value = local_cache.get(key)
+            if value is not None:
+                found[key] = value
+                AdvancedCacheService._count('l1_hits', key)
+            else:
+                missing.append(key)
+        if keys:
+            cache_metrics.observe(keys[0], 'l1_get', time.perf_counter() - start)
+        if not missing:
+            return found
+        
+        start = time.perf_counter()
+        values = cache.get_many(*missing)
+        cache_metrics.observe(missing[0], 'l2_get', time.perf_counter() - start)
+        for key, value in zip(missing, values):
+            if value is not None:
+                found[key] = value
+                AdvancedCacheService._count('l2_hits', key)
+                local_cache.set(key, value)
+            else:
+                AdvancedCacheService._count('misses', key)
+        return found
+    
+    @staticmethod
+    def set_many(mapping: Dict[str, Any], timeout: Optional[int] = None,
+                 tags: Union[None, List[str], Dict[str, List[str]]] = None) -> None:
+        """
+        Multi-key cache_set, pipelined on Redis
+        
+        tags is either one list applied to every key or a per-key mapping.
+        """
+        if not mapping:
+            return
+        
+        start = time.perf_counter()
+        cache.set_many(mapping, timeout=timeout)
+        cache_metrics.observe(next(iter(mapping)), 'l2_set', time.perf_counter() - start)
+        
+        sizes = {key: local_cache.estimate_size(value) for key, value in mapping.items()}
+        for key, value in mapping.items():
+            local_cache.set(key, value, ttl=timeout, size=sizes[key])
+            AdvancedCacheService._count('sets', key)
+            cache_metrics.incr(key, 'bytes_written', sizes[key])
+        
+        if isinstance(tags, dict):
+            entries = {key: key_tags for key, key_tags in tags.items() if key in mapping and key_tags}
+        else:
+            entries = {key: tags for key in mapping} if tags else {}
+        if entries:
+            AdvancedCacheService._register_tags_many(entries)
+    
+    @staticmethod
+    def get_page_assembled(ids_key: str, compute_ids: Callable[[], Dict[str, Any]],
+                           item_key: Callable[[str], str],
+                           load_items: Callable[[List[str]], Dict[str, Any]],
+                           timeout: Optional[int] = None, item_timeout: Optional[int] = None,
+                           ids_tags: Optional[List[str]] = None,
+                           item_tags: Optional[Callable[[str], List[str]]] = None,
+                           keep: Optional[Callable[[Any], bool]] = None,
+                           total: Optional[Callable[[], int]] = None) -> Dict[str, Any]:
+        """
+        Page assembly: cache a page's ID list apart from its item payloads
+        
+        compute_ids returns the page metadata plus an 'ids' list (string ids);
+        load_items takes the ids whose payloads are missing and returns
+        {id: payload}. A changed item then costs one payload entry instead of
+        every page that shows it, and pages sharing items share payloads.
+        keep drops payloads that no longer belong on the page (e.g. an item
+        sold since the ID list was cached); when anything drops out, the ID
+        list is recomputed once so the page stays full. total re-reads the
+        item count (a maintained counter) so total/pages are current even
+        while the cached ID list is not.
+        """
+        page = AdvancedCacheService.get_or_compute(
+            ids_key, compute_ids, timeout=timeout, tags=ids_tags
+        )
+        items = AdvancedCacheService._assemble_items(
+            page['ids'], item_key, load_items, item_timeout, item_tags, keep
+        )
+        
+        if len(items) < len(page['ids']):
+            # Sold or deleted since the list was cached: rebuild it now
+            # rather than serving short pages until it expires
+            page = compute_ids()
+            AdvancedCacheService.cache_set(
+                ids_key, page,
+                timeout=AdvancedCacheService.jittered(timeout) if timeout else timeout,
+                tags=ids_tags
+            )
+            items = AdvancedCacheService._assemble_items(
+                page['ids'], item_key, load_items, item_timeout, item_tags, keep
+            )
+        
+        result = {name: value for name, value in page.items() if name != 'ids'}
+        result['items'] = items
+        if total is not None:
+            result['total'] = total()
+            result['pages'] = math.ceil(result['total'] / result['per_page']) if result['per_page'] else 0
+            result['has_next'] = result['page'] < result['pages']
+        return result
+    
+    @staticmethod
+    def _assemble_items(ids: List[str], item_key: Callable[[str], str],
+                        load_items: Callable[[List[str]], Dict[str, Any]],
+                        item_timeout: Optional[int],
+                        item_tags: Optional[Callable[[str], List[str]]],
+                        keep: Optional[Callable[[Any], bool]]) -> List[Any]:
+        """Payloads for ids in order: cached entries plus one load for the rest"""
+        keys = {item_id: item_key(item_id) for item_id in ids}
+        payloads = AdvancedCacheService.get_many(list(keys.values()))
+        
+        missing = [item_id for item_id, key in keys.items() if key not in payloads]
+        if missing:
+            start = time.perf_counter()
+            loaded = load_items(missing)
+            cache_metrics.observe(keys[missing[0]], 'recompute', time.perf_counter() - start)
+            fresh = {keys[item_id]: payload for item_id, payload in loaded.items() if item_id in keys}
+            AdvancedCacheService.set_many(
+                fresh,
+                timeout=AdvancedCacheService.jittered(item_timeout) if item_timeout else item_timeout,
+                tags={keys[item_id]: item_tags(item_id) for item_id in loaded if item_id in keys}
+                if item_tags else None
+            )
+            payloads.update(fresh)
+        
+        # Ids deleted since the list was cached simply drop out
+        items = [payloads[keys[item_id]] for item_id in ids if keys[item_id] in payloads]
+        if keep is not None:
+            items = [item for item in items if keep(item)]
+        return items
+    
+    @staticmethod
+    def _peek(key: str) -> Any:
+        """Read both tiers without touching the hit/miss counters"""
+        value = local_cache.get(key)
+        return value if value is not None else cache.get(key)
+    
+    @staticmethod
+    def fill_once(key: str, lookup, compute, stale: Any = None) -> Any:
+        """Run compute for a missed key so only one caller per key hits the database"""
+        redis_client = AdvancedCacheService._redis_client()
+        return single_flight.run(
+            key, lookup, compute, stale=stale,
+            redis_client=redis_client,
+            lock_prefix=getattr(cache.cache, 'key_prefix', '') if redis_client is not None else ''
+        )
+    
+    @staticmethod
+    def get_or_compute(key: str, compute, timeout: Optional[int] = None,
+                       tags: Optional[List[str]] = None) -> Any:
+        """Read-through helper: cached value, or a single-flight compute and store"""
+        result = AdvancedCacheService.cache_get(key)
+        if result is not None:
+            return result
+        
+        def fill():
+            start = time.perf_counter()
+            value = compute()
+            cache_metrics.observe(key, 'recompute', time.perf_counter() - start)
+            AdvancedCacheService.cache_set(
+                key, value,
+                timeout=AdvancedCacheService.jittered(timeout) if timeout else timeout,
+                tags=tags
+            )
+            return value
+        
+        return AdvancedCacheService.fill_once(
+            key, lambda: AdvancedCacheService._peek(key), fill
+        )
+    
     @staticmethod
     def get_cache_key(prefix: str, *args, **kwargs) -> str:
         """Generate consistent, collision-resistant cache key"""
@@ -51,41 +344,83 @@ class AdvancedCacheService:
             @wraps(f)
             def decorated_function(*args, **kwargs):
                 # Get timeout from tier
-                timeout = AdvancedCacheService.CACHE_TIERS.get(tier, 900)
+                timeout = AdvancedCacheService.jittered(AdvancedCacheService.CACHE_TIERS.get(tier, 900))
                 
-                # Generate sophisticated cache key
+                # Generate sophisticated cache key; views take their paging
+                # and filter input from the query string, so it is part of the key
+                key_kwargs = dict(kwargs)
+                if has_request_context() and request.args:
+                    key_kwargs['_query'] = sorted(request.args.items(multi=True))
                 cache_key = AdvancedCacheService.get_cache_key(
-                    key_prefix, f.__name__, *args, **kwargs
+                    key_prefix, f.__name__, *args, **key_kwargs
                 )
                 versioned_key = AdvancedCacheService.get_versioned_key(cache_key)
                 
-                # Try multi-level cache lookup
-                result = AdvancedCacheService.get_with_fallback(versioned_key)
-                if result is not None:
-                    logger.debug(f"Cache hit for key: {versioned_key}")
+                def fill():
+                    # Cache miss - execute function
+                    start_time = datetime.now()
+                    result = f(*args, **kwargs)
+                    execution_time = (datetime.now() - start_time).total_seconds()
+                    cache_metrics.observe(versioned_key, 'recompute', execution_time)
+                    
+                    # Adaptive caching based on execution time
+                    entry_timeout = timeout * 2 if execution_time > 1.0 else timeout
+                    
+                    # Store with metadata; expires_at is the soft TTL, the
+                    # backend keeps the entry until the hard TTL so it can be
+                    # served stale while a refresh runs
+                    frozen = AdvancedCacheService._freeze_result(result)
+                    if frozen is None:
+                        return result
+                    cache_data = {
+                        'result': frozen,
+                        'cached_at': time.time(),
+                        'expires_at': time.time() + entry_timeout,
+                        'execution_time': execution_time,
+                        'invalidate_on': invalidate_on or []
+                    }
+                    
+                    # Tagged with the key prefix plus any extra invalidation tags
+                    AdvancedCacheService.cache_set(
+                        versioned_key, cache_data,
+                        timeout=int(entry_timeout * AdvancedCacheService.stale_factor),
+                        tags=[key_prefix] + (invalidate_on or [])
+                    )
+                    logger.debug(f"Cache set for key: {versioned_key} (timeout: {entry_timeout}s)")
                     return result
                 
-                # Cache miss - execute function
-                start_time = datetime.now()
-                result = f(*args, **kwargs)
-                execution_time = (datetime.now() - start_time).total_seconds()
+                def fresh():
+                    entry = AdvancedCacheService._peek(versioned_key)
+                    if entry is None or AdvancedCacheService._is_stale(entry):
+                        return None
+                    return AdvancedCacheService._unwrap(entry)
                 
-                # Adaptive caching based on execution time
-                if execution_time > 1.0:  # Expensive queries get longer cache
-                    timeout *= 2
-                
-                # Store with metadata
-                cache_data = {
-                    'result': result,
-                    'cached_at': datetime.now().isoformat(),
-                    'execution_time': execution_time,
-                    'invalidate_on': invalidate_on or []
-                }
+                # Try multi-level cache lookup
+                try:
+                    entry = AdvancedCacheService.cache_get(versioned_key)
+                except Exception as e:
+                    logger.warning(f"Cache get failed for key {versioned_key}: {str(e)}")
+                    entry = None
                 
-                cache.set(versioned_key, cache_data, timeout=timeout)
-                logger.debug(f"Cache set for key: {versioned_key} (timeout: {timeout}s)")
+                if entry is not None:
+                    result = AdvancedCacheService._unwrap(entry)
+                    if AdvancedCacheService._is_stale(entry):
+                        AdvancedCacheService._count('stale_hits', versioned_key)
+                    elif AdvancedCacheService._should_refresh_early(entry):
+                        AdvancedCacheService._count('early_refreshes', versioned_key)
+                    else:
+                        logger.debug(f"Cache hit for key: {versioned_key}")
+                        return result
+                    # Serve what we have; one caller refreshes behind it
+                    AdvancedCacheService._refresh_in_background(versioned_key, fresh, fill, result)
+                    return result
                 
-                return result
+                # Concurrent misses on the same key wait for a single fill
+                return AdvancedCacheService.fill_once(
+                    versioned_key,
+                    lambda: AdvancedCacheService._unwrap(AdvancedCacheService._peek(versioned_key)),
+                    fill
+                )
             return decorated_function
         return decorator
     
@@ -93,138 +428,314 @@ class AdvancedCacheService:
     def get_with_fallback(key: str) -> Any:
         """Get from cache with fallback strategies"""
         try:
-            # Primary cache lookup
-            result = cache.get(key)
-            if result is not None:
-                # Check if it's metadata format
-                if isinstance(result, dict) and 'result' in result:
-                    return result['result']
-                return result
-            return None
+            # Primary cache lookup (L1, then L2)
+            return AdvancedCacheService._unwrap(AdvancedCacheService.cache_get(key))
         except Exception as e:
             logger.warning(f"Cache get failed for key {key}: {str(e)}")
             return None
     
+    @staticmethod
+    def jittered(ttl: int) -> int:
+        """Spread a TTL by +/- ttl_jitter so entries written together expire apart"""
+        jitter = AdvancedCacheService.ttl_jitter
+        if jitter <= 0:
+            return ttl
+        return max(1, int(ttl * random.uniform(1 - jitter, 1 + jitter)))
+    
+    @staticmethod
+    def _is_stale(entry: Any) -> bool:
+        """Whether a smart_cache entry is past its soft TTL"""
+        expires_at = entry.get('expires_at') if isinstance(entry, dict) else None
+        return expires_at is not None and time.time() >= expires_at
+    
+    @staticmethod
+    def _should_refresh_early(entry: Any) -> bool:
+        """
+        Probabilistic early expiration (XFetch)
+        
+        Refreshes with a probability that rises as expiry nears and scales
+        with how long the value took to compute, so hot keys are refreshed
+        before they ever expire.
+        """
+        expires_at = entry.get('expires_at') if isinstance(entry, dict) else None
+        if expires_at is None:
+            return False
+        delta = entry.get('execution_time') or 0
+        # 1 - random() keeps the log argument in (0, 1]
+        gap = -delta * AdvancedCacheService.early_refresh_beta * math.log(1.0 - random.random())
+        return time.time() + gap >= expires_at
+    
+    @staticmethod
+    def _refresh_in_background(key: str, lookup, compute, stale: Any) -> None:
+        """Recompute an entry on a worker thread while callers are served the old value"""
+        with AdvancedCacheService._refreshing_lock:
+            if key in AdvancedCacheService._refreshing:
+                return
+            AdvancedCacheService._refreshing.add(key)
+        
+        def refresh():
+            try:
+                # The Redis fill lock keeps other workers from refreshing too
+                AdvancedCacheService.fill_once(key, lookup, compute, stale=stale)
+            except Exception as e:
+                logger.warning(f"Background refresh failed for key {key}: {str(e)}")
+            finally:
+                with AdvancedCacheService._refreshing_lock:
+                    AdvancedCacheService._refreshing.discard(key)
+        
+        # Views read the request, so the refresh runs against a copy of it
+        if has_request_context():
+            target = copy_current_request_context(refresh)
+        else:
+            app = current_app._get_current_object()
+            
+            def target():
+                with app.app_context():
+                    refresh()
+        
+        threading.Thread(target=target, name=f"cache-refresh:{key}", daemon=True).start()
+    
+    @staticmethod
+    def _unwrap(entry: Any) -> Any:
+        """Strip smart_cache metadata from a stored entry"""
+        # Check if it's metadata format
+        if isinstance(entry, dict) and 'result' in entry:
+            return AdvancedCacheService._thaw_result(entry['result'])
+        return entry
+    
+    @staticmethod
+    def _freeze_result(result: Any) -> Any:
+        """
+        A view result as plain data for storage
+        
+        Responses (jsonify, make_response) are mutable and after_request
+        hooks edit their headers, so an L1 entry must never hand one live
+        instance to several requests: keep status, headers and body instead.
+        Returns None for streamed responses, which can't be stored.
+        """
+        if isinstance(result, tuple):
+            frozen = tuple(AdvancedCacheService._freeze_result(part) for part in result)
+            return None if any(part is None for part in frozen) else frozen
+        if isinstance(result, Response):
+            if result.is_streamed or result.direct_passthrough:
+                return None
+            return {
+                RESPONSE_MARKER: True,
+                'status': result.status_code,
+                'headers': list(result.headers.items()),
+                'body': result.get_data()
+            }
+        return result
+    
+    @staticmethod
+    def _thaw_result(result: Any) -> Any:
+        """Inverse of _freeze_result; builds a fresh Response on every call"""
+        if isinstance(result, tuple):
+            return tuple(AdvancedCacheService._thaw_result(part) for part in result)
+        if isinstance(result, dict) and result.get(RESPONSE_MARKER):
+            return Response(result['body'], status=result['status'], headers=result['headers'])
+        return result
+    
+    @staticmethod
+    def _redis_client():
+        """Raw Redis client when the Flask-Caching backend is Redis, else None"""
+        return getattr(cache.cache, '_write_client', None)
+    
+    @staticmethod
+    def _register_tags(key: str, tags: List[str]) -> None:
+        """Record key as a member of each tag so invalidation can find it directly"""
+        AdvancedCacheService._register_tags_many({key: tags})
+    
+    @staticmethod
+    def _register_tags_many(entries: Dict[str, List[str]]) -> None:
+        """_register_tags for several keys in one pipeline"""
+        redis_client = AdvancedCacheService._redis_client()
+        if redis_client is not None:
+            prefix = getattr(cache.cache, 'key_prefix', '')
+            keys_by_tag: Dict[str, List[str]] = {}
+            for key, tags in entries.items():
+                for tag in tags:
+                    keys_by_tag.setdefault(tag, []).append(key)
+            pipe = redis_client.pipeline(transaction=False)
+            for tag, keys in keys_by_tag.items():
+                tag_key = f"{prefix}{TAG_KEY_PREFIX}{tag}"
+                pipe.sadd(tag_key, *keys)
+                pipe.expire(tag_key, TAG_SET_TIMEOUT)
+            pipe.execute()
+        else:
+            # The simple backend is process-local, so is its tag registry
+            with _local_tags_lock:
+                for key, tags in entries.items():
+                    for tag in tags:
+                        _local_tags.setdefault(tag, set()).add(key)
+    
+    @staticmethod
+    def invalidate_tags(*tags: str) -> int:
+        """
+        Delete every entry registered under any of the tags
+        
+        Costs O(members) rather than a keyspace SCAN: each tag's member set
+        is read and removed atomically, then exactly those keys are deleted.
+        """
+        members = set()
+        redis_client = AdvancedCacheService._redis_client()
+        
+        if redis_client is not None:
+            prefix = getattr(cache.cache, 'key_prefix', '')
+            pipe = redis_client.pipeline(transaction=True)
+            for tag in tags:
+                tag_key = f"{prefix}{TAG_KEY_PREFIX}{tag}"
+                pipe.smembers(tag_key)
+                pipe.delete(tag_key)
+            results = pipe.execute()
+            for tag_members in results[::2]:
+                members.update(
+                    m.decode() if isinstance(m, bytes) else m for m in tag_members
+                )
+        else:
+            with _local_tags_lock:
+                for tag in tags:
+                    members.update(_local_tags.pop(tag, set()))
+        
+        if members:
+            cache.delete_many(*members)
+        for key in members:
+            local_cache.delete(key)
+        # Other workers hold their own L1 copies of these keys
+        invalidation_bus.publish(keys=members, tags=tags)
+        
+        logger.info(f"Invalidated {len(members)} cache entries for tags: {', '.join(tags)}")
+        return len(members)
+    
     @staticmethod
     def invalidate_pattern(pattern: str, cascade: bool = True):
-        """Advanced cache invalidation with pattern matching"""
+        """Invalidate everything tagged with pattern (kept for existing callers)"""
         try:
             # Track invalidation for analytics
             invalidation_key = f"invalidation:{pattern}:{datetime.now().isoformat()}"
             cache.set(invalidation_key, {'pattern': pattern, 'cascade': cascade}, timeout=3600)
             
-            # For Redis backend, use SCAN and DEL
-            if hasattr(cache.cache, '_write_client'):
-                redis_client = cache.cache._write_client
-                keys = redis_client.scan_iter(match=f"*{pattern}*")
-                if keys:
-                    redis_client.delete(*keys)
-                    logger.info(f"Invalidated cache pattern: {pattern}")
-            else:
-                # Fallback for simple cache - increment version
-                version_key = f"version:{pattern}"
-                current_version = cache.get(version_key) or 0
-                cache.set(version_key, current_version + 1, timeout=86400)
-                logger.info(f"Invalidated cache pattern via versioning: {pattern}")
-                
+            AdvancedCacheService.invalidate_tags(pattern)
         except Exception as e:
             logger.error(f"Cache invalidation failed for pattern {pattern}: {str(e)}")
     
     @staticmethod
     def get_available_historical_records_cached(page: int = 1, per_page: int = 8, 
                                               filters: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Get available historical records with advanced caching"""
+        """Get available historical records, assembled from a cached ID list and per-item entries"""
         filters = filters or {}
-        cache_key = AdvancedCacheService.get_cache_key(
-            "historical_records", "available", page, per_page, **filters
+        ids_key = AdvancedCacheService.get_cache_key(
+            "historical_records", "ids", page, per_page, **filters
         )
         
-        result = cache.get(cache_key)
-        if result is not None:
-            return result
-        
-        # Cache miss - query database
-        from sqlalchemy.orm import joinedload
-        from app.db.db import db
-        
-        query = HistoricalRecord.query\
-            .filter_by(adopted=False)\
-            .options(joinedload(HistoricalRecord.donors))\
+        # A purchase invalidates item:<id>; the sold record drops out via keep
+        # and the page's ID list is rebuilt
+        return AdvancedCacheService.get_page_assembled(
+            ids_key,
+            lambda: AdvancedCacheService._query_available_historical_record_ids(page, per_page),
+            item_key=lambda item_id: f"{LISTING_KEY_PREFIX}:{SCOPE_HISTORICAL_RECORDS}:{item_id}",
+            load_items=AdvancedCacheService._load_historical_record_payloads,
+            timeout=300,  # 5 minutes
+            item_timeout=3600,
+            ids_tags=['historical_records', 'historical_records:ids'],
+            item_tags=lambda item_id: [f"item:{item_id}"],
+            keep=lambda item: not item['adopted'],
+            total=lambda: counter_service.get_count(SCOPE_HISTORICAL_RECORDS, 'available')
+        )
+    
+    @staticmethod
+    def _query_available_historical_record_ids(page: int, per_page: int) -> Dict[str, Any]:
+        """Cache miss - one page of ids; payloads are loaded separately"""
+        query = db.session.query(HistoricalRecord.id)\
+            .filter(HistoricalRecord.adopted == False)\
             .order_by(HistoricalRecord.created_at.desc())
         
-        pagination = query.paginate(
+        # Total from the maintained counter; no SELECT count(*)
+        pagination = counted_paginate(
+            query,
             page=page,
             per_page=per_page,
-            error_out=False,
-            max_per_page=50
+            total=counter_service.get_count(SCOPE_HISTORICAL_RECORDS, 'available')
         )
-        
-        # Convert to serializable format
-        result = {
-            'items': [
-                {
-                    'id': str(item.id),
-                    'name': item.name,
-                    'fee': float(item.fee),
-                    'description': item.description,
-                    'imgurl': item.imgurl,
-                    'adopted': item.adopted
-                } for item in pagination.items
-            ],
-            'page': pagination.page,
-            'pages': pagination.pages,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
+        return AdvancedCacheService._page_ids(pagination, [str(row.id) for row in pagination.items])
+    
+    @staticmethod
+    def _load_historical_record_payloads(ids: List[str]) -> Dict[str, Any]:
+        """Serializable listing entries for the given record ids, one IN query"""
+        records = HistoricalRecord.query.filter(HistoricalRecord.id.in_(ids)).all()
+        return {
+            str(item.id): {
+                'id': str(item.id),
+                'name': item.name,
+                'fee': float(item.fee),
+                'description': item.description,
+                'imgurl': item.imgurl,
+                'adopted': item.adopted
+            } for item in records
         }
-        
-        # Cache for 5 minutes
-        cache.set(cache_key, result, timeout=300)
-        return result
     
     @staticmethod
     def get_available_bonds_cached(page: int = 1, per_page: int = 9,
                                  filters: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Get available bonds with advanced caching"""
+        """Get available bonds, assembled from a cached ID list and per-item entries"""
         filters = filters or {}
-        cache_key = AdvancedCacheService.get_cache_key(
-            "bonds", "available", page, per_page, **filters
+        ids_key = AdvancedCacheService.get_cache_key(
+            "bonds", "ids", page, per_page, **filters
         )
         
-        result = cache.get(cache_key)
-        if result is not None:
-            return result
-        
-        # Cache miss - query database
-        from app.db.db import db
-        
-        pagination = Bond.query\
-            .filter_by(status='available')\
-            .order_by(Bond.issue_date.desc(), Bond.bond_id)\
-            .paginate(
-                page=page,
-                per_page=per_page,
-                error_out=False,
-                max_per_page=50
-            )
+        return AdvancedCacheService.get_page_assembled(
+            ids_key,
+            lambda: AdvancedCacheService._query_available_bond_ids(page, per_page),
+            item_key=lambda bond_id: f"{LISTING_KEY_PREFIX}:{SCOPE_BONDS}:{bond_id}",
+            load_items=AdvancedCacheService._load_bond_payloads,
+            timeout=600,  # 10 minutes
+            item_timeout=3600,
+            ids_tags=['bonds', 'bonds:ids'],
+            item_tags=lambda bond_id: [f"item:{bond_id}"],
+            keep=lambda item: item['status'] == 'available',
+            total=lambda: counter_service.get_count(SCOPE_BONDS, 'available')
+        )
+    
+    @staticmethod
+    def _query_available_bond_ids(page: int, per_page: int) -> Dict[str, Any]:
+        """Cache miss - one page of ids; payloads are loaded separately"""
+        query = db.session.query(Bond.bond_id)\
+            .filter(Bond.status == 'available')\
+            .order_by(Bond.issue_date.desc(), Bond.bond_id)
         
-        # Convert to serializable format
-        result = {
-            'items': [
-                {
-                    'bond_id': item.bond_id,
-                    'retail_price': float(item.retail_price) if item.retail_price else None,
-                    'par_value': item.par_value,
-                    'issue_date': item.issue_date.isoformat() if item.issue_date else None,
-                    'due_date': item.due_date.isoformat() if item.due_date else None,
-                    'mayor': item.mayor,
-                    'status': item.status,
-                    'type': item.type,
-                    'front_image': item.front_image,
-                    'back_image': item.back_image
-                } for item in pagination.items
-            ],
+        # Total from the maintained counter; no SELECT count(*)
+        pagination = counted_paginate(
+            query,
+            page=page,
+            per_page=per_page,
+            total=counter_service.get_count(SCOPE_BONDS, 'available')
+        )
+        return AdvancedCacheService._page_ids(pagination, [row.bond_id for row in pagination.items])
+    
+    @staticmethod
+    def _load_bond_payloads(ids: List[str]) -> Dict[str, Any]:
+        """Serializable listing entries for the given bond ids, one IN query"""
+        bonds = Bond.query.filter(Bond.bond_id.in_(ids)).all()
+        return {
+            item.bond_id: {
+                'bond_id': item.bond_id,
+                'retail_price': float(item.retail_price) if item.retail_price else None,
+                'par_value': item.par_value,
+                'issue_date': item.issue_date.isoformat() if item.issue_date else None,
+                'due_date': item.due_date.isoformat() if item.due_date else None,
+                'mayor': item.mayor,
+                'status': item.status,
+                'type': item.type,
+                'front_image': item.front_image,
+                'back_image': item.back_image
+            } for item in bonds
+        }
+    
+    @staticmethod
+    def _page_ids(pagination, ids: List[str]) -> Dict[str, Any]:
+        """ID-list entry for get_page_assembled"""
+        return {
+            'ids': ids,
             'page': pagination.page,
             'pages': pagination.pages,
             'per_page': pagination.per_page,
@@ -232,28 +743,51 @@ class AdvancedCacheService:
             'has_next': pagination.has_next,
             'has_prev': pagination.has_prev
         }
+    
+    @staticmethod
+    def get_bond_facets_cached(status: str = 'available',
+                               filters: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Get bond facet counts, cached next to the bond listings they describe"""
+        filters = filters or {}
+        # Shares the "bonds:<status>" prefix so listing invalidation also clears facets
+        cache_key = AdvancedCacheService.get_cache_key(
+            "bonds", status, "facets", **filters
+        )
         
-        # Cache for 10 minutes
-        cache.set(cache_key, result, timeout=600)
-        return result
+        # Cache miss - one grouped query for every facet
+        from app.db.optimized_queries import optimized_queries
+        
+        return AdvancedCacheService.get_or_compute(
+            cache_key,
+            lambda: optimized_queries.get_bond_facets(status=status, **filters),
+            timeout=600,  # 10 minutes, like the listings
+            tags=['bonds', f'bonds:{status}']
+        )
     
     @staticmethod
     def invalidate_item_caches(item_id: str, item_type: str = None):
         """Invalidate caches related to a specific item"""
+        AdvancedCacheService.invalidate_items_caches([item_id])
+    
+    @staticmethod
+    def invalidate_items_caches(item_ids: Iterable[Any]):
+        """Invalidate caches related to several items in one round of tag bumps"""
+        item_ids = [str(item_id) for item_id in item_ids]
+        if not item_ids:
+            return
         try:
             # Invalidate relevant cache patterns
             patterns = [
                 "historical_records:available",
                 "bonds:available",
-                f"item:{item_id}"
+                *(f"item:{item_id}" for item_id in item_ids)
             ]
             
-            for pattern in patterns:
-                CacheService.invalidate_pattern(pattern)
+            AdvancedCacheService.invalidate_tags(*patterns)
                 
-            logger.info(f"Cache invalidated for item {item_id}")
+            logger.info(f"Cache invalidated for items {', '.join(item_ids)}")
         except Exception as e:
-            logger.error(f"Failed to invalidate cache for item {item_id}: {str(e)}")
+            logger.error(f"Failed to invalidate cache for items {', '.join(item_ids)}: {str(e)}")
     
     @staticmethod
     def warm_cache():
@@ -275,21 +809,9 @@ class AdvancedCacheService:
             logger.error(f"Cache warm-up failed: {str(e)}")
     
     @staticmethod
-    def warm_popular_queries():
-        """Warm up cache with popular query patterns"""
-        popular_patterns = [
-            ('bonds', {'status': 'available', 'page': 1}),
-            ('historical_records', {'adopted': False, 'page': 1}),
-            ('dashboard_stats', {}),
-        ]
-        
-        for pattern, params in popular_patterns:
-            try:
-                cache_key = AdvancedCacheService.get_cache_key(pattern, **params)
-                # This would trigger the actual query if not cached
-                logger.debug(f"Warmed cache for pattern: {pattern}")
-            except Exception as e:
-                logger.warning(f"Failed to warm cache for {pattern}: {str(e)}")
+    def warm_popular_queries() -> Dict[str, Any]:
+        """Re-request the most visited listing, filter and item pages in the access window"""
+        return cache_warmer.warm(current_app._get_current_object())
     
     @staticmethod
     def get_cache_statistics() -> Dict[str, Any]:
@@ -298,17 +820,35 @@ class AdvancedCacheService:
             stats = {
                 'cache_type': current_app.config.get('CACHE_TYPE', 'unknown'),
                 'default_timeout': current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300),
-                'hit_rate': 'N/A',  # Would need Redis INFO or similar
+                'hit_rate': 'N/A',  # Filled from the per-prefix counters below
                 'memory_usage': 'N/A',
                 'key_count': 'N/A'
             }
             
+            tier_stats = cache_metrics.totals()
+            lookups = tier_stats['l1_hits'] + tier_stats['l2_hits'] + tier_stats['misses']
+            if lookups:
+                # Application-level hit rate; Redis INFO below is server-wide
+                stats['hit_rate'] = f"{(tier_stats['l1_hits'] + tier_stats['l2_hits']) / lookups * 100:.2f}%"
+            stats['tiers'] = {
+                **tier_stats,
+                'l1_hit_rate': f"{tier_stats['l1_hits'] / max(lookups, 1) * 100:.2f}%",
+                'l2_hit_rate': f"{tier_stats['l2_hits'] / max(lookups, 1) * 100:.2f}%",
+                'l1': local_cache.stats()
+            }
+            stats['single_flight'] = single_flight.stats()
+            stats['warmer'] = cache_warmer.stats()
+            stats['prefixes'] = cache_metrics.snapshot()
+            stats['codec'] = cache_codec.stats()
+            stats['invalidation_bus'] = invalidation_bus.stats()
+            stats['catalog_filter'] = catalog_filter.stats()
+            
             # For Redis backend, get detailed stats
             if hasattr(cache.cache, '_write_client'):
                 redis_client = cache.cache._write_client
                 info = redis_client.info()
                 stats.update({
-                    'hit_rate': f"{info.get('keyspace_hits', 0) / max(info.get('keyspace_hits', 0) + info.get('keyspace_misses', 1), 1) * 100:.2f}%",
+                    'server_hit_rate': f"{info.get('keyspace_hits', 0) / max(info.get('keyspace_hits', 0) + info.get('keyspace_misses', 1), 1) * 100:.2f}%",
                     'memory_usage': f"{info.get('used_memory_human', 'N/A')}",
                     'key_count': info.get('db0', {}).get('keys', 0) if 'db0' in info else 0
                 })
@@ -319,38 +859,11 @@ class AdvancedCacheService:
             return {'error': str(e)}
     
     @staticmethod
-    def cache_middleware():
-        """Flask middleware for intelligent caching"""
-        def middleware(f):
-            @wraps(f)
-            def decorated_function(*args, **kwargs):
-                # Skip caching for certain conditions
-                if request.method != 'GET' or request.args.get('no_cache'):
-                    return f(*args, **kwargs)
-                
-                # Generate request-based cache key
-                cache_key = AdvancedCacheService.get_cache_key(
-                    'request',
-                    request.endpoint,
-                    request.path,
-                    **request.args.to_dict()
-                )
-                
-                # Try cache first
-                cached_response = AdvancedCacheService.get_with_fallback(cache_key)
-                if cached_response:
-                    return cached_response
-                
-                # Execute and cache response
-                response = f(*args, **kwargs)
-                
-                # Cache successful responses
-                if hasattr(response, 'status_code') and response.status_code == 200:
-                    cache.set(cache_key, response, timeout=300)
-                
-                return response
-            return decorated_function
-        return middleware
+    def cache_middleware(timeout: int = 300, query_params: Optional[List[str]] = None,
+                         tags=None):
+        """Full-response cache: status, headers and body bytes (see response_cache)"""
+        from app.services.response_cache import cached_response
+        return cached_response(timeout=timeout, query_params=query_params, tags=tags)
 
 
 # Compatibility layer for existing code
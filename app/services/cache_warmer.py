@@ -0,0 +1,252 @@
+# app/services/cache_warmer.py
+
+"""
+Access-frequency-driven cache warmer
+Counts which catalog pages, filter combinations and item pages are requested
+in a rolling window and periodically re-requests the top-K in a background
+thread, so the caches behind them are filled before users ask
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from app import cache
+
+logger = logging.getLogger(__name__)
+
+# WSGI environ key set on the warmer's own test-client requests. Servers only
+# map client headers to HTTP_* keys, so no outside request can carry it.
+WARM_REQUEST_ENVIRON = 'nyas.cache_warm'
+
+
+def is_warm_request() -> bool:
+    """Whether the current request is one of the warmer's re-requests"""
+    from flask import request
+    return bool(request.environ.get(WARM_REQUEST_ENVIRON))
+
+# Endpoints worth warming: listings (with their filters) and item details
+TRACKED_ENDPOINTS = frozenset({
+    'main.new_yorks_past',
+    'main.new_yorks_past_view_item',
+    'main.get_bonds',
+    'main.view_bond_details',
+    'main.optimized_new_yorks_past',
+    'main.optimized_get_bonds',
+})
+
+# Granularity of the rolling window
+BUCKET_SECONDS = 60
+# Distinct paths kept per bucket; a crawler walking random filters can't grow it past this
+MAX_KEYS_PER_BUCKET = 5000
+
+
+class CacheWarmer:
+    """
+    Rolling access counts plus a periodic warm-up loop
+
+    Accesses are counted in process-local minute buckets. When the backend is
+    Redis, each cycle flushes the new counts into shared sorted sets so the
+    ranking covers every worker, and a short Redis lease lets only one worker
+    warm per cycle.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.interval = 300
+        self.top_k = 50
+        self.time_budget = 10.0
+        self.window = 3600
+        self.max_pool_usage = 0.5
+        self._buckets: Dict[int, Counter] = {}
+        self._pending: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._app = None
+        self._last_run: Dict[str, Any] = {}
+
+    def init_app(self, app) -> None:
+        """Read warmer settings and start counting accesses"""
+        self._app = app
+        self.enabled = app.config.get('CACHE_WARMER_ENABLED', False)
+        self.interval = app.config.get('CACHE_WARMER_INTERVAL', 300)
+        self.top_k = app.config.get('CACHE_WARMER_TOP_K', 50)
+        self.time_budget = app.config.get('CACHE_WARMER_TIME_BUDGET', 10.0)
+        self.window = app.config.get('CACHE_WARMER_WINDOW', 3600)
+        self.max_pool_usage = app.config.get('CACHE_WARMER_MAX_POOL_USAGE', 0.5)
+
+        @app.after_request
+        def record_access(response):
+            from flask import request
+
+            if (request.method == 'GET' and response.status_code in (200, 304)
+                    and request.endpoint in TRACKED_ENDPOINTS
+                    and not is_warm_request()):
+                self.record(request.full_path)
+                self.ensure_started()
+            return response
+
+    def record(self, path: str) -> None:
+        """Count one access to a path (including its query string)"""
+        bucket = int(time.time() // BUCKET_SECONDS)
+        with self._lock:
+            for store in (self._buckets, self._pending):
+                counts = store.setdefault(bucket, Counter())
+                if path in counts or len(counts) < MAX_KEYS_PER_BUCKET:
+                    counts[path] += 1
+            self._prune(bucket)
+
+    def _prune(self, current_bucket: int) -> None:
+        """Drop buckets that left the window; lock must be held"""
+        oldest = current_bucket - self.window // BUCKET_SECONDS
+        for store in (self._buckets, self._pending):
+            for bucket in [b for b in store if b < oldest]:
+                del store[bucket]
+
+    def _redis_client(self):
+        return getattr(cache.cache, '_write_client', None)
+
+    def _redis_key(self, name: str) -> str:
+        return f"{getattr(cache.cache, 'key_prefix', '')}warm:{name}"
+
+    def top_paths(self, limit: Optional[int] = None) -> List[str]:
+        """Most requested paths in the window, most popular first"""
+        limit = limit or self.top_k
+        current_bucket = int(time.time() // BUCKET_SECONDS)
+        with self._lock:
+            self._prune(current_bucket)
+            pending, self._pending = self._pending, {}
+            local = Counter()
+            for counts in self._buckets.values():
+                local.update(counts)
+
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return [path for path, _ in local.most_common(limit)]
+
+        try:
+            # Share this worker's new counts, then rank over every worker's
+            bucket_ttl = self.window + BUCKET_SECONDS
+            pipe = redis_client.pipeline(transaction=False)
+            for bucket, counts in pending.items():
+                bucket_key = self._redis_key(f"access:{bucket}")
+                for path, count in counts.items():
+                    pipe.zincrby(bucket_key, count, path)
+                pipe.expire(bucket_key, bucket_ttl)
+            pipe.execute()
+
+            oldest = current_bucket - self.window // BUCKET_SECONDS
+            bucket_keys = [self._redis_key(f"access:{b}") for b in range(oldest, current_bucket + 1)]
+            union_key = self._redis_key(f"top:{os.getpid()}")
+            redis_client.zunionstore(union_key, bucket_keys)
+            paths = redis_client.zrevrange(union_key, 0, limit - 1)
+            redis_client.delete(union_key)
+            return [p.decode() if isinstance(p, bytes) else p for p in paths]
+        except Exception as e:
+            logger.warning(f"Shared access ranking unavailable, using local counts: {str(e)}")
+            return [path for path, _ in local.most_common(limit)]
+
+    def _pool_busy(self) -> bool:
+        """Whether live traffic is already using a large share of the DB pool"""
+        try:
+            from app.db.db import db
+            pool = db.engine.pool
+            return pool.checkedout() >= max(int(pool.size() * self.max_pool_usage), 1)
+        except Exception:
+            return False
+
+    def warm(self, app=None) -> Dict[str, Any]:
+        """
+        Re-request the top-K paths until done or the time budget runs out
+
+        Requests go through the full WSGI stack marked as warm-ups, so
+        whichever caches sit behind a page (data, fragments, responses) are
+        filled exactly as a real visit would fill them. Warming stops early
+        whenever the DB pool is busy with live traffic.
+        """
+        app = app or self._app
+        started = time.monotonic()
+        summary = {'warmed': 0, 'failed': 0, 'skipped': 0, 'stopped': None}
+
+        paths = self.top_paths()
+        with app.test_client() as client:
+            for path in paths:
+                if time.monotonic() - started >= self.time_budget:
+                    summary['stopped'] = 'time_budget'
+                    break
+                if self._pool_busy():
+                    summary['stopped'] = 'db_pool_busy'
+                    break
+                try:
+                    response = client.get(path, environ_base={WARM_REQUEST_ENVIRON: True})
+                    if response.status_code == 200:
+                        summary['warmed'] += 1
+                    else:
+                        summary['skipped'] += 1
+                except Exception as e:
+                    summary['failed'] += 1
+                    logger.warning(f"Cache warm-up failed for {path}: {str(e)}")
+
+        summary['candidates'] = len(paths)
+        summary['duration'] = round(time.monotonic() - started, 3)
+        summary['finished_at'] = time.time()
+        self._last_run = summary
+        logger.info(f"Cache warmer refreshed {summary['warmed']} of {len(paths)} popular paths")
+        return summary
+
+    def _acquire_lease(self) -> bool:
+        """Only one worker warms per interval when workers share Redis"""
+        redis_client = self._redis_client()
+        if redis_client is None:
+            return True
+        try:
+            return bool(redis_client.set(self._redis_key('leader'), os.getpid(),
+                                         nx=True, ex=max(int(self.interval) - 1, 1)))
+        except Exception:
+            return True
+
+    def ensure_started(self) -> None:
+        """Start the warm-up thread in this process if it isn't running"""
+        if not self.enabled or self._app is None:
+            return
+        # Threads don't survive a fork, so pre-forked workers each start their own
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._thread_pid = pid
+            self._thread = threading.Thread(target=self._run, name='cache-warmer', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                with self._app.app_context():
+                    if self._acquire_lease():
+                        self.warm()
+            except Exception as e:
+                logger.error(f"Cache warmer cycle failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tracked = len(set().union(*self._buckets.values())) if self._buckets else 0
+        return {
+            'enabled': self.enabled,
+            'running': bool(self._thread and self._thread.is_alive()),
+            'tracked_paths': tracked,
+            'interval': self.interval,
+            'top_k': self.top_k,
+            'time_budget': self.time_budget,
+            'last_run': self._last_run
+        }
+
+
+# Process-wide warmer
+cache_warmer = CacheWarmer()
@@ -0,0 +1,158 @@
+# app/services/catalog_filter.py
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.db.db import db
+from app.db.models import HistoricalRecord, Bond
+from app.services.counter_service import counter_service, SCOPE_HISTORICAL_RECORDS, SCOPE_BONDS
+from app.services.invalidation_bus import invalidation_bus
+from app.utils.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+_SCOPE_ID_COLUMNS = {
+    SCOPE_HISTORICAL_RECORDS: HistoricalRecord.id,
+    SCOPE_BONDS: Bond.bond_id,
+}
+
+
+def normalize_item_id(scope: str, item_id: Any) -> str:
+    """Canonical form used both when building and when probing the filter"""
+    value = str(item_id).strip()
+    return value.lower() if scope == SCOPE_HISTORICAL_RECORDS else value
+
+
+class _ScopeFilter:
+    __slots__ = ('bloom', 'version', 'checked_at', 'built_at', 'lookups', 'rejected', 'false_positives')
+
+    def __init__(self):
+        self.bloom: Optional[BloomFilter] = None
+        self.version = None
+        self.checked_at = 0.0
+        self.built_at = None
+        self.lookups = 0
+        self.rejected = 0
+        self.false_positives = 0
+
+
+class CatalogFilterService:
+    """
+    Per-process Bloom filters over every valid bond_id and record UUID
+
+    A probe that misses the filter is a definite 404 and never reaches
+    Postgres. The filter is rebuilt when the catalog version (max updated_at
+    plus maintained counts) moves; that version is checked at most once per
+    max_age seconds, which also bounds how long a newly inserted item can be
+    reported missing. Invalidations touching a scope's listings, in this
+    worker or (over the invalidation bus) another one, move the next check
+    forward to the next probe.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.fp_rate = 0.01
+        self.max_age = 60
+        self._filters = {scope: _ScopeFilter() for scope in _SCOPE_ID_COLUMNS}
+        self._locks = {scope: threading.Lock() for scope in _SCOPE_ID_COLUMNS}
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get('CATALOG_FILTER_ENABLED', True)
+        self.fp_rate = app.config.get('CATALOG_FILTER_FP_RATE', 0.01)
+        self.max_age = app.config.get('CATALOG_FILTER_MAX_AGE', 60)
+        invalidation_bus.register_handler(self.on_invalidation)
+
+    def on_invalidation(self, keys: List[str], tags: List[str]) -> None:
+        """Invalidation bus handler: recheck the version of every scope whose listings changed"""
+        for scope, state in self._filters.items():
+            if any(tag == scope or tag.startswith(f"{scope}:") for tag in tags):
+                state.checked_at = 0.0
+
+    def might_exist(self, scope: str, item_id: Any) -> bool:
+        """False only when the item definitely doesn't exist"""
+        if not self.enabled:
+            return True
+
+        state = self._filters[scope]
+        self._ensure_fresh(scope)
+        bloom = state.bloom
+        if bloom is None:
+            # No filter yet (or the build failed); let the database answer
+            return True
+
+        state.lookups += 1
+        if normalize_item_id(scope, item_id) in bloom:
+            return True
+        state.rejected += 1
+        return False
+
+    def record_false_positive(self, scope: str) -> None:
+        """The filter said maybe, the database said no"""
+        if self._filters[scope].bloom is not None:
+            self._filters[scope].false_positives += 1
+
+    def _ensure_fresh(self, scope: str) -> None:
+        state = self._filters[scope]
+        if time.monotonic() - state.checked_at < self.max_age:
+            return
+
+        lock = self._locks[scope]
+        # One request per process rechecks; the rest keep using the current filter
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - state.checked_at < self.max_age:
+                return
+            version = counter_service.catalog_version(scope)
+            if state.bloom is None or version != state.version:
+                self._rebuild(scope, version)
+            state.checked_at = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Catalog filter refresh failed for {scope}: {str(e)}")
+            state.checked_at = time.monotonic()
+        finally:
+            lock.release()
+
+    def _rebuild(self, scope: str, version) -> None:
+        column = _SCOPE_ID_COLUMNS[scope]
+        ids = [normalize_item_id(scope, row[0]) for row in db.session.query(column).yield_per(5000)]
+
+        # Headroom so items added before the next rebuild don't degrade the rate
+        bloom = BloomFilter(capacity=max(int(len(ids) * 1.25), 1000), fp_rate=self.fp_rate)
+        bloom.update(ids)
+
+        state = self._filters[scope]
+        state.bloom = bloom
+        state.version = version
+        state.built_at = time.time()
+        logger.info(f"Rebuilt {scope} catalog filter: {len(ids)} ids, {bloom.size_bytes} bytes")
+
+    def stats(self) -> Dict[str, Any]:
+        report = {'enabled': self.enabled, 'max_age': self.max_age}
+        for scope, state in self._filters.items():
+            bloom = state.bloom
+            passed = state.lookups - state.rejected
+            report[scope] = {
+                'items': bloom.count if bloom else 0,
+                'memory_bytes': bloom.size_bytes if bloom else 0,
+                'hashes': bloom.num_hashes if bloom else None,
+                'target_fp_rate': self.fp_rate,
+                'expected_fp_rate': round(bloom.expected_fp_rate(), 6) if bloom else None,
+                'lookups': state.lookups,
+                'rejected': state.rejected,
+                'false_positives': state.false_positives,
+                # Share of probes for missing ids that still reached the database
+                'observed_fp_rate': (
+                    round(state.false_positives / (state.false_positives + state.rejected), 6)
+                    if state.false_positives + state.rejected else None
+                ),
+                'passed': passed,
+                'built_at': state.built_at
+            }
+        return report
+
+
+# Global service instance
+catalog_filter = CatalogFilterService()
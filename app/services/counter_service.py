@@ -0,0 +1,147 @@
+# app/services/counter_service.py
+
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Tuple
+
+from sqlalchemy import func, text
+
+from app.db.db import db
+from app.db.models import CatalogCounter, HistoricalRecord, Bond
+
+logger = logging.getLogger(__name__)
+
+SCOPE_HISTORICAL_RECORDS = 'historical_records'
+SCOPE_BONDS = 'bonds'
+
+_SCOPE_MODELS = {
+    SCOPE_HISTORICAL_RECORDS: HistoricalRecord,
+    SCOPE_BONDS: Bond,
+}
+
+
+def historical_record_status(adopted: bool) -> str:
+    """Counter status for a historical record's adopted flag"""
+    return 'adopted' if adopted else 'available'
+
+
+class CounterService:
+    """
+    Maintains per-status catalog counts
+
+    Counters are adjusted inside the caller's transaction whenever an item
+    changes status, so pagination can read a handful of rows instead of
+    running COUNT(*) over the catalog on every request.
+    """
+
+    @staticmethod
+    def adjust(scope: str, status: str, delta: int, item_type: Optional[str] = None) -> None:
+        """Add delta to a counter row (upsert); does not commit"""
+        if not delta:
+            return
+
+        db.session.execute(
+            text("""
+                INSERT INTO catalog_counters (scope, status, item_type, count, version, updated_at)
+                VALUES (:scope, :status, :item_type, :delta, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT (scope, status, item_type)
+                DO UPDATE SET count = catalog_counters.count + EXCLUDED.count,
+                              version = catalog_counters.version + 1,
+                              updated_at = CURRENT_TIMESTAMP
+            """),
+            {'scope': scope, 'status': status, 'item_type': item_type or '', 'delta': delta}
+        )
+
+    @staticmethod
+    def record_transition(scope: str, old_status: str, new_status: str,
+                          item_type: Optional[str] = None, amount: int = 1) -> None:
+        """Move amount items from old_status to new_status; does not commit"""
+        if old_status == new_status or not amount:
+            return
+        CounterService.adjust(scope, old_status, -amount, item_type)
+        CounterService.adjust(scope, new_status, amount, item_type)
+
+    @staticmethod
+    def get_count(scope: str, status: str, item_type: Optional[str] = None) -> int:
+        """Read a maintained count; item_type=None sums over all types"""
+        query = db.session.query(func.coalesce(func.sum(CatalogCounter.count), 0))\
+            .filter(CatalogCounter.scope == scope, CatalogCounter.status == status)
+
+        if item_type is not None:
+            query = query.filter(CatalogCounter.item_type == item_type)
+
+        return max(int(query.scalar() or 0), 0)
+
+    @staticmethod
+    def catalog_version(scope: str) -> Tuple[Optional[datetime], Tuple]:
+        """
+        Cheap change marker for a catalog: (last modification, validator)
+
+        The validator is the sum of the scope's counter versions plus every
+        per-status count. Each adjustment increments its row's version under
+        the row lock and rows are never deleted, so the sum grows with every
+        committed status change whatever order captures commit in; a
+        purchase also moves counts between statuses even though their total
+        stays the same. max(updated_at) is a single probe of the updated_at
+        index and only supplies Last-Modified (edits and inserts made
+        outside the counters); as a transaction start time it can't order
+        concurrent commits on its own.
+        """
+        model = _SCOPE_MODELS[scope]
+        last_modified = db.session.query(func.max(model.updated_at)).scalar()
+        rows = db.session.query(
+            CatalogCounter.status, CatalogCounter.item_type, CatalogCounter.count, CatalogCounter.version
+        ).filter(CatalogCounter.scope == scope).all()
+
+        counts = tuple(sorted((status, item_type, int(count)) for status, item_type, count, _ in rows))
+        return last_modified, (sum(int(version) for *_, version in rows), counts)
+
+    @staticmethod
+    def catalog_validator(scope: str) -> Tuple[None, Tuple]:
+        """
+        catalog_version for conditional_get, validated by ETag only
+
+        The timestamp goes into the validator instead of Last-Modified, so a
+        client sending only If-Modified-Since always gets the full page.
+        """
+        return None, CounterService.catalog_version(scope)
+
+    @staticmethod
+    def rebuild() -> Dict[str, int]:
+        """
+        Recompute all counters from the catalog tables
+
+        Used for the initial backfill and to reconcile drift from rows that
+        are inserted or deleted outside the application.
+        """
+        historical_counts = db.session.query(
+            HistoricalRecord.adopted, func.count(HistoricalRecord.id)
+        ).group_by(HistoricalRecord.adopted).all()
+
+        bond_counts = db.session.query(
+            Bond.status, Bond.type, func.count(Bond.bond_id)
+        ).group_by(Bond.status, Bond.type).all()
+
+        # Zero rather than delete, so each row's version keeps growing
+        db.session.query(CatalogCounter).update(
+            {CatalogCounter.count: 0, CatalogCounter.version: CatalogCounter.version + 1},
+            synchronize_session=False
+        )
+
+        rows = [
+            (SCOPE_HISTORICAL_RECORDS, historical_record_status(adopted), '', count)
+            for adopted, count in historical_counts
+        ]
+        rows.extend((SCOPE_BONDS, status, bond_type or '', count) for status, bond_type, count in bond_counts)
+
+        for scope, status, item_type, count in rows:
+            CounterService.adjust(scope, status, count, item_type)
+        db.session.commit()
+
+        summary = {f"{scope}:{status}:{item_type}": count for scope, status, item_type, count in rows}
+        logger.info(f"Rebuilt {len(rows)} catalog counters")
+        return summary
+
+
+# Global service instance
+counter_service = CounterService()
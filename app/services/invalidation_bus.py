@@ -0,0 +1,244 @@
+# app/services/invalidation_bus.py
+
+"""
+Cross-worker invalidation bus
+Broadcasts cache key/tag invalidations so every worker drops its in-process
+(L1) copies instead of serving them until their TTL runs out
+"""
+
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app import cache
+from app.services.local_cache import local_cache
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_NAME = 'cache-invalidation'
+# Datagram size cap for the Unix-socket transport; larger key sets fall back to a clear
+MAX_DATAGRAM_BYTES = 60 * 1024
+
+Handler = Callable[[List[str], List[str]], None]
+
+
+class _RedisTransport:
+    """Redis PUBLISH/SUBSCRIBE on one channel shared by every worker"""
+
+    def __init__(self, redis_client, channel: str):
+        self.redis_client = redis_client
+        self.channel = channel
+
+    def publish(self, payload: bytes) -> None:
+        self.redis_client.publish(self.channel, payload)
+
+    def listen(self, deliver: Callable[[bytes], None]) -> None:
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        try:
+            for message in pubsub.listen():
+                if message and message.get('type') == 'message':
+                    deliver(message['data'])
+        finally:
+            pubsub.close()
+
+
+class _UnixSocketTransport:
+    """
+    Stand-in for hosts without Redis: one datagram socket per worker process
+    in a shared directory; publishing sends to every socket found there
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}.sock")
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def publish(self, payload: bytes) -> None:
+        for path in glob.glob(os.path.join(self.directory, '*.sock')):
+            if path == self.path:
+                continue
+            try:
+                self._sender.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker exited without cleaning up
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.warning(f"Invalidation send to {path} failed: {str(e)}")
+
+    def listen(self, deliver: Callable[[bytes], None]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(self.path)
+        try:
+            while True:
+                payload, _ = receiver.recvfrom(MAX_DATAGRAM_BYTES)
+                deliver(payload)
+        finally:
+            receiver.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class InvalidationBus:
+    """
+    Publishes invalidations and applies the ones other workers publish
+
+    Received keys are dropped from the L1 tier. Registered handlers get the
+    keys and tags of every invalidation, published here or received, so
+    other per-process memoization can follow along. Messages from this
+    process are ignored on receipt, since the publisher already applied them
+    locally.
+    """
+
+    def __init__(self):
+        self.mode = 'none'
+        self.socket_dir = '/tmp/nyas-cache-bus'
+        self._origin = uuid.uuid4().hex
+        self._origin_pid = os.getpid()
+        self._handlers: List[Handler] = []
+        self._transport = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._app = None
+        self._stats = {'published': 0, 'received': 0, 'publish_errors': 0}
+
+    def init_app(self, app) -> None:
+        """Pick a transport and start listening in each worker on its first request"""
+        self._app = app
+        mode = app.config.get('CACHE_INVALIDATION_BUS', 'auto')
+        self.socket_dir = app.config.get('CACHE_INVALIDATION_SOCKET_DIR', self.socket_dir)
+
+        with app.app_context():
+            is_redis = hasattr(cache.cache, '_write_client')
+        if mode == 'auto':
+            # Without Redis the L2 tier is per-process too, so there is nothing to keep coherent
+            mode = 'redis' if is_redis else 'none'
+        elif mode == 'redis' and not is_redis:
+            logger.warning("CACHE_INVALIDATION_BUS=redis but the cache backend is not Redis; bus disabled")
+            mode = 'none'
+        self.mode = mode
+
+        if self.mode != 'none':
+            app.before_request(self.ensure_started)
+
+    def register_handler(self, handler: Handler) -> None:
+        """Call handler(keys, tags) for every invalidation, local or from another worker"""
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    def _notify(self, keys: List[str], tags: List[str]) -> None:
+        for handler in self._handlers:
+            try:
+                handler(keys, tags)
+            except Exception as e:
+                logger.warning(f"Invalidation handler failed: {str(e)}")
+
+    def _get_transport(self):
+        # Origin and transport are per process; a forked worker must not reuse its parent's
+        if self._origin_pid != os.getpid():
+            self._origin = uuid.uuid4().hex
+            self._origin_pid = os.getpid()
+            self._transport = None
+        if self._transport is None:
+            if self.mode == 'redis':
+                with self._app.app_context():
+                    prefix = getattr(cache.cache, 'key_prefix', '')
+                    self._transport = _RedisTransport(cache.cache._write_client, f"{prefix}{CHANNEL_NAME}")
+            elif self.mode == 'unix':
+                self._transport = _UnixSocketTransport(self.socket_dir)
+        return self._transport
+
+    def publish(self, keys: Iterable[str] = (), tags: Iterable[str] = (), clear: bool = False) -> None:
+        """Broadcast an invalidation to the other workers"""
+        keys, tags = list(keys), list(tags)
+        self._notify(keys, tags)
+        if self.mode == 'none':
+            return
+        message = {'origin': self._origin, 'keys': keys, 'tags': tags, 'clear': clear}
+        payload = json.dumps(message, separators=(',', ':')).encode()
+        if self.mode == 'unix' and len(payload) > MAX_DATAGRAM_BYTES:
+            payload = json.dumps({**message, 'keys': [], 'clear': True}).encode()
+
+        try:
+            transport = self._get_transport()
+            self.ensure_started()
+            transport.publish(payload)
+            with self._lock:
+                self._stats['published'] += 1
+        except Exception as e:
+            with self._lock:
+                self._stats['publish_errors'] += 1
+            # L1 TTLs still bound the staleness if a broadcast is lost
+            logger.warning(f"Failed to publish cache invalidation: {str(e)}")
+
+    def _deliver(self, payload: Any) -> None:
+        try:
+            message = json.loads(payload)
+        except (TypeError, ValueError):
+            return
+        if message.get('origin') == self._origin:
+            return
+
+        keys, tags = message.get('keys') or [], message.get('tags') or []
+        if message.get('clear'):
+            local_cache.clear()
+        for key in keys:
+            local_cache.delete(key)
+        self._notify(keys, tags)
+        with self._lock:
+            self._stats['received'] += 1
+
+    def ensure_started(self) -> None:
+        """Start this process's listener thread if it isn't running"""
+        if self.mode == 'none':
+            return
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._thread_pid = pid
+            self._thread = threading.Thread(target=self._listen, name='cache-invalidation-bus', daemon=True)
+            self._thread.start()
+
+    def _listen(self) -> None:
+        backoff = 1
+        while True:
+            try:
+                transport = self._get_transport()
+                # Anything published while we were disconnected is lost; start clean
+                local_cache.clear()
+                backoff = 1
+                transport.listen(self._deliver)
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener stopped, retrying in {backoff}s: {str(e)}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['mode'] = self.mode
+        stats['listening'] = bool(self._thread and self._thread.is_alive())
+        stats['handlers'] = len(self._handlers)
+        return stats
+
+
+# Process-wide bus
+invalidation_bus = InvalidationBus()
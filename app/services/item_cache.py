@@ -0,0 +1,125 @@
+# app/services/item_cache.py
+
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy.orm import joinedload
+
+from app.db.models import HistoricalRecord, Bond, DonorItem
+from app.services.cache_service import AdvancedCacheService
+from app.services.catalog_filter import catalog_filter
+from app.services.counter_service import SCOPE_HISTORICAL_RECORDS, SCOPE_BONDS
+
+logger = logging.getLogger(__name__)
+
+ITEM_KEY_PREFIX = 'item'
+# Item pages change only through purchases and bulk updates, which invalidate explicitly
+ITEM_CACHE_TIMEOUT = 3600
+# Ids the Bloom filter let through but the database didn't have
+MISSING_KEY_PREFIX = 'missing'
+MISSING_CACHE_TIMEOUT = 60
+
+# Columns templates never read
+_SKIPPED_COLUMNS = {'search_vector'}
+
+
+def item_key(item_id: Any) -> str:
+    """Cache key (and invalidation tag) for a single catalog item"""
+    return f"{ITEM_KEY_PREFIX}:{item_id}"
+
+
+def _columns(instance) -> Dict[str, Any]:
+    """Plain column values of a mapped instance"""
+    return {
+        column.key: getattr(instance, column.key)
+        for column in instance.__table__.columns
+        if column.key not in _SKIPPED_COLUMNS
+    }
+
+
+class ItemCacheService:
+    """
+    Read-through cache for item detail pages
+
+    Entries are plain dicts rather than ORM instances, so they serialize
+    compactly and a hit needs no session or connection. Jinja resolves
+    ``bond.mayor`` against a dict key the same way it does an attribute, so
+    templates work unchanged.
+    """
+
+    @staticmethod
+    def get_bond(bond_id: str) -> Optional[Dict[str, Any]]:
+        """Bond snapshot by primary key, or None if it doesn't exist"""
+        return ItemCacheService._get(
+            SCOPE_BONDS, bond_id, lambda: ItemCacheService._load_bond(bond_id)
+        )
+    
+    @staticmethod
+    def get_historical_record(item_id: str) -> Optional[Dict[str, Any]]:
+        """Historical record snapshot with its donors, or None if it doesn't exist"""
+        return ItemCacheService._get(
+            SCOPE_HISTORICAL_RECORDS, item_id, lambda: ItemCacheService._load_historical_record(item_id)
+        )
+    
+    @staticmethod
+    def _get(scope: str, item_id: str, load) -> Optional[Dict[str, Any]]:
+        """Bloom filter, then negative cache, then read-through"""
+        # Definite misses (scrapers probing random ids) never reach Postgres
+        if not catalog_filter.might_exist(scope, item_id):
+            return None
+        
+        missing_key = f"{MISSING_KEY_PREFIX}:{item_key(item_id)}"
+        if AdvancedCacheService.cache_get(missing_key):
+            return None
+        
+        snapshot = AdvancedCacheService.get_or_compute(
+            item_key(item_id), load,
+            timeout=ITEM_CACHE_TIMEOUT,
+            tags=[item_key(item_id)]
+        )
+        if snapshot is None:
+            # Filter false positive; remember the miss briefly
+            catalog_filter.record_false_positive(scope)
+            AdvancedCacheService.cache_set(
+                missing_key, True, timeout=MISSING_CACHE_TIMEOUT, tags=[item_key(item_id)]
+            )
+        return snapshot
+    
+    @staticmethod
+    def _load_bond(bond_id: str) -> Optional[Dict[str, Any]]:
+        bond = Bond.query.filter_by(bond_id=bond_id).first()
+        return _columns(bond) if bond else None
+
+    @staticmethod
+    def _load_historical_record(item_id: str) -> Optional[Dict[str, Any]]:
+        item = HistoricalRecord.query\
+            .options(joinedload(HistoricalRecord.donors).joinedload(DonorItem.donor))\
+            .filter_by(id=item_id)\
+            .first()
+        if not item:
+            return None
+
+        snapshot = _columns(item)
+        snapshot['donors'] = [
+            {
+                'fee': donor_item.fee,
+                'donor': {'donor_name': donor_item.donor.donor_name} if donor_item.donor else None
+            }
+            for donor_item in item.donors
+        ]
+        return snapshot
+
+    @staticmethod
+    def invalidate(item_ids: Iterable[Any]) -> None:
+        """Drop cached snapshots (and fragments showing them) after a committed change"""
+        tags = {item_key(item_id) for item_id in item_ids}
+        if not tags:
+            return
+        try:
+            AdvancedCacheService.invalidate_tags(*tags)
+        except Exception as e:
+            logger.error(f"Failed to invalidate item caches: {str(e)}")
+
+
+# Global service instance
+item_cache = ItemCacheService()
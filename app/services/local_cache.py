@@ -0,0 +1,174 @@
+# app/services/local_cache.py
+
+"""
+In-process LRU cache used as the L1 tier in front of Flask-Caching
+Bounded by entry count and approximate byte size, with short per-entry TTLs
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Objects estimate_size visits before giving up on a value
+MAX_SIZE_WALK = 50000
+
+
+class LocalLRUCache:
+    """
+    Thread-safe, size-bounded LRU cache
+
+    Values are stored as live objects, so a hit costs a dict lookup rather
+    than a network round trip and unpickling. Callers must treat returned
+    values as read-only.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entries: int = 1024,
+                 default_ttl: float = 30.0):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.enabled = True
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def configure(self, max_bytes: Optional[int] = None, max_entries: Optional[int] = None,
+                  default_ttl: Optional[float] = None, enabled: Optional[bool] = None) -> None:
+        """Apply limits from application config"""
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if default_ttl is not None:
+                self.default_ttl = default_ttl
+            if enabled is not None:
+                self.enabled = enabled
+            self._evict()
+
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        """
+        Approximate memory cost of a value: sys.getsizeof over the object graph
+
+        Walks containers and instance __dict__s without serializing anything.
+        Graphs larger than MAX_SIZE_WALK objects are reported as unbounded
+        (sys.maxsize), so they are never admitted rather than slipping past
+        the byte limit.
+        """
+        size = 0
+        seen = set()
+        stack = [value]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            if len(seen) > MAX_SIZE_WALK:
+                return sys.maxsize
+            size += sys.getsizeof(obj, 0)
+
+            if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+                continue
+            if isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                stack.extend(obj)
+            elif hasattr(obj, '__dict__'):
+                # ORM instances: count the loaded attributes, not the mapper
+                # registry reachable through their instance state
+                attributes = vars(obj)
+                size += sys.getsizeof(attributes, 0)
+                stack.extend(v for k, v in attributes.items() if k != '_sa_instance_state')
+        return size
+
+    def get(self, key: str) -> Any:
+        """Return a live entry or None"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, size: Optional[int] = None) -> bool:
+        """Store a value; entries larger than a quarter of the budget are skipped"""
+        if not self.enabled or value is None:
+            return False
+
+        ttl = self.default_ttl if ttl is None else min(ttl, self.default_ttl)
+        if ttl <= 0:
+            return False
+
+        size = self.estimate_size(value) if size is None else size
+        if size > self.max_bytes // 4:
+            return False
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            self._evict()
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def delete_matching(self, predicate: Callable[[str], bool]) -> int:
+        """Drop every key for which predicate(key) is true"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'ttl': self.default_ttl,
+                'evictions': self._evictions,
+                'enabled': self.enabled
+            }
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until within limits; lock must be held"""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self._evictions += 1
+
+
+# Process-wide L1 instance
+local_cache = LocalLRUCache()
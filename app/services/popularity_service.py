@@ -0,0 +1,167 @@
+# app/services/popularity_service.py
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app import cache
+from app.db.db import db
+from app.db.models import ItemPopularity
+from app.services.cache_service import AdvancedCacheService
+
+logger = logging.getLogger(__name__)
+
+# smart_cache tag of /optimized/popular-items (its key_prefix)
+POPULAR_ITEMS_TAG = 'popular_items'
+# pg_try_advisory_xact_lock key, so only one worker reconciles at a time
+RECONCILE_LOCK_KEY = 0x706f70  # 'pop'
+RECONCILE_LEASE_KEY = 'popularity:reconcile_lease'
+
+
+class PopularityService:
+    """
+    Maintained purchase counts and revenue per catalog item
+
+    Captures add to their item's row inside their own transaction, so the
+    popular-items page is a top-N scan of the rank index instead of two
+    GROUP BY aggregates over the transaction history. A periodic full
+    reconciliation rebuilds the table from completed transactions to
+    correct drift from rows changed outside the application.
+    """
+
+    def __init__(self):
+        self.reconcile_interval = 3600
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Read settings and start the reconciliation loop in each worker on its first request"""
+        self._app = app
+        self.reconcile_interval = app.config.get('ITEM_POPULARITY_RECONCILE_INTERVAL', 3600)
+        if self.reconcile_interval:
+            app.before_request(self.ensure_started)
+
+    @staticmethod
+    def record_purchases(purchases: Iterable[Tuple[str, Any, Any]]) -> None:
+        """Add (item_type, item_id, fee) purchases to their rows (upsert); does not commit"""
+        totals: Dict[Tuple[str, str], List] = {}
+        for item_type, item_id, fee in purchases:
+            if item_id is None:
+                continue
+            entry = totals.setdefault((item_type, str(item_id)), [0, 0])
+            entry[0] += 1
+            entry[1] += fee or 0
+
+        if not totals:
+            return
+
+        db.session.execute(
+            text("""
+                INSERT INTO item_popularity (item_type, item_id, purchase_count, revenue, updated_at)
+                VALUES (:item_type, :item_id, :count, :revenue, CURRENT_TIMESTAMP)
+                ON CONFLICT (item_type, item_id)
+                DO UPDATE SET purchase_count = item_popularity.purchase_count + EXCLUDED.purchase_count,
+                              revenue = item_popularity.revenue + EXCLUDED.revenue,
+                              updated_at = CURRENT_TIMESTAMP
+            """),
+            [
+                {'item_type': item_type, 'item_id': item_id, 'count': count, 'revenue': revenue}
+                for (item_type, item_id), (count, revenue) in totals.items()
+            ]
+        )
+
+    @staticmethod
+    def top_items(limit: int = 10) -> List[ItemPopularity]:
+        """Most purchased items across both types; a scan of idx_item_popularity_rank"""
+        return ItemPopularity.query\
+            .order_by(
+                ItemPopularity.purchase_count.desc(),
+                ItemPopularity.item_type,
+                ItemPopularity.item_id
+            )\
+            .limit(limit)\
+            .all()
+
+    @staticmethod
+    def invalidate() -> None:
+        """Drop cached popular-items responses after a committed change"""
+        try:
+            AdvancedCacheService.invalidate_tags(POPULAR_ITEMS_TAG)
+        except Exception as e:
+            logger.error(f"Failed to invalidate popular items: {str(e)}")
+
+    def rebuild(self, wait: bool = True) -> Optional[int]:
+        """
+        Recompute every row from completed transactions
+
+        Holds SHARE ROW EXCLUSIVE on item_popularity for the rebuild, which
+        makes concurrent captures' upserts wait until it commits, so none is
+        lost between the aggregate and the swap. With wait=False the
+        rebuild is skipped (returns None) when another worker holds the
+        reconciliation lock.
+        """
+        if wait:
+            db.session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': RECONCILE_LOCK_KEY})
+        elif not db.session.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {'key': RECONCILE_LOCK_KEY}
+        ).scalar():
+            db.session.rollback()
+            return None
+
+        db.session.execute(text("LOCK TABLE item_popularity IN SHARE ROW EXCLUSIVE MODE"))
+        db.session.execute(text("DELETE FROM item_popularity"))
+        result = db.session.execute(text("""
+            INSERT INTO item_popularity (item_type, item_id, purchase_count, revenue, updated_at)
+            SELECT item_type,
+                   COALESCE(historical_record_id::text, bond_id),
+                   count(*),
+                   COALESCE(sum(fee), 0),
+                   CURRENT_TIMESTAMP
+            FROM transactions
+            WHERE payment_status = 'COMPLETED'
+              AND (historical_record_id IS NOT NULL OR bond_id IS NOT NULL)
+            GROUP BY 1, 2
+        """))
+        db.session.commit()
+        self.invalidate()
+
+        logger.info(f"Reconciled item popularity: {result.rowcount} items")
+        return result.rowcount
+
+    def ensure_started(self) -> None:
+        """Start this process's reconciliation thread if it isn't running"""
+        if not self.reconcile_interval or self._app is None:
+            return
+        # Threads don't survive a fork, so pre-forked workers each start their own
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._thread_pid = pid
+            self._thread = threading.Thread(target=self._run, name='item-popularity-reconcile', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.reconcile_interval)
+            with self._app.app_context():
+                try:
+                    # One worker per interval (atomic add on Redis); the
+                    # advisory lock in rebuild guards against overlap
+                    if cache.add(RECONCILE_LEASE_KEY, os.getpid(), timeout=max(int(self.reconcile_interval) - 1, 1)):
+                        self.rebuild(wait=False)
+                except Exception as e:
+                    logger.error(f"Item popularity reconciliation failed: {str(e)}")
+                    db.session.rollback()
+
+
+# Global service instance
+popularity_service = PopularityService()
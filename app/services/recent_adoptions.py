@@ -0,0 +1,161 @@
+# app/services/recent_adoptions.py
+
+import logging
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import text
+
+from app.db.db import db
+from app.db.models import RecentAdoption
+from app.services.cache_service import AdvancedCacheService
+
+logger = logging.getLogger(__name__)
+
+RECENT_ADOPTIONS_KEY = 'recent_adoptions:list'
+RECENT_ADOPTIONS_TAG = 'recent_adoptions'
+# Only appends and trims change the list, and both invalidate explicitly
+RECENT_ADOPTIONS_TIMEOUT = 3600
+
+# Render-ready snapshot in the shape the adopted-items grid reads;
+# fee is text so it renders like the Numeric column ("25.00")
+_SNAPSHOT_SQL = """
+    jsonb_build_object(
+        'id', hr.id::text,
+        'name', hr.name,
+        'fee', hr.fee::text,
+        'description', hr.description,
+        'imgurl', hr.imgurl,
+        'photo', hr.photo,
+        'adopted', true,
+        'donors', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'fee', di.fee::text,
+                'donor', jsonb_build_object('donor_name', d.donor_name)
+            ))
+            FROM donor_item di
+            JOIN donors d ON d.donor_id = di.donor_id
+            WHERE di.item_id = hr.id
+        ), '[]'::jsonb)
+    )
+"""
+
+
+class RecentAdoptionsService:
+    """
+    Bounded list of the newest adoptions
+
+    Captures append a snapshot inside their own transaction and the table is
+    trimmed to size, so the listing page reads a handful of rows (usually
+    straight from cache) instead of joining adopted records with their
+    donors on every view.
+    """
+
+    size = 20
+
+    @staticmethod
+    def init_app(app) -> None:
+        RecentAdoptionsService.size = app.config.get('RECENT_ADOPTIONS_SIZE', 20)
+
+    @staticmethod
+    def record(item_ids: Iterable[Any]) -> None:
+        """Append (or move to the front) newly adopted records; does not commit"""
+        item_ids = [str(item_id) for item_id in item_ids]
+        if not item_ids:
+            return
+
+        # The donor_item rows for this capture must be visible to the snapshot
+        db.session.flush()
+        db.session.execute(
+            text(f"""
+                INSERT INTO recent_adoptions (item_id, adopted_at, snapshot)
+                SELECT hr.id, CURRENT_TIMESTAMP, {_SNAPSHOT_SQL}
+                FROM historical_records hr
+                WHERE hr.id = ANY(CAST(:item_ids AS uuid[]))
+                ON CONFLICT (item_id)
+                DO UPDATE SET adopted_at = EXCLUDED.adopted_at, snapshot = EXCLUDED.snapshot
+            """),
+            {'item_ids': item_ids}
+        )
+        RecentAdoptionsService._trim()
+
+    @staticmethod
+    def remove(item_ids: Iterable[Any]) -> None:
+        """Drop records that are no longer adopted; does not commit"""
+        item_ids = [str(item_id) for item_id in item_ids]
+        if not item_ids:
+            return
+
+        db.session.execute(
+            text("DELETE FROM recent_adoptions WHERE item_id = ANY(CAST(:item_ids AS uuid[]))"),
+            {'item_ids': item_ids}
+        )
+
+    @staticmethod
+    def _trim() -> None:
+        db.session.execute(
+            text("""
+                DELETE FROM recent_adoptions
+                WHERE item_id IN (
+                    SELECT item_id FROM recent_adoptions
+                    ORDER BY adopted_at DESC
+                    OFFSET :size
+                )
+            """),
+            {'size': RecentAdoptionsService.size}
+        )
+
+    @staticmethod
+    def get_recent() -> List[Dict[str, Any]]:
+        """Newest adoptions first, as template-ready dicts"""
+        return AdvancedCacheService.get_or_compute(
+            RECENT_ADOPTIONS_KEY,
+            RecentAdoptionsService._load,
+            timeout=RECENT_ADOPTIONS_TIMEOUT,
+            tags=[RECENT_ADOPTIONS_TAG]
+        )
+
+    @staticmethod
+    def _load() -> List[Dict[str, Any]]:
+        rows = db.session.query(RecentAdoption.snapshot)\
+            .order_by(RecentAdoption.adopted_at.desc())\
+            .limit(RecentAdoptionsService.size)\
+            .all()
+        return [row.snapshot for row in rows]
+
+    @staticmethod
+    def invalidate() -> None:
+        """Drop the cached list after a committed append"""
+        try:
+            AdvancedCacheService.invalidate_tags(RECENT_ADOPTIONS_TAG)
+        except Exception as e:
+            logger.error(f"Failed to invalidate recent adoptions: {str(e)}")
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Refill the list from the catalog
+
+        Used for the initial backfill and after records are adopted or
+        edited outside the application.
+        """
+        db.session.execute(text("DELETE FROM recent_adoptions"))
+        result = db.session.execute(
+            text(f"""
+                INSERT INTO recent_adoptions (item_id, adopted_at, snapshot)
+                SELECT hr.id, hr.updated_at, {_SNAPSHOT_SQL}
+                FROM historical_records hr
+                WHERE hr.adopted = true
+                ORDER BY hr.updated_at DESC
+                LIMIT :size
+            """),
+            {'size': RecentAdoptionsService.size}
+        )
+        db.session.commit()
+        RecentAdoptionsService.invalidate()
+
+        logger.info(f"Rebuilt recent adoptions: {result.rowcount} records")
+        return result.rowcount
+
+
+# Global service instance
+recent_adoptions = RecentAdoptionsService()
@@ -0,0 +1,162 @@
+# app/services/response_cache.py
+
+"""
+Full-response cache
+Stores status, headers and body bytes (plus a gzip variant) for public GET
+pages, so a hit is served without running the view, its queries or templates
+"""
+
+import gzip
+import hashlib
+import logging
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from flask import Response, current_app, make_response, request
+
+from app.services.cache_service import AdvancedCacheService
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_KEY_PREFIX = 'response'
+RESPONSE_TAG = 'responses'
+
+# Query parameters that change what catalog pages render
+CATALOG_QUERY_PARAMS = frozenset({
+    'page', 'per_page', 'cursor', 'search', 'status', 'type', 'mayor', 'comptroller',
+    'year_from', 'year_to', 'min_price', 'max_price', 'min_fee', 'max_fee', 'sort'
+})
+
+# Never part of a stored entry: per-response, hop-by-hop or recomputed on serve
+_EXCLUDED_HEADERS = frozenset({
+    'set-cookie', 'content-length', 'content-encoding', 'date', 'connection',
+    'keep-alive', 'transfer-encoding', 'x-cache'
+})
+
+# Only text-like bodies of at least this size get a gzip variant
+GZIP_MIN_BYTES = 1024
+_COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+TagsArg = Union[None, Iterable[str], Callable[..., Iterable[str]]]
+
+
+def _normalized_query(allowed: Optional[Iterable[str]]) -> List:
+    """Whitelisted, sorted query pairs; empty values dropped so ?page= equals no page"""
+    allowed = CATALOG_QUERY_PARAMS if allowed is None else frozenset(allowed)
+    return sorted(
+        (name, value.strip())
+        for name, value in request.args.items(multi=True)
+        if name in allowed and value.strip()
+    )
+
+
+def _base_key(allowed: Optional[Iterable[str]]) -> str:
+    raw = f"{request.endpoint}|{request.path}|{_normalized_query(allowed)}"
+    return f"{RESPONSE_KEY_PREFIX}:{request.endpoint}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def _variant_key(base_key: str, vary: List[str]) -> str:
+    """Key for the stored variant matching this request's Vary header values"""
+    if not vary:
+        return base_key
+    values = '|'.join(f"{name}={request.headers.get(name, '')}" for name in vary)
+    return f"{base_key}:{hashlib.md5(values.encode()).hexdigest()[:12]}"
+
+
+def _cacheable(response: Response) -> bool:
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+    # Anything that sets or varies on cookies is per-visitor
+    if 'Set-Cookie' in response.headers:
+        return False
+    vary = {v.lower() for v in response.vary}
+    if '*' in vary or 'cookie' in vary:
+        return False
+    cache_control = response.cache_control
+    return not (cache_control.private or cache_control.no_store)
+
+
+def _entry_from(response: Response) -> Dict[str, Any]:
+    body = response.get_data()
+    entry = {
+        'status': response.status_code,
+        'headers': [(k, v) for k, v in response.headers.items() if k.lower() not in _EXCLUDED_HEADERS],
+        'body': body,
+        'gzip': None
+    }
+    if len(body) >= GZIP_MIN_BYTES and (response.mimetype or '').startswith(_COMPRESSIBLE_TYPES):
+        compressed = gzip.compress(body, compresslevel=6)
+        if len(compressed) < len(body):
+            entry['gzip'] = compressed
+    return entry
+
+
+def _response_from(entry: Dict[str, Any]) -> Response:
+    response = Response(status=entry['status'])
+    for name, value in entry['headers']:
+        response.headers.add(name, value)
+
+    if entry.get('gzip') and 'gzip' in request.accept_encodings:
+        response.set_data(entry['gzip'])
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response.set_data(entry['body'])
+    response.vary.add('Accept-Encoding')
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+
+def cached_response(timeout: int = 300, query_params: Optional[Iterable[str]] = None,
+                    tags: TagsArg = None):
+    """
+    Decorator caching a view's full response
+
+    Args:
+        timeout: Seconds to keep a stored response
+        query_params: Query parameters that are part of the key; anything else
+            (utm_*, fbclid, ...) is ignored. Defaults to CATALOG_QUERY_PARAMS.
+        tags: Invalidation tags, or a callable taking the view's arguments
+            and returning them (e.g. lambda bond_id: [f"item:{bond_id}"])
+    """
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if (request.method != 'GET' or request.args.get('no_cache')
+                    or not current_app.config.get('RESPONSE_CACHE_ENABLED', True)):
+                return f(*args, **kwargs)
+
+            # Warm-up requests always re-render so they refresh the stored entry
+            from app.services.cache_warmer import is_warm_request
+            warming = is_warm_request()
+
+            base_key = _base_key(query_params)
+            vary_key = f"{base_key}:vary"
+            try:
+                if not warming:
+                    vary = AdvancedCacheService.cache_get(vary_key) or []
+                    entry = AdvancedCacheService.cache_get(_variant_key(base_key, vary))
+                    if entry is not None:
+                        return _response_from(entry)
+            except Exception as e:
+                logger.warning(f"Response cache lookup failed for {request.path}: {str(e)}")
+
+            response = make_response(f(*args, **kwargs))
+            if not _cacheable(response):
+                return response
+
+            try:
+                vary = sorted({v.lower() for v in response.vary})
+                entry_tags = list(tags(*args, **kwargs) if callable(tags) else (tags or []))
+                entry_tags += [RESPONSE_TAG, f"{RESPONSE_TAG}:{request.endpoint}"]
+
+                AdvancedCacheService.cache_set(vary_key, vary, timeout=timeout, tags=entry_tags)
+                AdvancedCacheService.cache_set(
+                    _variant_key(base_key, vary), _entry_from(response),
+                    timeout=timeout, tags=entry_tags
+                )
+                response.headers['X-Cache'] = 'MISS'
+            except Exception as e:
+                logger.warning(f"Response cache store failed for {request.path}: {str(e)}")
+            return response
+        return decorated_function
+    return decorator
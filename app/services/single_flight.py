@@ -0,0 +1,159 @@
+# app/services/single_flight.py
+
+"""
+Single-flight coordination for cache fills
+Ensures one caller recomputes an expired entry while concurrent callers wait
+for its result (or are served the previous value) instead of stampeding the DB
+"""
+
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Compare-and-delete so a worker never releases a lock another worker now holds
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Per-key fill lock: in-process threading locks plus an optional Redis lock
+
+    The in-process lock collapses concurrent misses within a worker; the Redis
+    lock (SET NX PX) collapses them across workers sharing the backend.
+    """
+
+    def __init__(self, wait_timeout: float = 5.0, lock_timeout: float = 30.0,
+                 poll_interval: float = 0.05):
+        self.wait_timeout = wait_timeout
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._locks: Dict[str, list] = {}
+        self._registry_lock = threading.Lock()
+        self._stats = {'leaders': 0, 'followers': 0, 'stale_served': 0, 'wait_timeouts': 0}
+        self._stats_lock = threading.Lock()
+
+    def configure(self, wait_timeout: Optional[float] = None,
+                  lock_timeout: Optional[float] = None) -> None:
+        """Apply timeouts from application config"""
+        if wait_timeout is not None:
+            self.wait_timeout = wait_timeout
+        if lock_timeout is not None:
+            self.lock_timeout = lock_timeout
+
+    def run(self, key: str, lookup: Callable[[], Any], compute: Callable[[], Any],
+            stale: Any = None, redis_client=None, lock_prefix: str = '') -> Any:
+        """
+        Return lookup() if another caller filled the key, otherwise compute()
+
+        Args:
+            key: Cache key being filled
+            lookup: Reads the current cache value, None on miss
+            compute: Recomputes and stores the value, returning it
+            stale: Previous value to hand to followers instead of waiting
+            redis_client: Raw Redis client for the cross-worker lock, if any
+            lock_prefix: Backend key prefix for the Redis lock key
+        """
+        lock = self._acquire_local(key)
+        try:
+            if not lock.acquire(blocking=False):
+                # Someone in this worker is already filling the key
+                if stale is not None:
+                    self._count('stale_served')
+                    return stale
+                if not lock.acquire(timeout=self.wait_timeout):
+                    self._count('wait_timeouts')
+                    return compute()
+                self._count('followers')
+            try:
+                value = lookup()
+                if value is not None:
+                    return value
+                return self._fill(key, lookup, compute, stale, redis_client, lock_prefix)
+            finally:
+                lock.release()
+        finally:
+            self._release_local(key)
+
+    def _fill(self, key: str, lookup: Callable[[], Any], compute: Callable[[], Any],
+              stale: Any, redis_client, lock_prefix: str) -> Any:
+        """Take the cross-worker lock if there is one, then compute"""
+        if redis_client is None:
+            self._count('leaders')
+            return compute()
+
+        lock_key = f"{lock_prefix}lock:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = redis_client.set(lock_key, token, nx=True,
+                                        px=int(self.lock_timeout * 1000))
+        except Exception as e:
+            logger.warning(f"Fill lock unavailable for {key}: {str(e)}")
+            self._count('leaders')
+            return compute()
+
+        if not acquired:
+            # Another worker is filling the key
+            if stale is not None:
+                self._count('stale_served')
+                return stale
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                value = lookup()
+                if value is not None:
+                    self._count('followers')
+                    return value
+            self._count('wait_timeouts')
+            return compute()
+
+        try:
+            self._count('leaders')
+            return compute()
+        finally:
+            try:
+                redis_client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                logger.warning(f"Failed to release fill lock for {key}: {str(e)}")
+
+    def _acquire_local(self, key: str) -> threading.Lock:
+        """Get the key's lock, creating it and tracking users so it can be dropped"""
+        with self._registry_lock:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _release_local(self, key: str) -> None:
+        with self._registry_lock:
+            entry = self._locks.get(key)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._locks[key]
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._registry_lock:
+            stats['in_flight'] = len(self._locks)
+        stats['wait_timeout'] = self.wait_timeout
+        stats['lock_timeout'] = self.lock_timeout
+        return stats
+
+
+# Process-wide coordinator
+single_flight = SingleFlight()
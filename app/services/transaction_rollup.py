@@ -0,0 +1,185 @@
+# app/services/transaction_rollup.py
+
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, cast, func, or_, text
+
+from app.db.db import db
+from app.db.models import Transaction, TransactionDailyRollup
+
+logger = logging.getLogger(__name__)
+
+# Rows for the transactions just inserted, merged into their day's totals
+_UPSERT_SQL = """
+    INSERT INTO transaction_daily_rollup
+        (day, item_type, payment_status, transaction_count, revenue, min_fee, max_fee, updated_at)
+    SELECT CAST(timestamp AS date), item_type, payment_status,
+           count(*), sum(fee), min(fee), max(fee), CURRENT_TIMESTAMP
+    FROM transactions
+    WHERE {where}
+    GROUP BY 1, 2, 3
+"""
+
+
+class TransactionRollupService:
+    """
+    Per-day transaction totals by item type and payment status
+
+    Captures merge their transactions into the day's row inside their own
+    transaction, so analytics over a date range read one row per day and
+    type for every full day and only scan raw transactions for the partial
+    days at the edges of the range (usually just today).
+    """
+
+    @staticmethod
+    def record(transactions: Iterable[Transaction]) -> None:
+        """Add newly created transactions to their days' totals (upsert); does not commit"""
+        transactions = list(transactions)
+        if not transactions:
+            return
+
+        # The new rows (and their default ids) must exist for the aggregate
+        db.session.flush()
+        transaction_ids = [str(transaction.transaction_id) for transaction in transactions]
+        db.session.execute(
+            text(_UPSERT_SQL.format(where="transaction_id = ANY(CAST(:transaction_ids AS uuid[]))") + """
+                ON CONFLICT (day, item_type, payment_status)
+                DO UPDATE SET transaction_count = transaction_daily_rollup.transaction_count + EXCLUDED.transaction_count,
+                              revenue = transaction_daily_rollup.revenue + EXCLUDED.revenue,
+                              min_fee = LEAST(transaction_daily_rollup.min_fee, EXCLUDED.min_fee),
+                              max_fee = GREATEST(transaction_daily_rollup.max_fee, EXCLUDED.max_fee),
+                              updated_at = CURRENT_TIMESTAMP
+            """),
+            {'transaction_ids': transaction_ids}
+        )
+
+    @staticmethod
+    def rebuild(start_day: Optional[date] = None, end_day: Optional[date] = None) -> int:
+        """
+        Recompute the rows for [start_day, end_day] (all days when omitted)
+        from the transactions table and commit
+
+        Holds SHARE ROW EXCLUSIVE on the rollup while it runs, so concurrent
+        captures' upserts wait instead of landing between the delete and
+        the re-aggregate.
+        """
+        rollup_conditions, transaction_conditions, params = ['TRUE'], ['TRUE'], {}
+        if start_day:
+            rollup_conditions.append("day >= :start_day")
+            transaction_conditions.append("timestamp >= CAST(:start_day AS date)")
+            params['start_day'] = start_day
+        if end_day:
+            rollup_conditions.append("day <= :end_day")
+            transaction_conditions.append("timestamp < CAST(:end_day AS date) + 1")
+            params['end_day'] = end_day
+
+        db.session.execute(text("LOCK TABLE transaction_daily_rollup IN SHARE ROW EXCLUSIVE MODE"))
+        db.session.execute(
+            text(f"DELETE FROM transaction_daily_rollup WHERE {' AND '.join(rollup_conditions)}"),
+            params
+        )
+        result = db.session.execute(
+            text(_UPSERT_SQL.format(where=' AND '.join(transaction_conditions))),
+            params
+        )
+        db.session.commit()
+
+        logger.info(f"Rebuilt transaction rollup ({start_day or 'start'} to {end_day or 'end'}): {result.rowcount} rows")
+        return result.rowcount
+
+    @staticmethod
+    def full_day_bounds(start: datetime, end: datetime) -> Tuple[date, date]:
+        """
+        The whole days inside [start, end], as [first_day, end_day)
+
+        Computed by the database so days match the rollup's timestamp::date
+        in the session time zone; today is never a full day.
+        """
+        row = db.session.execute(
+            text("""
+                SELECT CASE WHEN CAST(:start AS timestamptz) = date_trunc('day', CAST(:start AS timestamptz))
+                            THEN CAST(CAST(:start AS timestamptz) AS date)
+                            ELSE CAST(CAST(:start AS timestamptz) AS date) + 1
+                       END,
+                       LEAST(CAST(CAST(:end AS timestamptz) AS date), CURRENT_DATE)
+            """),
+            {'start': start, 'end': end}
+        ).first()
+        return row[0], row[1]
+
+    @staticmethod
+    def aggregate(
+        start: datetime,
+        end: datetime,
+        group_by: str = 'day',
+        payment_status: str = 'COMPLETED'
+    ) -> List[Tuple[Any, str, int, Any, Any, Any]]:
+        """
+        (period, item_type, count, revenue, min_fee, max_fee) for transactions
+        with timestamp in [start, end], grouped by day, week or month
+
+        Full days come from the rollup; the partial days at either edge are
+        aggregated from transactions with timestamp range scans.
+        """
+        first_day, end_day = TransactionRollupService.full_day_bounds(start, end)
+
+        if group_by == 'day':
+            rollup_period = TransactionDailyRollup.day
+            raw_period = func.date(Transaction.timestamp)
+        else:
+            unit = 'week' if group_by == 'week' else 'month'
+            rollup_period = func.date_trunc(unit, cast(TransactionDailyRollup.day, DateTime(timezone=True)))
+            raw_period = func.date_trunc(unit, Transaction.timestamp)
+
+        totals: Dict[Tuple[Any, str], List] = {}
+
+        def merge(rows):
+            for period, item_type, count, revenue, min_fee, max_fee in rows:
+                entry = totals.setdefault((period, item_type), [0, 0, None, None])
+                entry[0] += count or 0
+                entry[1] += revenue or 0
+                if min_fee is not None:
+                    entry[2] = min_fee if entry[2] is None else min(entry[2], min_fee)
+                if max_fee is not None:
+                    entry[3] = max_fee if entry[3] is None else max(entry[3], max_fee)
+
+        if first_day < end_day:
+            merge(db.session.query(
+                rollup_period,
+                TransactionDailyRollup.item_type,
+                func.sum(TransactionDailyRollup.transaction_count),
+                func.sum(TransactionDailyRollup.revenue),
+                func.min(TransactionDailyRollup.min_fee),
+                func.max(TransactionDailyRollup.max_fee)
+            ).filter(
+                TransactionDailyRollup.day >= first_day,
+                TransactionDailyRollup.day < end_day,
+                TransactionDailyRollup.payment_status == payment_status
+            ).group_by(rollup_period, TransactionDailyRollup.item_type).all())
+
+            raw_range = or_(
+                and_(Transaction.timestamp >= start, Transaction.timestamp < first_day),
+                and_(Transaction.timestamp >= end_day, Transaction.timestamp <= end)
+            )
+        else:
+            raw_range = Transaction.timestamp.between(start, end)
+
+        merge(db.session.query(
+            raw_period,
+            Transaction.item_type,
+            func.count(Transaction.transaction_id),
+            func.sum(Transaction.fee),
+            func.min(Transaction.fee),
+            func.max(Transaction.fee)
+        ).filter(
+            raw_range,
+            Transaction.payment_status == payment_status
+        ).group_by(raw_period, Transaction.item_type).all())
+
+        return [(period, item_type, *values) for (period, item_type), values in totals.items()]
+
+
+# Global service instance
+transaction_rollup = TransactionRollupService()
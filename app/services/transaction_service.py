@@ -2,13 +2,19 @@
 
 import logging
 from typing import Optional, Dict, Any, Tuple, List
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.orm import joinedload
 
 from app.db.db import db
-from app.db.models import Transaction, Donor, HistoricalRecord, Bond, DonorItem
+from app.db.models import Transaction, Donor, HistoricalRecord, Bond, DonorItem, ITEM_TYPE_HISTORICAL_RECORD
 from app.services.paypal_service import paypal_service, PayPalAPIError
+from app.services.counter_service import counter_service, SCOPE_HISTORICAL_RECORDS, SCOPE_BONDS
+from app.services.cache_service import AdvancedCacheService
+from app.services.recent_adoptions import recent_adoptions
+from app.services.popularity_service import popularity_service
+from app.services.transaction_rollup import transaction_rollup
 
 logger = logging.getLogger(__name__)
 
@@ -84,20 +90,36 @@ class TransactionService:
             db.session.add(transaction)
             
             # Create DonorItem for historical records
-            if Transaction.is_uuid(item_id):
+            if transaction.item_type == ITEM_TYPE_HISTORICAL_RECORD:
                 donor_item = DonorItem(
                     donor_id=donor.donor_id,
-                    item_id=item_id,
+                    item_id=transaction.historical_record_id,
                     fee=fee
                 )
                 db.session.add(donor_item)
             
             # Update item status
-            TransactionService._update_item_status(item_id)
+            newly_adopted = TransactionService._update_item_status(transaction)
+            
+            # Same transaction as the adoption, so the list never shows an uncommitted one
+            if newly_adopted:
+                recent_adoptions.record([item_id])
+            
+            # Popularity ranking moves with the purchase, not with a re-aggregation
+            popularity_service.record_purchases([
+                (transaction.item_type, transaction.historical_record_id or transaction.bond_id, fee)
+            ])
+            transaction_rollup.record([transaction])
             
             # Commit all changes
             db.session.commit()
             
+            # The item's status and donors changed; drop its cached page and listings
+            AdvancedCacheService.invalidate_item_caches(str(item_id))
+            if newly_adopted:
+                recent_adoptions.invalidate()
+            popularity_service.invalidate()
+            
             logger.info(f"Transaction created successfully: {transaction.transaction_id}")
             return transaction, True
                 
@@ -176,22 +198,35 @@ class TransactionService:
         return donor
     
     @staticmethod
-    def _update_item_status(item_id: str) -> None:
-        """Update item status based on item type"""
-        if Transaction.is_uuid(item_id):
-            # Historical record
-            item = HistoricalRecord.query.get(item_id)
-            if item:
-                item.adopted = True
-            else:
+    def _update_item_status(transaction: Transaction) -> bool:
+        """
+        Update the transaction's item status by item type, keeping catalog counters in step
+        
+        Returns True when a historical record went from available to adopted.
+        """
+        item_id = transaction.item_id
+        if transaction.item_type == ITEM_TYPE_HISTORICAL_RECORD:
+            # Historical record; row lock keeps concurrent captures from double counting
+            item = HistoricalRecord.query.filter_by(id=transaction.historical_record_id).with_for_update().first()
+            if not item:
                 raise TransactionError(f"Historical record {item_id} not found")
+            if not item.adopted:
+                item.adopted = True
+                counter_service.record_transition(
+                    SCOPE_HISTORICAL_RECORDS, 'available', 'adopted'
+                )
+                return True
         else:
             # Bond
-            item = Bond.query.get(item_id)
-            if item:
-                item.status = 'purchased'
-            else:
+            item = Bond.query.filter_by(bond_id=transaction.bond_id).with_for_update().first()
+            if not item:
                 raise TransactionError(f"Bond {item_id} not found")
+            if item.status != 'purchased':
+                counter_service.record_transition(
+                    SCOPE_BONDS, item.status, 'purchased', item.type
+                )
+                item.status = 'purchased'
+        return False
     
     @staticmethod
     def get_transaction_by_paypal_id(paypal_transaction_id: str) -> Optional[Transaction]:
@@ -202,12 +237,14 @@ class TransactionService:
     
     @staticmethod
     def get_donor_transactions(donor_id: str, limit: int = 10) -> list:
-        """Get transactions for a specific donor"""
-        return Transaction.query\
+        """Get transactions for a specific donor, with their items resolved in two queries"""
+        transactions = Transaction.query\
             .filter_by(donor_id=donor_id)\
             .order_by(Transaction.timestamp.desc())\
             .limit(limit)\
             .all()
+        Transaction.preload_items(transactions)
+        return transactions
 
     @staticmethod
     def bulk_create_transactions(
@@ -283,11 +320,23 @@ class TransactionService:
                         db.session.flush()
                         
                         # Bulk create DonorItems and update item statuses
-                        TransactionService._bulk_update_items([t.item_id for t in batch_transactions])
+                        TransactionService._bulk_update_items(batch_transactions)
+                        popularity_service.record_purchases(
+                            (t.item_type, t.historical_record_id or t.bond_id, t.fee)
+                            for t in batch_transactions
+                        )
+                        transaction_rollup.record(batch_transactions)
                         
                         created_transactions.extend(batch_transactions)
                         
                         logger.info(f"Bulk created {len(batch_transactions)} transactions")
+                
+                # Batch committed; same invalidation as a single capture, per item
+                if batch_transactions:
+                    AdvancedCacheService.invalidate_items_caches(t.item_id for t in batch_transactions)
+                    if any(t.item_type == ITEM_TYPE_HISTORICAL_RECORD for t in batch_transactions):
+                        recent_adoptions.invalidate()
+                    popularity_service.invalidate()
                         
             except Exception as e:
                 logger.error(f"Batch transaction creation failed: {str(e)}")
@@ -327,50 +376,64 @@ class TransactionService:
         return donor
     
     @staticmethod
-    def _bulk_update_items(item_ids: List[str]) -> None:
-        """Bulk update item statuses for performance"""
-        if not item_ids:
+    def _bulk_update_items(transactions: List[Transaction]) -> None:
+        """Bulk update the statuses of the transactions' items for performance"""
+        if not transactions:
             return
         
-        # Separate UUIDs (historical records) from strings (bonds)
-        uuid_items = [id for id in item_ids if Transaction.is_uuid(id)]
-        bond_items = [id for id in item_ids if not Transaction.is_uuid(id)]
+        # Partition by the typed reference; no per-row UUID parsing
+        record_transactions = [t for t in transactions if t.item_type == ITEM_TYPE_HISTORICAL_RECORD]
+        uuid_items = [str(t.historical_record_id) for t in record_transactions]
+        bond_items = [t.bond_id for t in transactions if t.item_type != ITEM_TYPE_HISTORICAL_RECORD]
         
         # Bulk update historical records
         if uuid_items:
-            db.session.execute(
+            adopted_rows = db.session.execute(
                 text("""
                     UPDATE historical_records 
                     SET adopted = true, updated_at = CURRENT_TIMESTAMP 
-                    WHERE id = ANY(:item_ids)
+                    WHERE id = ANY(CAST(:item_ids AS uuid[])) AND adopted = false
+                    RETURNING id
                 """),
                 {'item_ids': uuid_items}
+            ).fetchall()
+            counter_service.record_transition(
+                SCOPE_HISTORICAL_RECORDS, 'available', 'adopted', amount=len(adopted_rows)
             )
             
             # Bulk create DonorItems
             donor_items = []
-            for item_id in uuid_items:
-                # This would need donor_id - simplified for example
+            for transaction in record_transactions:
                 donor_item = DonorItem(
-                    item_id=item_id,
-                    # donor_id would be provided in real implementation
-                    fee=0  # Would be actual fee
+                    item_id=transaction.historical_record_id,
+                    donor_id=transaction.donor_id,
+                    fee=transaction.fee
                 )
                 donor_items.append(donor_item)
             
             if donor_items:
                 db.session.add_all(donor_items)
+            
+            recent_adoptions.record(row.id for row in adopted_rows)
         
-        # Bulk update bonds
+        # Bulk update bonds, returning each row's previous status for the counters
         if bond_items:
-            db.session.execute(
+            purchased_rows = db.session.execute(
                 text("""
                     UPDATE bonds 
                     SET status = 'purchased', updated_at = CURRENT_TIMESTAMP 
-                    WHERE bond_id = ANY(:item_ids)
+                    FROM (
+                        SELECT bond_id, status AS old_status FROM bonds
+                        WHERE bond_id = ANY(:item_ids) AND status <> 'purchased'
+                        FOR UPDATE
+                    ) AS previous
+                    WHERE bonds.bond_id = previous.bond_id
+                    RETURNING previous.old_status, bonds.type
                 """),
                 {'item_ids': bond_items}
-            )
+            ).fetchall()
+            for old_status, bond_type in purchased_rows:
+                counter_service.record_transition(SCOPE_BONDS, old_status, 'purchased', bond_type)
     
     @staticmethod
     def get_transaction_analytics(
@@ -391,62 +454,29 @@ class TransactionService:
         if not end_date:
             end_date = datetime.now()
         
-        # Base query with date filtering
-        base_query = db.session.query(Transaction)\
-            .filter(Transaction.timestamp.between(start_date, end_date))\
-            .filter(Transaction.payment_status == 'COMPLETED')
-        
-        # Revenue analytics
-        revenue_stats = db.session.query(
-            func.count(Transaction.transaction_id).label('total_transactions'),
-            func.sum(Transaction.fee).label('total_revenue'),
-            func.avg(Transaction.fee).label('average_transaction'),
-            func.min(Transaction.fee).label('min_transaction'),
-            func.max(Transaction.fee).label('max_transaction')
-        ).filter(
-            Transaction.timestamp.between(start_date, end_date),
-            Transaction.payment_status == 'COMPLETED'
-        ).first()
-        
-        # Time-based grouping
-        if group_by == 'day':
-            time_expr = func.date(Transaction.timestamp)
-        elif group_by == 'week':
-            time_expr = func.date_trunc('week', Transaction.timestamp)
-        else:  # month
-            time_expr = func.date_trunc('month', Transaction.timestamp)
+        # Full days come from the daily rollup, partial days from transactions
+        rows = transaction_rollup.aggregate(start_date, end_date, group_by=group_by)
         
-        time_series = db.session.query(
-            time_expr.label('period'),
-            func.count(Transaction.transaction_id).label('transactions'),
-            func.sum(Transaction.fee).label('revenue')
-        ).filter(
-            Transaction.timestamp.between(start_date, end_date),
-            Transaction.payment_status == 'COMPLETED'
-        ).group_by(time_expr)\
-        .order_by(time_expr)\
-        .all()
+        total_transactions = sum(row[2] for row in rows)
+        total_revenue = sum(row[3] for row in rows)
+        min_fees = [row[4] for row in rows if row[4] is not None]
+        max_fees = [row[5] for row in rows if row[5] is not None]
         
-        # Item type analysis
-        item_type_stats = db.session.query(
-            func.case(
-                (func.char_length(Transaction.item_id) == 36, 'historical_record'),
-                else_='bond'
-            ).label('item_type'),
-            func.count(Transaction.transaction_id).label('count'),
-            func.sum(Transaction.fee).label('revenue')
-        ).filter(
-            Transaction.timestamp.between(start_date, end_date),
-            Transaction.payment_status == 'COMPLETED'
-        ).group_by('item_type').all()
+        time_series: Dict[Any, List] = {}
+        item_type_stats: Dict[str, List] = {}
+        for period, item_type, count, revenue, _, _ in rows:
+            for totals, key in ((time_series, period), (item_type_stats, item_type)):
+                entry = totals.setdefault(key, [0, 0])
+                entry[0] += count
+                entry[1] += revenue
         
         return {
             'summary': {
-                'total_transactions': revenue_stats.total_transactions or 0,
-                'total_revenue': float(revenue_stats.total_revenue or 0),
-                'average_transaction': float(revenue_stats.average_transaction or 0),
-                'min_transaction': float(revenue_stats.min_transaction or 0),
-                'max_transaction': float(revenue_stats.max_transaction or 0)
+                'total_transactions': total_transactions,
+                'total_revenue': float(total_revenue),
+                'average_transaction': float(total_revenue / total_transactions) if total_transactions else 0.0,
+                'min_transaction': float(min(min_fees)) if min_fees else 0.0,
+                'max_transaction': float(max(max_fees)) if max_fees else 0.0
             },
             'time_series': [
                 {
@@ -454,7 +484,7 @@ class TransactionService:
                     'transactions': transactions,
                     'revenue': float(revenue or 0)
                 }
-                for period, transactions, revenue in time_series
+                for period, (transactions, revenue) in sorted(time_series.items())
             ],
             'item_types': [
                 {
@@ -462,7 +492,7 @@ class TransactionService:
                     'count': count,
                     'revenue': float(revenue or 0)
                 }
-                for item_type, count, revenue in item_type_stats
+                for item_type, (count, revenue) in item_type_stats.items()
             ]
         }
 
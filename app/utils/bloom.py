@@ -0,0 +1,55 @@
+# app/utils/bloom.py
+
+"""
+Minimal Bloom filter
+Answers "definitely not present" without storing the members themselves
+"""
+
+import hashlib
+import math
+from typing import Iterable
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings
+
+    Sized from the expected member count and target false-positive rate;
+    k bit positions per member come from double hashing one blake2b digest.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.target_fp_rate = fp_rate
+        self.num_bits = max(int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, member: str):
+        digest = hashlib.blake2b(member.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, member: str) -> None:
+        for position in self._positions(member):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, members: Iterable[str]) -> None:
+        for member in members:
+            self.add(member)
+
+    def __contains__(self, member: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(member))
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.bits)
+
+    def expected_fp_rate(self) -> float:
+        """False-positive probability at the current fill, (1 - e^(-kn/m))^k"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
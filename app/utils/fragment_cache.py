@@ -0,0 +1,143 @@
+# app/utils/fragment_cache.py
+
+"""
+Jinja fragment cache for catalog grids
+Caches rendered HTML keyed on the identities and updated_at of the items it
+shows, so an unchanged grid is served pre-rendered instead of re-rendered
+
+Usage:
+    {% cache_fragment 'bonds-grid', pagination, pagination_args %}
+        ... cards and pagination links ...
+    {% endcache_fragment %}
+"""
+
+import hashlib
+import logging
+import time
+from typing import Any, List, Set
+
+from flask import current_app, request, has_request_context
+from jinja2 import Undefined, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+logger = logging.getLogger(__name__)
+
+FRAGMENT_KEY_PREFIX = 'fragment'
+FRAGMENT_TAG = 'fragments'
+
+
+def _identity(value: Any):
+    """Primary key of a mapped instance, or None for anything else"""
+    if not hasattr(value, 'updated_at'):
+        return None
+    try:
+        from sqlalchemy import inspect
+        identity = inspect(value).identity
+    except Exception:
+        identity = None
+    if identity:
+        return identity[0] if len(identity) == 1 else identity
+    return getattr(value, 'id', None) or getattr(value, 'bond_id', None)
+
+
+def _fingerprint(value: Any, parts: List[str], item_ids: Set[str]) -> None:
+    """Flatten a vary argument into key parts, collecting item ids along the way"""
+    # Views that don't pass a vary variable (e.g. pagination_args) vary as None
+    if isinstance(value, Undefined):
+        value = None
+
+    if value is None or isinstance(value, (str, int, float, bool)):
+        parts.append(repr(value))
+        return
+
+    identity = _identity(value)
+    if identity is not None:
+        item_ids.add(str(identity))
+        updated_at = value.updated_at.isoformat() if value.updated_at else ''
+        parts.append(f"{type(value).__name__}:{identity}:{updated_at}")
+        return
+
+    if isinstance(value, dict):
+        for key in sorted(value, key=str):
+            parts.append(str(key))
+            _fingerprint(value[key], parts, item_ids)
+        return
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        parts.append(f"[{len(value)}]")
+        for item in value:
+            _fingerprint(item, parts, item_ids)
+        return
+
+    # Pagination objects: the rows plus whatever the page links are built from
+    if hasattr(value, 'items') and hasattr(value, 'per_page'):
+        for attr in ('page', 'pages', 'total', 'per_page', 'next_cursor', 'prev_cursor'):
+            parts.append(f"{attr}={getattr(value, attr, None)!r}")
+        _fingerprint(list(value.items), parts, item_ids)
+        return
+
+    parts.append(str(value))
+
+
+def fragment_key(name: str, vary: List[Any]):
+    """Cache key and item tags for a fragment"""
+    parts: List[str] = []
+    item_ids: Set[str] = set()
+    # Links inside the fragment are built from the current endpoint
+    if has_request_context():
+        parts.append(str(request.endpoint))
+    for value in vary:
+        _fingerprint(value, parts, item_ids)
+
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return f"{FRAGMENT_KEY_PREFIX}:{name}:{digest}", item_ids
+
+
+class FragmentCacheExtension(Extension):
+    """Adds the {% cache_fragment name, *vary %} ... {% endcache_fragment %} block"""
+
+    tags = {'cache_fragment'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+
+        body = parser.parse_statements(('name:endcache_fragment',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_fragment', [nodes.List(args)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_fragment(self, args: List[Any], caller) -> str:
+        if not current_app.config.get('FRAGMENT_CACHE_ENABLED', True):
+            return caller()
+
+        from app.services.cache_service import AdvancedCacheService
+        from app.services.cache_metrics import cache_metrics
+
+        name, vary = args[0], args[1:]
+        try:
+            key, item_ids = fragment_key(name, vary)
+            cached = AdvancedCacheService.cache_get(key)
+        except Exception as e:
+            logger.warning(f"Fragment cache lookup failed for {name}: {str(e)}")
+            return caller()
+
+        if cached is not None:
+            return Markup(cached)
+
+        start = time.perf_counter()
+        rendered = caller()
+        cache_metrics.observe(key, 'recompute', time.perf_counter() - start)
+        try:
+            # Item tags let status changes drop fragments before their key moves on
+            AdvancedCacheService.cache_set(
+                key, str(rendered),
+                timeout=current_app.config.get('FRAGMENT_CACHE_TIMEOUT', 600),
+                tags=[FRAGMENT_TAG, f"{FRAGMENT_TAG}:{name}"] + [f"item:{item_id}" for item_id in item_ids]
+            )
+        except Exception as e:
+            logger.warning(f"Fragment cache store failed for {name}: {str(e)}")
+        return rendered
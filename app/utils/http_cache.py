@@ -0,0 +1,94 @@
+# app/utils/http_cache.py
+
+"""
+Conditional GET support
+Answers If-None-Match / If-Modified-Since with 304 from a cheap version
+lookup, before the view runs its main query or renders a template
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple
+
+from flask import current_app, make_response, request
+
+logger = logging.getLogger(__name__)
+
+# (last_modified, validator) for the resource, or None when it can't be versioned
+VersionGetter = Callable[..., Optional[Tuple[Optional[datetime], Any]]]
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """HTTP dates have second precision and are compared in UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def build_etag(last_modified: Optional[datetime], validator: Any) -> str:
+    """Weak ETag over the resource version, the exact URL and the deploy version"""
+    parts = [
+        last_modified.isoformat() if last_modified else '',
+        repr(validator),
+        request.full_path,
+        str(current_app.config.get('CACHE_VERSION', '1.0')),
+    ]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= _as_utc(request.if_modified_since)
+    return False
+
+
+def conditional_get(version_getter: VersionGetter):
+    """
+    Decorator adding ETag / Last-Modified validators to a GET view
+
+    Args:
+        version_getter: Called with the view's arguments; returns
+            (last_modified, validator) from a cheap query, or None to
+            skip validation (e.g. unknown item, which the view will 404)
+    """
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def decorated_function(*args, **kwargs) -> Any:
+            if request.method != 'GET' or not current_app.config.get('CONDITIONAL_GET_ENABLED', True):
+                return f(*args, **kwargs)
+
+            try:
+                version = version_getter(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"Version lookup failed for {request.path}: {str(e)}")
+                version = None
+
+            if version is None:
+                return f(*args, **kwargs)
+
+            last_modified, validator = version
+            last_modified = _as_utc(last_modified)
+            etag = build_etag(last_modified, validator)
+
+            if _not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Let browsers and proxies store the page but revalidate every time
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return decorated_function
+    return decorator
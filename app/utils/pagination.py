@@ -0,0 +1,239 @@
+# app/utils/pagination.py
+
+"""
+Keyset (seek) pagination helpers
+Replaces OFFSET/LIMIT scans with index seeks on the listing sort key, so
+page N costs the same as page 1 and no total count is required
+"""
+
+import base64
+import json
+import logging
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import and_, or_, tuple_
+
+from app.utils.validators import ValidationError
+
+logger = logging.getLogger(__name__)
+
+DIRECTION_NEXT = 'next'
+DIRECTION_PREV = 'prev'
+
+
+def _encode_value(value: Any) -> Any:
+    """Tag non-JSON values so they round-trip through the cursor"""
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {'u': str(value)}
+    if isinstance(value, Decimal):
+        return {'n': str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    """Reverse of _encode_value"""
+    if isinstance(value, dict) and len(value) == 1:
+        tag, raw = next(iter(value.items()))
+        if tag == 'dt':
+            return datetime.fromisoformat(raw)
+        if tag == 'd':
+            return date.fromisoformat(raw)
+        if tag == 'u':
+            return uuid.UUID(raw)
+        if tag == 'n':
+            return Decimal(raw)
+    return value
+
+
+def encode_cursor(values: Sequence[Any], direction: str = DIRECTION_NEXT) -> str:
+    """Encode sort key values into an opaque, URL-safe cursor"""
+    payload = {'v': [_encode_value(v) for v in values], 'd': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[List[Any], str]:
+    """Decode a cursor produced by encode_cursor into (values, direction)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in payload['v']]
+        direction = payload.get('d', DIRECTION_NEXT)
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValidationError(f"Invalid pagination cursor: {str(e)}")
+
+    if direction not in (DIRECTION_NEXT, DIRECTION_PREV):
+        raise ValidationError("Invalid pagination cursor direction")
+    return values, direction
+
+
+def _row_compare(columns: Sequence[Any], values: Sequence[Any], greater: bool):
+    """Row-value comparison (a, b) > (x, y) that btree indexes can seek on"""
+    if len(columns) == 1:
+        return columns[0] > values[0] if greater else columns[0] < values[0]
+    left, right = tuple_(*columns), tuple_(*values)
+    return left > right if greater else left < right
+
+
+def _seek_predicate(columns: Sequence[Any], values: Sequence[Any],
+                    greater: bool, nullable_leading: bool):
+    """
+    Build the WHERE clause that skips everything up to and including the cursor row
+
+    NULLs in the leading column follow PostgreSQL's default ordering
+    (NULLS LAST ascending, NULLS FIRST descending), i.e. they sort as the
+    largest value, so the seek keeps matching the plain btree index order.
+    """
+    if not nullable_leading:
+        return _row_compare(columns, values, greater)
+
+    leading, rest = columns[0], columns[1:]
+    leading_value, rest_values = values[0], values[1:]
+
+    if leading_value is None:
+        tie = and_(leading.is_(None), _row_compare(rest, rest_values, greater))
+        return tie if greater else or_(leading.isnot(None), tie)
+
+    beyond = _row_compare(columns, values, greater)
+    return or_(beyond, leading.is_(None)) if greater else beyond
+
+
+class KeysetPagination:
+    """
+    Count-free pagination result
+
+    Exposes the same ``items``/``has_next``/``has_prev``/``per_page``
+    attributes as Flask-SQLAlchemy's Pagination, plus opaque cursors for
+    the neighbouring pages.
+    """
+
+    is_keyset = True
+
+    def __init__(self, items: List[Any], per_page: int, has_next: bool, has_prev: bool,
+                 next_cursor: Optional[str] = None, prev_cursor: Optional[str] = None,
+                 total: Optional[int] = None):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    def to_dict(self) -> dict:
+        """Serializable pagination metadata for JSON responses"""
+        return {
+            'per_page': self.per_page,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'total': self.total
+        }
+
+
+def keyset_paginate(query, sort_columns: Sequence[Any], cursor: Optional[str] = None,
+                    per_page: int = 20, descending: bool = True,
+                    nullable_leading: bool = False,
+                    total: Optional[int] = None,
+                    key_getter: Optional[Callable[[Any], Sequence[Any]]] = None) -> KeysetPagination:
+    """
+    Paginate a query by seeking past the cursor row instead of using OFFSET
+
+    Args:
+        query: SQLAlchemy query with filters already applied (no ORDER BY)
+        sort_columns: Model attributes forming a unique sort key, e.g.
+            (Bond.issue_date, Bond.bond_id); the last one must be unique
+        cursor: Opaque cursor from a previous page, or None for the first page
+        per_page: Page size
+        descending: Sort direction of the listing
+        nullable_leading: Whether the leading sort column may be NULL
+        total: Optional maintained count to display; never computed here
+        key_getter: Extracts the sort key from a result row; defaults to
+            reading each sort column's attribute, which suits entity queries
+    """
+    values, direction = (decode_cursor(cursor) if cursor else (None, DIRECTION_NEXT))
+    if values is not None and len(values) != len(sort_columns):
+        raise ValidationError("Pagination cursor does not match this listing")
+
+    forward = direction == DIRECTION_NEXT
+    # Walking backwards reverses both the ORDER BY and the seek comparison
+    order_desc = descending if forward else not descending
+
+    if values is not None:
+        query = query.filter(
+            _seek_predicate(sort_columns, values, greater=not order_desc,
+                            nullable_leading=nullable_leading)
+        )
+
+    query = query.order_by(*[c.desc() if order_desc else c.asc() for c in sort_columns])
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if not forward:
+        rows.reverse()
+
+    has_next = has_more if forward else True
+    has_prev = (values is not None) if forward else has_more
+
+    def key_of(row):
+        if key_getter is not None:
+            return list(key_getter(row))
+        return [getattr(row, c.key) for c in sort_columns]
+
+    next_cursor = encode_cursor(key_of(rows[-1]), DIRECTION_NEXT) if rows and has_next else None
+    prev_cursor = encode_cursor(key_of(rows[0]), DIRECTION_PREV) if rows and has_prev else None
+
+    return KeysetPagination(
+        items=rows,
+        per_page=per_page,
+        has_next=has_next,
+        has_prev=has_prev,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total=total
+    )
+
+
+def counted_paginate(query, page: int, per_page: int, total: int, max_per_page: int = 50):
+    """
+    Numbered pagination whose total comes from a maintained counter
+
+    Equivalent to query.paginate() but skips the SELECT count(*) that
+    Flask-SQLAlchemy would otherwise run alongside every page query.
+    """
+    pagination = query.paginate(
+        page=page,
+        per_page=per_page,
+        error_out=False,
+        max_per_page=max_per_page,
+        count=False
+    )
+    pagination.total = total
+    return pagination
+
+
+class CachedPagination(Pagination):
+    """
+    Numbered pagination over an already-fetched page, e.g. a cache hit
+
+    Takes the page's items and total as keyword arguments and runs no
+    queries; page links (iter_pages, prev_num, next_num) work as usual.
+    """
+
+    def _query_items(self) -> List[Any]:
+        return list(self._query_args['items'])
+
+    def _query_count(self) -> int:
+        return self._query_args['total']
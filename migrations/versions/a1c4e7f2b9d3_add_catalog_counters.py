@@ -0,0 +1,59 @@
+"""Add maintained catalog counters
+
+Revision ID: a1c4e7f2b9d3
+Revises: f5a6b7c8d9e0
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'a1c4e7f2b9d3'
+down_revision = 'f5a6b7c8d9e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create catalog_counters and backfill it from the catalog tables"""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    
+    if 'catalog_counters' not in inspector.get_table_names():
+        op.create_table(
+            'catalog_counters',
+            sa.Column('scope', sa.String(length=50), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('item_type', sa.String(length=100), nullable=False, server_default=''),
+            sa.Column('count', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.PrimaryKeyConstraint('scope', 'status', 'item_type')
+        )
+    
+    # Backfill from current catalog state
+    op.execute("DELETE FROM catalog_counters")
+    op.execute("""
+        INSERT INTO catalog_counters (scope, status, item_type, count)
+        SELECT 'historical_records',
+               CASE WHEN adopted THEN 'adopted' ELSE 'available' END,
+               '',
+               count(*)
+        FROM historical_records
+        GROUP BY adopted
+    """)
+    op.execute("""
+        INSERT INTO catalog_counters (scope, status, item_type, count)
+        SELECT 'bonds', status, COALESCE(type, ''), count(*)
+        FROM bonds
+        GROUP BY status, COALESCE(type, '')
+    """)
+
+
+def downgrade():
+    """Drop catalog counters"""
+    try:
+        op.drop_table('catalog_counters')
+    except Exception as e:
+        print(f"Error removing catalog_counters table: {e}")
@@ -0,0 +1,55 @@
+"""Add daily transaction rollup
+
+Revision ID: a9d3f7c1e5b2
+Revises: f1c6a8e2b4d7
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3f7c1e5b2'
+down_revision = 'f1c6a8e2b4d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create transaction_daily_rollup and backfill it from transaction history"""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'transaction_daily_rollup' not in inspector.get_table_names():
+        op.create_table(
+            'transaction_daily_rollup',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('item_type', sa.String(length=20), nullable=False),
+            sa.Column('payment_status', sa.String(length=20), nullable=False),
+            sa.Column('transaction_count', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'),
+            sa.Column('min_fee', sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column('max_fee', sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.PrimaryKeyConstraint('day', 'item_type', 'payment_status')
+        )
+
+    # Backfill from transaction history
+    op.execute("DELETE FROM transaction_daily_rollup")
+    op.execute("""
+        INSERT INTO transaction_daily_rollup
+            (day, item_type, payment_status, transaction_count, revenue, min_fee, max_fee, updated_at)
+        SELECT CAST(timestamp AS date), item_type, payment_status,
+               count(*), sum(fee), min(fee), max(fee), now()
+        FROM transactions
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade():
+    """Drop daily transaction rollup"""
+    try:
+        op.drop_table('transaction_daily_rollup')
+    except Exception as e:
+        print(f"Error removing transaction_daily_rollup table: {e}")
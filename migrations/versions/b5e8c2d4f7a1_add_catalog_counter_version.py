@@ -0,0 +1,40 @@
+"""Add monotonic version to catalog counters
+
+Revision ID: b5e8c2d4f7a1
+Revises: a9d3f7c1e5b2
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8c2d4f7a1'
+down_revision = 'a9d3f7c1e5b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add catalog_counters.version, bumped by every counter adjustment"""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'catalog_counters' not in inspector.get_table_names():
+        return
+
+    existing_columns = [col['name'] for col in inspector.get_columns('catalog_counters')]
+    if 'version' not in existing_columns:
+        op.add_column(
+            'catalog_counters',
+            sa.Column('version', sa.BigInteger(), nullable=False, server_default='0')
+        )
+
+
+def downgrade():
+    """Remove catalog counter version"""
+    try:
+        op.drop_column('catalog_counters', 'version')
+    except Exception as e:
+        print(f"Error removing catalog_counters.version: {e}")
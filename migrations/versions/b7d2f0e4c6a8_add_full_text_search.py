@@ -0,0 +1,87 @@
+"""Add full-text search vectors for historical records and bonds
+
+Revision ID: b7d2f0e4c6a8
+Revises: a1c4e7f2b9d3
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f0e4c6a8'
+down_revision = 'a1c4e7f2b9d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add generated tsvector columns with GIN indexes"""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    
+    if 'historical_records' in inspector.get_table_names():
+        existing_columns = [col['name'] for col in inspector.get_columns('historical_records')]
+        existing_indexes = [idx['name'] for idx in inspector.get_indexes('historical_records')]
+        
+        try:
+            if 'search_vector' not in existing_columns:
+                op.execute("""
+                    ALTER TABLE historical_records ADD COLUMN search_vector tsvector
+                    GENERATED ALWAYS AS (
+                        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+                        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+                    ) STORED
+                """)
+            
+            if 'idx_historical_records_search_vector' not in existing_indexes:
+                op.create_index(
+                    'idx_historical_records_search_vector',
+                    'historical_records',
+                    ['search_vector'],
+                    postgresql_using='gin'
+                )
+        except Exception as e:
+            print(f"Error adding historical_records search vector: {e}")
+    
+    if 'bonds' in inspector.get_table_names():
+        existing_columns = [col['name'] for col in inspector.get_columns('bonds')]
+        existing_indexes = [idx['name'] for idx in inspector.get_indexes('bonds')]
+        
+        try:
+            if 'search_vector' not in existing_columns:
+                op.execute("""
+                    ALTER TABLE bonds ADD COLUMN search_vector tsvector
+                    GENERATED ALWAYS AS (
+                        setweight(to_tsvector('english', coalesce(type, '')), 'A') ||
+                        setweight(to_tsvector('english', coalesce(purpose_of_bond, '')), 'A') ||
+                        setweight(to_tsvector('english', coalesce(vignette, '')), 'B') ||
+                        setweight(to_tsvector('english', coalesce(mayor, '')), 'C')
+                    ) STORED
+                """)
+            
+            if 'idx_bonds_search_vector' not in existing_indexes:
+                op.create_index(
+                    'idx_bonds_search_vector',
+                    'bonds',
+                    ['search_vector'],
+                    postgresql_using='gin'
+                )
+        except Exception as e:
+            print(f"Error adding bonds search vector: {e}")
+
+
+def downgrade():
+    """Remove full-text search vectors"""
+    try:
+        op.drop_index('idx_bonds_search_vector', 'bonds')
+        op.drop_column('bonds', 'search_vector')
+    except Exception as e:
+        print(f"Error removing bonds search vector: {e}")
+    
+    try:
+        op.drop_index('idx_historical_records_search_vector', 'historical_records')
+        op.drop_column('historical_records', 'search_vector')
+    except Exception as e:
+        print(f"Error removing historical_records search vector: {e}")
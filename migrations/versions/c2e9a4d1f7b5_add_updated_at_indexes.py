@@ -0,0 +1,48 @@
+"""Add updated_at indexes for conditional GET validators
+
+Revision ID: c2e9a4d1f7b5
+Revises: b7d2f0e4c6a8
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'c2e9a4d1f7b5'
+down_revision = 'b7d2f0e4c6a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Index updated_at so max(updated_at) is a single index probe"""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    
+    for table_name, index_name in (
+        ('historical_records', 'idx_historical_records_updated_at'),
+        ('bonds', 'idx_bonds_updated_at'),
+    ):
+        if table_name not in inspector.get_table_names():
+            continue
+        
+        existing_indexes = [idx['name'] for idx in inspector.get_indexes(table_name)]
+        try:
+            if index_name not in existing_indexes:
+                op.create_index(index_name, table_name, ['updated_at'])
+        except Exception as e:
+            print(f"Error creating {index_name}: {e}")
+
+
+def downgrade():
+    """Remove updated_at indexes"""
+    for table_name, index_name in (
+        ('bonds', 'idx_bonds_updated_at'),
+        ('historical_records', 'idx_historical_records_updated_at'),
+    ):
+        try:
+            op.drop_index(index_name, table_name)
+        except Exception as e:
+            print(f"Error removing {index_name}: {e}")
@@ -0,0 +1,72 @@
+"""Add maintained recent adoptions list
+
+Revision ID: d4b8e1f3a6c2
+Revises: c2e9a4d1f7b5
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8e1f3a6c2'
+down_revision = 'c2e9a4d1f7b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create recent_adoptions and backfill it with the 20 newest adoptions"""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'recent_adoptions' not in inspector.get_table_names():
+        op.create_table(
+            'recent_adoptions',
+            sa.Column('item_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('adopted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('snapshot', postgresql.JSONB(), nullable=False),
+            sa.ForeignKeyConstraint(['item_id'], ['historical_records.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('item_id')
+        )
+        op.create_index('idx_recent_adoptions_adopted_at', 'recent_adoptions', ['adopted_at'])
+
+    # Backfill from current catalog state
+    op.execute("DELETE FROM recent_adoptions")
+    op.execute("""
+        INSERT INTO recent_adoptions (item_id, adopted_at, snapshot)
+        SELECT hr.id, hr.updated_at,
+               jsonb_build_object(
+                   'id', hr.id::text,
+                   'name', hr.name,
+                   'fee', hr.fee::text,
+                   'description', hr.description,
+                   'imgurl', hr.imgurl,
+                   'photo', hr.photo,
+                   'adopted', true,
+                   'donors', COALESCE((
+                       SELECT jsonb_agg(jsonb_build_object(
+                           'fee', di.fee::text,
+                           'donor', jsonb_build_object('donor_name', d.donor_name)
+                       ))
+                       FROM donor_item di
+                       JOIN donors d ON d.donor_id = di.donor_id
+                       WHERE di.item_id = hr.id
+                   ), '[]'::jsonb)
+               )
+        FROM historical_records hr
+        WHERE hr.adopted = true
+        ORDER BY hr.updated_at DESC
+        LIMIT 20
+    """)
+
+
+def downgrade():
+    """Drop recent adoptions"""
+    try:
+        op.drop_index('idx_recent_adoptions_adopted_at', 'recent_adoptions')
+        op.drop_table('recent_adoptions')
+    except Exception as e:
+        print(f"Error removing recent_adoptions table: {e}")
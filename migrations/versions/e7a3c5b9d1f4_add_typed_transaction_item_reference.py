@@ -0,0 +1,117 @@
+"""Add typed item reference to transactions
+
+Revision ID: e7a3c5b9d1f4
+Revises: d4b8e1f3a6c2
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c5b9d1f4'
+down_revision = 'd4b8e1f3a6c2'
+branch_labels = None
+depends_on = None
+
+# Same forms uuid.UUID() accepts for record ids: optional braces and hyphens
+UUID_PATTERN = r'^\{?[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}\}?$'
+
+
+def upgrade():
+    """Add item_type and typed foreign keys, backfilled from item_id"""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'transactions' not in inspector.get_table_names():
+        return
+
+    existing_columns = [col['name'] for col in inspector.get_columns('transactions')]
+    if 'item_type' not in existing_columns:
+        op.add_column('transactions', sa.Column('item_type', sa.String(length=20), nullable=True))
+    if 'historical_record_id' not in existing_columns:
+        op.add_column('transactions', sa.Column('historical_record_id', postgresql.UUID(as_uuid=True), nullable=True))
+    if 'bond_id' not in existing_columns:
+        op.add_column('transactions', sa.Column('bond_id', sa.String(length=255), nullable=True))
+
+    # Backfill: classify once, then resolve each type with an equality join.
+    # The CASE keeps the uuid cast away from bond ids.
+    op.execute(sa.text("""
+        UPDATE transactions
+        SET item_type = CASE WHEN item_id ~* :pattern THEN 'historical_record' ELSE 'bond' END
+        WHERE item_type IS NULL
+    """).bindparams(pattern=UUID_PATTERN))
+    op.execute("""
+        UPDATE transactions t
+        SET historical_record_id = hr.id
+        FROM historical_records hr
+        WHERE t.item_type = 'historical_record'
+          AND t.historical_record_id IS NULL
+          AND hr.id = CASE WHEN t.item_type = 'historical_record' THEN t.item_id::uuid END
+    """)
+    op.execute("""
+        UPDATE transactions t
+        SET bond_id = b.bond_id
+        FROM bonds b
+        WHERE t.item_type = 'bond'
+          AND t.bond_id IS NULL
+          AND b.bond_id = t.item_id
+    """)
+    # Transactions whose item no longer exists keep their type and a NULL reference
+
+    op.alter_column('transactions', 'item_type', nullable=False)
+
+    existing_indexes = [idx['name'] for idx in inspector.get_indexes('transactions')]
+    try:
+        if 'ix_transactions_historical_record_id' not in existing_indexes:
+            op.create_index('ix_transactions_historical_record_id', 'transactions', ['historical_record_id'])
+        if 'ix_transactions_bond_id' not in existing_indexes:
+            op.create_index('ix_transactions_bond_id', 'transactions', ['bond_id'])
+
+        op.create_foreign_key(
+            'transactions_historical_record_id_fkey', 'transactions', 'historical_records',
+            ['historical_record_id'], ['id'], ondelete='SET NULL'
+        )
+        op.create_foreign_key(
+            'transactions_bond_id_fkey', 'transactions', 'bonds',
+            ['bond_id'], ['bond_id'], ondelete='SET NULL'
+        )
+        op.create_check_constraint(
+            'check_valid_item_type', 'transactions',
+            "item_type IN ('historical_record', 'bond')"
+        )
+        op.create_check_constraint(
+            'check_item_reference_matches_type', 'transactions',
+            "(historical_record_id IS NULL OR item_type = 'historical_record') AND "
+            "(bond_id IS NULL OR item_type = 'bond')"
+        )
+    except Exception as e:
+        print(f"Error adding typed item reference constraints: {e}")
+
+
+def downgrade():
+    """Remove typed item reference"""
+    for constraint, type_ in (
+        ('check_item_reference_matches_type', 'check'),
+        ('check_valid_item_type', 'check'),
+        ('transactions_bond_id_fkey', 'foreignkey'),
+        ('transactions_historical_record_id_fkey', 'foreignkey'),
+    ):
+        try:
+            op.drop_constraint(constraint, 'transactions', type_=type_)
+        except Exception as e:
+            print(f"Error removing {constraint}: {e}")
+
+    for index_name in ('ix_transactions_bond_id', 'ix_transactions_historical_record_id'):
+        try:
+            op.drop_index(index_name, 'transactions')
+        except Exception as e:
+            print(f"Error removing {index_name}: {e}")
+
+    for column in ('bond_id', 'historical_record_id', 'item_type'):
+        try:
+            op.drop_column('transactions', column)
+        except Exception as e:
+            print(f"Error removing transactions.{column}: {e}")
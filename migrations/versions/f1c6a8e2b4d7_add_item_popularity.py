@@ -0,0 +1,61 @@
+"""Add maintained item popularity table
+
+Revision ID: f1c6a8e2b4d7
+Revises: e7a3c5b9d1f4
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'f1c6a8e2b4d7'
+down_revision = 'e7a3c5b9d1f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create item_popularity and backfill it from completed transactions"""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'item_popularity' not in inspector.get_table_names():
+        op.create_table(
+            'item_popularity',
+            sa.Column('item_type', sa.String(length=20), nullable=False),
+            sa.Column('item_id', sa.String(length=255), nullable=False),
+            sa.Column('purchase_count', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.PrimaryKeyConstraint('item_type', 'item_id')
+        )
+        op.create_index(
+            'idx_item_popularity_rank', 'item_popularity',
+            [sa.text('purchase_count DESC'), 'item_type', 'item_id']
+        )
+
+    # Backfill from transaction history
+    op.execute("DELETE FROM item_popularity")
+    op.execute("""
+        INSERT INTO item_popularity (item_type, item_id, purchase_count, revenue, updated_at)
+        SELECT item_type,
+               COALESCE(historical_record_id::text, bond_id),
+               count(*),
+               COALESCE(sum(fee), 0),
+               now()
+        FROM transactions
+        WHERE payment_status = 'COMPLETED'
+          AND (historical_record_id IS NOT NULL OR bond_id IS NOT NULL)
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade():
+    """Drop item popularity"""
+    try:
+        op.drop_index('idx_item_popularity_rank', 'item_popularity')
+        op.drop_table('item_popularity')
+    except Exception as e:
+        print(f"Error removing item_popularity table: {e}")